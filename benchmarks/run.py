@@ -0,0 +1,285 @@
+"""
+Throughput benchmark of the analyze pipeline against a local fixture server.
+
+```
+python -m benchmarks.run --mode stub --pages 500 --max-workers 16 --output head.json
+python -m benchmarks.run --mode cli --pages 50 --cli-args "--executor process"
+```
+
+The report is a json document (pages per second, memory high-water mark,
+per-phase latency percentiles) meant to be diffed between versions
+"""
+import argparse
+import csv
+import platform
+import sys
+from asyncio import run
+from importlib.metadata import PackageNotFoundError, version
+from json import dumps
+from resource import RUSAGE_CHILDREN, RUSAGE_SELF, getrusage
+from shlex import split
+from subprocess import run as run_process
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Dict, List, Tuple
+from unittest.mock import patch
+
+from ecoindex.models import WindowSize
+from loguru import logger
+
+from ecoindex_cli import __version__
+from ecoindex_cli.cli.helper import run_page_analysis
+from ecoindex_cli.retry import Failure
+from ecoindex_cli.scheduler import AnalysisScheduler
+from ecoindex_cli.timing import PHASES, PhaseTimer, TimingStats
+from tests.fixture_server import PageSpec, fixture_server_process, get_urls
+from tests.stub_scraper import StubDriverPool, StubScraper
+
+
+def get_version() -> str:
+    try:
+        return version("ecoindex-cli")
+    except PackageNotFoundError:
+        return __version__
+
+
+def get_max_rss(who: int) -> int:
+    """
+    Returns the maximum resident set size in bytes (`ru_maxrss` is in
+    kilobytes on linux, but in bytes on macos)
+    """
+    max_rss = getrusage(who).ru_maxrss
+
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+async def run_stub_benchmark(
+    urls: List[str],
+    window_size: WindowSize,
+    max_workers: int,
+    wait: int,
+    max_pages_per_driver: int,
+) -> Tuple[int, TimingStats]:
+    """
+    Runs `run_page_analysis` on the fixture pages with stub drivers, which
+    download pages and their resources without rendering them. This
+    measures the overhead of the pipeline itself: scheduling, driver pool,
+    metrics and results processing
+    """
+    driver_pool = StubDriverPool(
+        size=max_workers, max_pages_per_driver=max_pages_per_driver
+    )
+    scheduler = AnalysisScheduler(max_workers=max_workers)
+    stats = TimingStats()
+    successes = 0
+
+    async def analyze(url: str) -> Tuple[bool, Dict[str, float]]:
+        timer = PhaseTimer()
+        result = await run_page_analysis(
+            url=url,
+            window_size=window_size,
+            driver_pool=driver_pool,
+            scheduler=scheduler,
+            wait_after_scroll=wait,
+            wait_before_scroll=wait,
+            logger=logger,
+            timer=timer,
+        )
+
+        return (not isinstance(result, Failure), timer.timings)
+
+    def on_done(url: str, outcome: Tuple | None, exception: Exception | None) -> None:
+        nonlocal successes
+
+        if exception:
+            logger.error(f"{url} -- {exception}")
+            return
+
+        success, timings = outcome
+        successes += success
+        stats.add(timings)
+
+    with patch("ecoindex_cli.cli.helper.EcoindexScraper", StubScraper):
+        try:
+            await scheduler.run(jobs=urls, analyze=analyze, on_done=on_done)
+        finally:
+            scheduler.close()
+            driver_pool.close()
+
+    return (successes, stats)
+
+
+def run_cli_benchmark(
+    urls: List[str],
+    window_size: WindowSize,
+    max_workers: int,
+    wait: int,
+    cli_args: List[str],
+) -> Tuple[int, TimingStats]:
+    """
+    Runs `ecoindex-cli analyze` end-to-end, with real chrome drivers, on the
+    fixture pages. Phase latencies are read from its timings file
+    """
+    stats = TimingStats()
+
+    with TemporaryDirectory() as folder:
+        urls_file = f"{folder}/urls.csv"
+        results_file = f"{folder}/results.csv"
+
+        with open(urls_file, "w") as fp:
+            fp.write("\n".join(urls))
+
+        run_process(
+            [
+                sys.executable,
+                "-m",
+                "ecoindex_cli.cli.app",
+                "analyze",
+                "--urls-file",
+                urls_file,
+                "--window-size",
+                f"{window_size.width},{window_size.height}",
+                "--max-workers",
+                str(max_workers),
+                "--wait-after-scroll",
+                str(wait),
+                "--wait-before-scroll",
+                str(wait),
+                "--output-file",
+                results_file,
+                "--no-interaction",
+                "--no-cache",
+                "--timings",
+                *cli_args,
+            ],
+            check=False,
+        )
+
+        try:
+            with open(results_file) as fp:
+                successes = sum(int(row["nodes"]) > 0 for row in csv.DictReader(fp))
+
+            with open(f"{folder}/results.timings.csv") as fp:
+                for row in csv.DictReader(fp):
+                    # Phases that were not run are written as zero
+                    stats.add(
+                        {
+                            phase: float(row[phase])
+                            for phase in PHASES
+                            if float(row[phase]) > 0
+                        }
+                    )
+        except FileNotFoundError:
+            successes = 0
+
+    return (successes, stats)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark of the analyze pipeline on synthetic pages"
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["stub", "cli"],
+        default="stub",
+        help=(
+            "`stub` drives run_page_analysis with stub drivers, "
+            "`cli` runs `ecoindex-cli analyze` end-to-end with chrome"
+        ),
+    )
+    defaults = PageSpec()
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--nodes", type=int, default=defaults.nodes)
+    parser.add_argument("--size", type=int, default=defaults.size)
+    parser.add_argument("--requests", type=int, default=defaults.requests)
+    parser.add_argument("--asset-size", type=int, default=defaults.asset_size)
+    parser.add_argument("--window-size", default="1920,1080")
+    parser.add_argument("--max-workers", type=int, default=8)
+    parser.add_argument("--max-pages-per-driver", type=int, default=50)
+    parser.add_argument(
+        "--wait",
+        type=int,
+        default=0,
+        help="Wait before and after scroll, in seconds",
+    )
+    parser.add_argument(
+        "--cli-args",
+        default="",
+        help="Extra arguments given to `ecoindex-cli analyze` in cli mode",
+    )
+    parser.add_argument("--output", help="Json report file. Default is stdout")
+    args = parser.parse_args()
+
+    spec = PageSpec(
+        nodes=args.nodes,
+        size=args.size,
+        requests=args.requests,
+        asset_size=args.asset_size,
+    )
+    width, height = map(int, args.window_size.split(","))
+    window_size = WindowSize(width=width, height=height)
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    with fixture_server_process(pages=args.pages, spec=spec) as base_url:
+        urls = get_urls(base_url=base_url, pages=args.pages)
+        start = perf_counter()
+
+        if args.mode == "stub":
+            successes, stats = run(
+                run_stub_benchmark(
+                    urls=urls,
+                    window_size=window_size,
+                    max_workers=args.max_workers,
+                    wait=args.wait,
+                    max_pages_per_driver=args.max_pages_per_driver,
+                )
+            )
+            max_rss = get_max_rss(RUSAGE_SELF)
+        else:
+            successes, stats = run_cli_benchmark(
+                urls=urls,
+                window_size=window_size,
+                max_workers=args.max_workers,
+                wait=args.wait,
+                cli_args=split(args.cli_args),
+            )
+            max_rss = get_max_rss(RUSAGE_CHILDREN)
+
+        duration = perf_counter() - start
+
+    report = {
+        "mode": args.mode,
+        "version": get_version(),
+        "python": platform.python_version(),
+        "fixture": {"pages": args.pages, **spec._asdict()},
+        "max_workers": args.max_workers,
+        "wait": args.wait,
+        "pages": len(urls),
+        "successes": successes,
+        "duration": round(duration, 3),
+        "pages_per_second": round(len(urls) / duration, 3),
+        "max_rss_bytes": max_rss,
+        "phases": {
+            phase: {
+                "count": count,
+                "p50": round(p50, 4),
+                "p95": round(p95, 4),
+                "p99": round(p99, 4),
+            }
+            for phase, (count, p50, p95, p99) in stats.get_percentiles().items()
+        },
+    }
+    output = dumps(report, indent=2)
+
+    if args.output:
+        with open(args.output, "w") as fp:
+            fp.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+from hashlib import sha256
+from json import dumps, loads
+from sqlite3 import connect
+from time import time
+from typing import Dict
+
+from ecoindex.models import Result, WindowSize
+
+from ecoindex_cli.files import create_folder
+
+
+class CachedResult(Result):
+    """
+    Result served by the cache instead of being measured again: its `date`
+    is the one of the original measurement
+    """
+
+
+class ResultCache:
+    """
+    On disk cache of the analysis results, keyed by url, window size and
+    scraper settings, which should include the version of the browser.
+    Entries expire after `ttl` seconds, and the least recently used entries
+    are evicted when the cache exceeds `max_size` bytes
+    """
+
+    def __init__(
+        self,
+        settings: Dict,
+        ttl: int = 24 * 3600,
+        max_size: int = 100 * 1024 * 1024,
+        folder: str = "/tmp/ecoindex-cli/cache",
+        read: bool = True,
+    ) -> None:
+        self.settings = settings
+        self.ttl = ttl
+        self.max_size = max_size
+        self.read = read
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+        create_folder(folder)
+        self.connection = connect(f"{folder}/results.sqlite")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, "
+            "result TEXT NOT NULL, "
+            "size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, "
+            "accessed_at REAL NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at)"
+        )
+        self.connection.commit()
+
+    def get_key(self, url: str, window_size: WindowSize) -> str:
+        return sha256(
+            dumps(
+                [url, window_size.width, window_size.height, self.settings],
+                sort_keys=True,
+                default=str,
+            ).encode()
+        ).hexdigest()
+
+    def get(self, url: str, window_size: WindowSize) -> CachedResult | None:
+        if not self.read:
+            return None
+
+        key = self.get_key(url=url, window_size=window_size)
+        now = time()
+        row = self.connection.execute(
+            "SELECT result FROM results WHERE key = ? AND created_at > ?",
+            (key, now - self.ttl),
+        ).fetchone()
+
+        if row is None:
+            self.misses += 1
+
+            return None
+
+        self.connection.execute(
+            "UPDATE results SET accessed_at = ? WHERE key = ?", (now, key)
+        )
+        self.connection.commit()
+        self.hits += 1
+
+        return CachedResult(**loads(row[0]))
+
+    def set(self, result: Result, window_size: WindowSize) -> None:
+        value = dumps(result.__dict__, default=str)
+        now = time()
+        self.connection.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+            (
+                self.get_key(url=result.url, window_size=window_size),
+                value,
+                len(value),
+                now,
+                now,
+            ),
+        )
+        self.connection.commit()
+        self.writes += 1
+
+        if self.writes % 100 == 0:
+            self.evict()
+
+    def evict(self) -> None:
+        self.connection.execute(
+            "DELETE FROM results WHERE created_at <= ?", (time() - self.ttl,)
+        )
+
+        (size,) = self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM results"
+        ).fetchone()
+
+        if size <= self.max_size:
+            self.connection.commit()
+
+            return
+
+        for key, entry_size in self.connection.execute(
+            "SELECT key, size FROM results ORDER BY accessed_at"
+        ).fetchall():
+            if size <= self.max_size:
+                break
+
+            self.connection.execute("DELETE FROM results WHERE key = ?", (key,))
+            size -= entry_size
+
+        self.connection.commit()
+
+    def close(self) -> None:
+        self.evict()
+        self.connection.close()
@@ -1,11 +1,14 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from datetime import datetime
+from asyncio import run, sleep
+from contextlib import ExitStack
+from datetime import datetime, timezone
 from multiprocessing import cpu_count
-from os import getenv
-from os.path import dirname
+from os import getenv, getpid, remove
+from os.path import dirname, isfile
 from pathlib import Path
+from socket import gethostname
 from typing import List
 from webbrowser import open as open_webbrowser
+from xml.etree.ElementTree import ParseError
 
 from click.exceptions import Exit
 from click_spinner import spinner
@@ -23,20 +26,60 @@ from typer import Argument, Option, colors, confirm, secho
 from typer.main import Typer
 
 from ecoindex_cli.cli.arguments_handler import (
+    get_crawl_limits_from_args,
     get_file_prefix_input_file_logger_file,
+    get_sitemap_since_from_args,
     get_url_from_args,
-    get_urls_from_file,
+    get_urls_from_sitemap,
     get_urls_recursive,
     get_window_sizes_from_args,
 )
-from ecoindex_cli.cli.console_output import display_result_synthesis
+from ecoindex_cli.cli.console_output import (
+    display_driver_pool_synthesis,
+    display_failure_synthesis,
+    display_history_runs,
+    display_host_synthesis,
+    display_page_history,
+    display_page_trends,
+    display_phase_timings,
+    display_queue_synthesis,
+    display_result_synthesis,
+)
 from ecoindex_cli.cli.helper import run_page_analysis
-from ecoindex_cli.enums import ExportFormat, Language
-from ecoindex_cli.files import write_results_to_file, write_urls_to_file
+from ecoindex_cli.driver_pool import DriverPool
+from ecoindex_cli.enums import (
+    ChartKind,
+    Executor,
+    ExportFormat,
+    FailureKind,
+    Language,
+    SettleMode,
+    TrailingSlash,
+)
+from ecoindex_cli.files import (
+    get_analyzed_keys,
+    get_export_format_from_filename,
+    get_results_file,
+    write_urls_to_file,
+)
+from ecoindex_cli.history import DEFAULT_HISTORY_FILE, ResultsHistory
+from ecoindex_cli.jobs import JobSource
+from ecoindex_cli.metrics import MetricsServer, ProgressStream, RunMetrics
+from ecoindex_cli.recorder import ResultRecorder
+from ecoindex_cli.report.charts import Chart, render_charts
 from ecoindex_cli.report.report import Report
+from ecoindex_cli.retry import DEFAULT_RETRY_ON, Failure, RetryPolicy
+from ecoindex_cli.runtime import AnalysisRuntime
+from ecoindex_cli.scheduler import AnalysisScheduler
+from ecoindex_cli.sitemap import set_last_run
+from ecoindex_cli.urls import UrlCanonicalizer, count_lines, iter_urls_from_file
+from ecoindex_cli.work_queue import Task, get_work_queue
 
 app = Typer(help="Ecoindex cli to make analysis of webpages")
 
+DEFAULT_QUEUE = "/tmp/ecoindex-cli/queue/queue.sqlite"
+SITEMAP_STATE_FILE = "/tmp/ecoindex-cli/sitemaps.json"
+
 
 @app.command()
 def analyze(
@@ -53,7 +96,9 @@ def analyze(
         help=(
             "You can make a recursive analysis of a website. "
             "In this case, just provide one root url. "
-            "Be carreful with this option. Can take a loooong long time !"
+            "Be carreful with this option. Can take a loooong long time ! "
+            "Use crawl limits (`--max-depth`, `--max-pages`, `--include`, "
+            "`--exclude`, `--crawl-sample`) to bound it"
         ),
     ),
     urls_file: str = Option(
@@ -63,6 +108,21 @@ def analyze(
             "them in a file and provide the file name"
         ),
     ),
+    sitemap: str = Option(
+        default=None,
+        help=(
+            "Analyze the urls of a sitemap (sitemap indexes and gzipped "
+            "sitemaps are supported), as a faster alternative to `--recursive`"
+        ),
+    ),
+    sitemap_since: str = Option(
+        default=None,
+        help=(
+            "With `--sitemap`, only analyze pages modified since this ISO date "
+            "(IE `2023-04-14`), or since the last run on this sitemap with "
+            "`last-run`, according to their `lastmod`"
+        ),
+    ),
     html_report: bool = Option(
         default=False,
         help="You can generate a html report of the analysis",
@@ -88,7 +148,8 @@ def analyze(
     export_format: ExportFormat = Option(
         default=ExportFormat.csv.value,
         help=(
-            "You can export the results in json or csv. Default is csv. "
+            "You can export the results in csv, json, parquet or feather "
+            "(parquet and feather need pyarrow). Default is csv. "
             "If you generate an HTML report, this option is ignored"
         ),
         case_sensitive=False,
@@ -132,6 +193,243 @@ def analyze(
         default=3,
         help="Wait time before each scroll in seconds. Default is 3 seconds",
     ),
+    settle: SettleMode = Option(
+        default=SettleMode.fixed.value,
+        help=(
+            "With `network-idle`, waits before and after scroll end as soon as "
+            "no resource has been loaded and the DOM has not changed for "
+            "`--quiet-window` seconds. Wait times are then upper bounds. "
+            "Default is fixed"
+        ),
+        case_sensitive=False,
+    ),
+    quiet_window: float = Option(
+        default=0.5,
+        help=(
+            "Time in seconds without network activity nor DOM mutation after "
+            "which a page is considered settled. Default is 0.5 seconds"
+        ),
+    ),
+    max_pages_per_driver: int = Option(
+        default=50,
+        help=(
+            "Chrome drivers are kept warm and reused between analysis. "
+            "A driver is recycled after this number of pages. Default is 50"
+        ),
+    ),
+    page_load_timeout: int = Option(
+        default=20,
+        help="Time in seconds after which a page load is failed. Default is 20",
+    ),
+    retries: int = Option(
+        default=2,
+        help=(
+            "Number of times a failed page analysis is retried, with an "
+            "exponential backoff. Default is 2"
+        ),
+    ),
+    retry_on: List[FailureKind] = Option(
+        default=[kind.value for kind in DEFAULT_RETRY_ON],
+        help=(
+            "Kinds of failures that are retried. Default is timeout, network "
+            "and driver-crash"
+        ),
+        case_sensitive=False,
+    ),
+    retry_delay: float = Option(
+        default=1,
+        help=(
+            "Delay in seconds before the first retry of a page, doubled for each "
+            "next retry. Default is 1"
+        ),
+    ),
+    retry_budget: int = Option(
+        default=100,
+        help=(
+            "Maximum number of retries for the whole analysis, so that a failing "
+            "website does not double its duration. Default is 100"
+        ),
+    ),
+    resume: Path = Option(
+        default=None,
+        help=(
+            "You can resume an interrupted analysis by providing its results file. "
+            "Pages already analyzed are skipped, and new results are appended "
+            "to this file. In this case, `--output-file` and `--export-format` "
+            "are ignored. Parquet and feather files can only be resumed when "
+            "the previous analysis could close them"
+        ),
+    ),
+    no_cache: bool = Option(
+        default=False,
+        help=(
+            "Results are cached on disk and reused while they are fresh. "
+            "With this option, the cache is neither read nor written"
+        ),
+    ),
+    refresh: bool = Option(
+        default=False,
+        help="Ignore cached results and analyze all pages again to refresh the cache",
+    ),
+    cache_ttl: int = Option(
+        default=24,
+        help="Time to live of cached results in hours. Default is 24 hours",
+    ),
+    cache_max_size: int = Option(
+        default=100,
+        help=(
+            "Maximum size of the results cache in MB. Least recently used results "
+            "are evicted above this size. Default is 100 MB"
+        ),
+    ),
+    executor: Executor = Option(
+        default=Executor.thread.value,
+        help=(
+            "Run the analysis in threads of the main process, or in a pool of "
+            "processes (one warm driver per process) to use all the cpu cores "
+            "for results processing. Default is thread"
+        ),
+        case_sensitive=False,
+    ),
+    adaptive_concurrency: bool = Option(
+        default=False,
+        help=(
+            "Tune the number of analysis in flight while running, depending on "
+            "latency, page load timeouts, free memory and cpu load. In this case, "
+            "`--max-workers` is the maximum number of analysis in flight"
+        ),
+    ),
+    max_per_host: int = Option(
+        default=None,
+        help=(
+            "Maximum number of analyses of the same host in flight. Pages of "
+            "other hosts are analyzed in the meantime. Default is no limit"
+        ),
+    ),
+    max_rps_per_host: float = Option(
+        default=None,
+        help=(
+            "Maximum number of page loads started per second on the same host. "
+            "Default is no limit"
+        ),
+    ),
+    max_depth: int = Option(
+        default=None,
+        help="With `--recursive`, maximum depth of the crawl from the root url",
+    ),
+    max_pages: int = Option(
+        default=None,
+        help="With `--recursive`, maximum number of urls found by the crawl",
+    ),
+    include: List[str] = Option(
+        default=None,
+        help=(
+            "With `--recursive`, only analyze urls matching one of these regular "
+            "expressions. Other pages are still crawled to find links"
+        ),
+    ),
+    exclude: List[str] = Option(
+        default=None,
+        help=(
+            "With `--recursive`, do not crawl nor analyze urls matching one of "
+            "these regular expressions"
+        ),
+    ),
+    crawl_sample: List[str] = Option(
+        default=None,
+        help=(
+            "With `--recursive`, crawl at most N pages of each url path pattern, "
+            "with the format `PATTERN=N` (IE `/product/*=10`)"
+        ),
+    ),
+    pipelined_crawl: bool = Option(
+        default=False,
+        help=(
+            "With `--recursive`, analyze urls as soon as they are found by the "
+            "crawler, instead of waiting for the end of the crawl"
+        ),
+    ),
+    keep_query_param: List[str] = Option(
+        default=None,
+        help=(
+            "Query parameters kept in the urls of files, sitemaps and crawls, "
+            "as a name or a pattern (IE `page`, `*` for all). Other query "
+            "parameters are removed before deduplicating urls"
+        ),
+    ),
+    drop_query_param: List[str] = Option(
+        default=None,
+        help=(
+            "Query parameters removed even if they match `--keep-query-param`, "
+            "as a name or a pattern (IE `utm_*`)"
+        ),
+    ),
+    trailing_slash: TrailingSlash = Option(
+        default=TrailingSlash.keep.value,
+        help=(
+            "How trailing slashes of url paths are handled before deduplicating "
+            "urls: `strip` and `add` make `/page` and `/page/` the same url. "
+            "Default is keep"
+        ),
+        case_sensitive=False,
+    ),
+    keep_fragment: bool = Option(
+        default=False,
+        help=(
+            "Keep the fragment of urls (IE `#section`), for single page "
+            "applications routed by fragments"
+        ),
+    ),
+    multi_viewport: bool = Option(
+        default=False,
+        help=(
+            "Load each page once and analyze it in all the window sizes, by "
+            "resizing the browser instead of loading the page again for each "
+            "window size. Each window size counts the requests of the page "
+            "load and the ones made while the page is in this window size"
+        ),
+    ),
+    timings: bool = Option(
+        default=False,
+        help=(
+            "Write the time spent in each phase of each analysis to a "
+            "`.timings.csv` file next to the results file"
+        ),
+    ),
+    metrics_port: int = Option(
+        default=None,
+        help=(
+            "Serve live metrics of the run in the OpenMetrics (Prometheus) format "
+            "on `http://<host>:<port>/metrics`"
+        ),
+    ),
+    metrics_host: str = Option(
+        default="0.0.0.0",
+        help="With `--metrics-port`, address the metrics endpoint listens on",
+    ),
+    progress_fd: int = Option(
+        default=None,
+        help=(
+            "Write progress events as newline-delimited json to this file "
+            "descriptor (IE 1 for stdout, or 3 with `3>progress.ndjson`)"
+        ),
+    ),
+    progress_interval: float = Option(
+        default=10,
+        help="With `--progress-fd`, seconds between two progress events",
+    ),
+    no_history: bool = Option(
+        default=False,
+        help=(
+            "Results are recorded in a local history of all runs, to follow "
+            "their evolution with the `history` command. With this option, "
+            "they are not recorded"
+        ),
+    ),
+    history_file: str = Option(
+        default=DEFAULT_HISTORY_FILE,
+        help="Sqlite database of the history of the results",
+    ),
 ):
     """
     Make an ecoindex analysis of given webpages or website. You
@@ -147,15 +445,42 @@ def analyze(
             default=True,
         )
 
+    run_date = datetime.now(timezone.utc)
+
     try:
         window_sizes = get_window_sizes_from_args(window_size)
+        crawl_limits = get_crawl_limits_from_args(
+            max_depth=max_depth,
+            max_pages=max_pages,
+            include=include,
+            exclude=exclude,
+            samples=crawl_sample,
+        )
+        canonicalizer = UrlCanonicalizer(
+            keep_query_params=keep_query_param or [],
+            drop_query_params=drop_query_param or [],
+            trailing_slash=trailing_slash,
+            keep_fragment=keep_fragment,
+        )
         tmp_folder = "/tmp/ecoindex-cli"
 
         urls = set()
-        if url and recursive:
+        streamed = False
+        if url and recursive and pipelined_crawl:
+            # Urls are analyzed as soon as they are found by the crawler
+            urls = None
+            (
+                file_prefix,
+                input_file,
+                logger_file,
+            ) = get_file_prefix_input_file_logger_file(urls=url)
+
+        elif url and recursive:
             secho(f"⏲️ Crawling root url {url[0]} -> Wait a minute!", fg=colors.MAGENTA)
             with spinner():
-                urls = get_urls_recursive(main_url=url[0])
+                urls = get_urls_recursive(
+                    main_url=url[0], limits=crawl_limits, canonicalizer=canonicalizer
+                )
                 urls = urls if urls else url
 
             (
@@ -172,23 +497,66 @@ def analyze(
                 logger_file,
             ) = get_file_prefix_input_file_logger_file(urls=urls, tmp_folder=tmp_folder)
 
+        elif sitemap:
+            since = get_sitemap_since_from_args(
+                sitemap=sitemap, since=sitemap_since, state_file=SITEMAP_STATE_FILE
+            )
+            secho(f"🗺️ Reading sitemap {sitemap}", fg=colors.MAGENTA)
+
+            try:
+                with spinner():
+                    urls = get_urls_from_sitemap(
+                        sitemap=sitemap, since=since, canonicalizer=canonicalizer
+                    )
+            except (OSError, ParseError) as e:
+                secho(f"🔥 Can not read sitemap `{sitemap}`: {e}", fg=colors.RED)
+                raise Exit(code=1)
+
+            if not urls:
+                secho(f"🙌️ No page modified since {since}", fg=colors.GREEN)
+                set_last_run(
+                    sitemap_url=sitemap, state_file=SITEMAP_STATE_FILE, date=run_date
+                )
+                raise Exit(code=0)
+
+            (
+                file_prefix,
+                input_file,
+                logger_file,
+            ) = get_file_prefix_input_file_logger_file(urls=urls, tmp_folder=tmp_folder)
+
         elif urls_file:
-            urls = get_urls_from_file(urls_file=urls_file)
+            if not isfile(urls_file):
+                secho(f"🔥 File `{urls_file}` does not exist", fg=colors.RED)
+                raise Exit(code=1)
+
+            try:
+                url_count = count_lines(urls_file)
+            except OSError as e:
+                secho(f"🔥 Can not read file `{urls_file}`: {e}", fg=colors.RED)
+                raise Exit(code=1)
+
+            # Urls are read and validated lazily, as the analyses are scheduled
+            urls = iter_urls_from_file(urls_file=urls_file, canonicalizer=canonicalizer)
+            streamed = True
             (
                 file_prefix,
                 input_file,
                 logger_file,
             ) = get_file_prefix_input_file_logger_file(
-                urls=urls, urls_file=urls_file, tmp_folder=tmp_folder
+                urls=[], urls_file=urls_file, tmp_folder=tmp_folder
             )
 
         else:
             secho("🔥 You must provide an url...", fg=colors.RED)
             raise Exit(code=1)
 
-        if input_file:
-            write_urls_to_file(file_prefix=file_prefix, urls=urls)
-            secho(f"📁️ Urls recorded in file `{input_file}`")
+        if urls is not None and not streamed:
+            url_count = len(urls)
+
+            if input_file:
+                write_urls_to_file(file_prefix=file_prefix, urls=urls)
+                secho(f"📁️ Urls recorded in file `{input_file}`")
 
         if logger_file:
             logger.remove()
@@ -202,25 +570,121 @@ def analyze(
         secho(str(e), fg=colors.RED)
         raise Exit(code=1)
 
-    if not no_interaction:
+    if not no_interaction and urls is not None:
         confirm(
-            text=f"There are {len(urls)} url(s), do you want to process?",
+            text=(
+                f"There are {'about ' if streamed else ''}{url_count} url(s), "
+                "do you want to process?"
+            ),
             abort=True,
             default=True,
         )
 
     max_workers = max_workers if max_workers else cpu_count()
-    results = []
+    time_now = datetime.now()
 
-    secho(
-        (
-            f"{len(urls)} urls for {len(window_sizes)} "
-            f"window size with {max_workers} maximum workers"
-        ),
-        fg=colors.GREEN,
+    output_folder = (
+        f"{tmp_folder}/output/{file_prefix}/{time_now.strftime('%Y-%d-%m_%H%M%S')}"
+    )
+    output_filename = f"{output_folder}/results.{export_format.value}"
+
+    if output_file and not html_report:
+        output_filename = output_file.resolve()
+        output_folder = output_filename.parent
+
+    analyzed = set()
+
+    if resume:
+        try:
+            output_filename = resume.resolve()
+            output_folder = output_filename.parent
+            export_format = get_export_format_from_filename(str(output_filename))
+            analyzed = get_analyzed_keys(str(output_filename))
+        except (ValueError, OSError, ImportError) as e:
+            secho(f"🔥 Can not resume from `{resume}`: {e}", fg=colors.RED)
+            raise Exit(code=1)
+
+    job_source = JobSource(
+        window_sizes=window_sizes, multi_viewport=multi_viewport, analyzed=analyzed
+    )
+
+    if urls is None or streamed:
+        # Jobs are yielded lazily, and counted as they are yielded
+        jobs = None
+        initial_total = None if urls is None else url_count * len(window_sizes)
+    else:
+        jobs = list(job_source.iter_jobs(urls))
+        initial_total = job_source.count
+
+    Path(output_folder).mkdir(parents=True, exist_ok=True)
+
+    try:
+        results_file = get_results_file(
+            filename=output_filename, export_format=export_format
+        )
+    except ImportError as e:
+        secho(f"🔥 {e}", fg=colors.RED)
+        raise Exit(code=1)
+
+    if resume:
+        secho(
+            (
+                f"⏩️ Resuming `{output_filename}`: "
+                f"{len(analyzed)} analysis already done"
+            ),
+            fg=colors.GREEN,
+        )
+
+    if urls is None:
+        secho(
+            (
+                f"⏲️ Crawling root url {url[0]} and analyzing urls as they are found "
+                f"for {len(window_sizes)} window size with {max_workers} maximum "
+                f"workers. Urls are recorded in file `{input_file}`"
+            ),
+            fg=colors.MAGENTA,
+        )
+    else:
+        secho(
+            (
+                f"{'About ' if streamed else ''}{url_count} urls for "
+                f"{len(window_sizes)} "
+                f"window size with {max_workers} maximum workers"
+            ),
+            fg=colors.GREEN,
+        )
+
+    retry_policy = RetryPolicy(
+        max_retries=retries,
+        base_delay=retry_delay,
+        retry_on=retry_on,
+        budget=retry_budget,
+    )
+    report = (
+        Report(
+            results_file=str(output_filename),
+            results=(
+                get_results_file(
+                    filename=str(output_filename), export_format=export_format
+                ).read()
+                if resume
+                else ()
+            ),
+            output_path=output_folder,
+            domain=file_prefix,
+            date=time_now,
+            language=html_report_language,
+            cache_folder=None if no_cache else f"{tmp_folder}/cache/charts",
+        )
+        if html_report
+        else None
     )
+    history = None if no_history else ResultsHistory(filename=history_file)
 
-    error_found = False
+    if history:
+        history.start_run(
+            domain=file_prefix, date=time_now, results_file=str(output_filename)
+        )
 
     with Progress(
         TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
@@ -231,86 +695,139 @@ def analyze(
         TextColumn("•"),
         TimeRemainingColumn(),
     ) as progress:
-        task = progress.add_task("Processing", total=len(urls) * len(window_sizes))
-
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_analysis = {}
-
-            for url in urls:
-                for window_size in window_sizes:
-                    future_to_analysis[
-                        executor.submit(
-                            run_page_analysis,
-                            url,
-                            window_size,
-                            chrome_version,
-                            chromedriver_path,
-                            chrome_executable_path,
-                            wait_after_scroll,
-                            wait_before_scroll,
-                            logger,
-                        )
-                    ] = (
-                        url,
-                        window_size,
-                        chrome_version,
-                        chromedriver_path,
-                        chrome_executable_path,
-                        wait_after_scroll,
-                        wait_before_scroll,
-                        logger,
-                    )
+        task = progress.add_task("Processing", total=initial_total)
+        runtime = AnalysisRuntime(
+            max_workers=max_workers,
+            executor=executor,
+            chrome_version=chrome_version,
+            driver_executable_path=chromedriver_path,
+            chrome_executable_path=chrome_executable_path,
+            max_pages_per_driver=max_pages_per_driver,
+            page_load_timeout=page_load_timeout,
+            wait_after_scroll=wait_after_scroll,
+            wait_before_scroll=wait_before_scroll,
+            settle=settle,
+            quiet_window=quiet_window,
+            adaptive_concurrency=adaptive_concurrency,
+            max_per_host=max_per_host,
+            max_rps_per_host=max_rps_per_host,
+            retry_policy=retry_policy,
+            logger_file=logger_file,
+        )
+
+        if not no_cache:
+            runtime.open_cache(
+                window_size=window_sizes[0],
+                multi_viewport=multi_viewport,
+                ttl=cache_ttl * 3600,
+                max_size=cache_max_size * 1024 * 1024,
+                folder=f"{tmp_folder}/cache",
+                read=not refresh,
+            )
+
+        metrics = RunMetrics(
+            total=initial_total,
+            pool_size=max_workers,
+            get_idle_drivers=runtime.get_idle_drivers(),
+        )
+        progress_stream = (
+            ProgressStream(metrics=metrics, fd=progress_fd, interval=progress_interval)
+            if progress_fd is not None
+            else None
+        )
+        recorder = ResultRecorder(
+            results_file=results_file,
+            append=resume is not None,
+            timings=timings,
+            report=report,
+            history=history,
+            metrics=metrics,
+            progress_stream=progress_stream,
+            politeness=runtime.politeness,
+            on_progress=lambda advance: progress.update(task, advance=advance),
+        )
 
-            for future in as_completed(future_to_analysis):
-                try:
-                    result, success = future.result()
-                    results.append(result)
+        def set_total(total: int) -> None:
+            progress.update(task, total=total)
+            metrics.set_total(total)
 
-                    if not success:
-                        error_found = True
+        if urls is None:
+            jobs = job_source.iter_crawled_jobs(
+                main_url=url[0],
+                input_file=input_file,
+                limits=crawl_limits,
+                canonicalizer=canonicalizer,
+                on_total=set_total,
+            )
+        elif streamed:
+            # The total was estimated from the number of lines of the file
+            jobs = job_source.iter_jobs(urls, on_total=set_total)
 
-                except Exception as e:
-                    error_found = True
-                    url, _, _ = future_to_analysis[future]
-                    logger.error(f"{url} -- {e.msg if hasattr(e, 'msg') else e}")
+        try:
+            recorder.open()
 
-                progress.update(task, advance=1)
+            with ExitStack() as stack:
+                if metrics_port is not None:
+                    stack.enter_context(
+                        MetricsServer(
+                            metrics=metrics, port=metrics_port, host=metrics_host
+                        )
+                    )
 
-    if error_found:
+                if progress_stream:
+                    stack.enter_context(progress_stream)
+
+                run(runtime.run(jobs=jobs, recorder=recorder))
+        finally:
+            runtime.close()
+            recorder.close()
+
+    if recorder.error_found:
         secho(
-            f"Errors found: please look at {logger_file})",
+            (
+                f"Errors found: please look at {logger_file}, failed pages are "
+                f"written to {recorder.failures_file.filename}"
+            ),
             fg=colors.RED,
         )
 
-    display_result_synthesis(total=len(urls) * len(window_sizes), success=len(results))
-
-    if not results:
-        raise Exit(code=1)
+    display_result_synthesis(
+        total=job_source.count,
+        success=results_file.count,
+        cache_hits=runtime.cache.hits if runtime.cache else None,
+        cache_misses=runtime.cache.misses if runtime.cache else None,
+    )
+    hits, misses, recycles = runtime.get_driver_pool_stats()
+    display_driver_pool_synthesis(hits=hits, misses=misses, recycles=recycles)
+    display_phase_timings(recorder.timing_stats.get_percentiles())
+    display_host_synthesis(stats=runtime.politeness.stats)
 
-    time_now = datetime.now()
+    if recorder.failure_counts or retry_policy.retries:
+        display_failure_synthesis(
+            failures={
+                kind.value: count for kind, count in recorder.failure_counts.items()
+            },
+            retries=retry_policy.retries,
+            refused=retry_policy.refused,
+        )
 
-    output_folder = (
-        f"{tmp_folder}/output/{file_prefix}/{time_now.strftime('%Y-%d-%m_%H%M%S')}"
-    )
-    output_filename = f"{output_folder}/results.{export_format.value}"
+    if recorder.timings_file:
+        secho(
+            f"⏱️ Phase timings written to {recorder.timings_file.filename}",
+            fg=colors.GREEN,
+        )
 
-    if output_file and not html_report:
-        output_filename = output_file.resolve()
-        output_folder = output_filename.parent
+    if not results_file.count and not results_file.resumed:
+        remove(output_filename)
+        raise Exit(code=1)
 
-    Path(output_folder).mkdir(parents=True, exist_ok=True)
-    write_results_to_file(
-        filename=output_filename, results=results, export_format=export_format
-    )
     secho(f"🙌️ File {output_filename} written !", fg=colors.GREEN)
-    if html_report:
-        Report(
-            results_file=output_filename,
-            output_path=output_folder,
-            domain=file_prefix,
-            date=time_now,
-            language=html_report_language,
-        ).create_report()
+
+    if sitemap:
+        set_last_run(sitemap_url=sitemap, state_file=SITEMAP_STATE_FILE, date=run_date)
+
+    if report:
+        report.create_report()
 
         secho(
             f"🦄️ Amazing! A report has been generated to {output_folder}/index.html",
@@ -319,6 +836,356 @@ def analyze(
         open_webbrowser(f"file://{output_folder}/index.html")
 
 
+@app.command()
+def enqueue(
+    url: List[str] = Option(default=None, help="List of urls to analyze"),
+    urls_file: str = Option(
+        default=None,
+        help=(
+            "If you want to analyze multiple urls, you can also set "
+            "them in a file and provide the file name"
+        ),
+    ),
+    sitemap: str = Option(
+        default=None,
+        help="Add the urls of a sitemap (sitemap indexes and gzipped sitemaps)",
+    ),
+    sitemap_since: str = Option(
+        default=None,
+        help=(
+            "With `--sitemap`, only add pages modified since this ISO date, or "
+            "since the last run on this sitemap with `last-run`"
+        ),
+    ),
+    keep_query_param: List[str] = Option(
+        default=None,
+        help=(
+            "Query parameters kept in the urls of files, sitemaps and crawls, "
+            "as a name or a pattern (IE `page`, `*` for all). Other query "
+            "parameters are removed before deduplicating urls"
+        ),
+    ),
+    drop_query_param: List[str] = Option(
+        default=None,
+        help=(
+            "Query parameters removed even if they match `--keep-query-param`, "
+            "as a name or a pattern (IE `utm_*`)"
+        ),
+    ),
+    trailing_slash: TrailingSlash = Option(
+        default=TrailingSlash.keep.value,
+        help=(
+            "How trailing slashes of url paths are handled before deduplicating "
+            "urls: `strip` and `add` make `/page` and `/page/` the same url. "
+            "Default is keep"
+        ),
+        case_sensitive=False,
+    ),
+    keep_fragment: bool = Option(
+        default=False,
+        help=(
+            "Keep the fragment of urls (IE `#section`), for single page "
+            "applications routed by fragments"
+        ),
+    ),
+    window_size: List[str] = Option(
+        default=["1920,1080"],
+        help=(
+            "You can set multiple window sizes to make ecoindex test. "
+            "You have to use the format `width,height` in pixel"
+        ),
+    ),
+    queue: str = Option(
+        default=DEFAULT_QUEUE,
+        help="Work queue shared by the workers (`sqlite://` uri or file path)",
+    ),
+):
+    """
+    Add analysis to a work queue, so that they can be shared between
+    several `ecoindex-cli worker`, possibly on several nodes
+    """
+    run_date = datetime.now(timezone.utc)
+
+    try:
+        window_sizes = get_window_sizes_from_args(window_size)
+        canonicalizer = UrlCanonicalizer(
+            keep_query_params=keep_query_param or [],
+            drop_query_params=drop_query_param or [],
+            trailing_slash=trailing_slash,
+            keep_fragment=keep_fragment,
+        )
+
+        if url:
+            urls = get_url_from_args(urls_arg=url)
+        elif sitemap:
+            since = get_sitemap_since_from_args(
+                sitemap=sitemap, since=sitemap_since, state_file=SITEMAP_STATE_FILE
+            )
+
+            try:
+                urls = get_urls_from_sitemap(
+                    sitemap=sitemap, since=since, canonicalizer=canonicalizer
+                )
+            except (OSError, ParseError) as e:
+                secho(f"🔥 Can not read sitemap `{sitemap}`: {e}", fg=colors.RED)
+                raise Exit(code=1)
+        elif urls_file:
+            if not isfile(urls_file):
+                secho(f"🔥 File `{urls_file}` does not exist", fg=colors.RED)
+                raise Exit(code=1)
+
+            urls = iter_urls_from_file(urls_file=urls_file, canonicalizer=canonicalizer)
+        else:
+            secho("🔥 You must provide an url...", fg=colors.RED)
+            raise Exit(code=1)
+    except ValidationError as e:
+        secho(str(e), fg=colors.RED)
+        raise Exit(code=1)
+
+    work_queue = get_work_queue(queue=queue)
+
+    try:
+        added = work_queue.put(
+            (url, window_size) for url in urls for window_size in window_sizes
+        )
+    except OSError as e:
+        # Urls of a file are only read as they are added to the queue
+        if not urls_file:
+            raise
+
+        secho(f"🔥 Can not read file `{urls_file}`: {e}", fg=colors.RED)
+        raise Exit(code=1)
+
+    if sitemap:
+        set_last_run(sitemap_url=sitemap, state_file=SITEMAP_STATE_FILE, date=run_date)
+
+    secho(f"📥️ {added} analysis added to the queue `{queue}`", fg=colors.GREEN)
+    display_queue_synthesis(stats=work_queue.stats())
+    work_queue.close()
+
+
+@app.command()
+def worker(
+    queue: str = Option(
+        default=DEFAULT_QUEUE,
+        help="Work queue shared by the workers (`sqlite://` uri or file path)",
+    ),
+    max_workers: int = Option(
+        default=None,
+        help=(
+            "You can define the number of workers to use for the analysis. "
+            "Default is the number of cpu cores"
+        ),
+    ),
+    visibility_timeout: int = Option(
+        default=300,
+        help=(
+            "Time in seconds after which an analysis leased by a worker and not "
+            "completed is given to another worker. Default is 300 seconds"
+        ),
+    ),
+    poll_interval: int = Option(
+        default=5,
+        help="Time in seconds to wait before polling an empty queue again",
+    ),
+    exit_when_empty: bool = Option(
+        default=True,
+        help="Stop the worker when there is nothing left to analyze in the queue",
+    ),
+    chrome_version: int = Option(
+        default=getenv("CHROME_VERSION_MAIN", None),
+        help=(
+            "Main chrome version used for chromedriver. By default, chromedriver "
+            "tries to use latest version of chrome, but if you "
+            "have a specific version installed you can specify using it (IE `107`)"
+        ),
+    ),
+    chromedriver_path: str = Option(
+        default=getenv("CHROMEDRIVER_PATH", ""),
+        help="Path to chromedriver executable",
+    ),
+    chrome_executable_path: str = Option(
+        default=getenv("CHROME_EXECUTABLE_PATH", ""),
+        help="Path to chrome executable",
+    ),
+    wait_after_scroll: int = Option(
+        default=3,
+        help="Wait time after each scroll in seconds. Default is 3 seconds",
+    ),
+    wait_before_scroll: int = Option(
+        default=3,
+        help="Wait time before each scroll in seconds. Default is 3 seconds",
+    ),
+    settle: SettleMode = Option(
+        default=SettleMode.fixed.value,
+        help=(
+            "With `network-idle`, waits before and after scroll end as soon as "
+            "no resource has been loaded and the DOM has not changed for "
+            "`--quiet-window` seconds. Wait times are then upper bounds. "
+            "Default is fixed"
+        ),
+        case_sensitive=False,
+    ),
+    quiet_window: float = Option(
+        default=0.5,
+        help=(
+            "Time in seconds without network activity nor DOM mutation after "
+            "which a page is considered settled. Default is 0.5 seconds"
+        ),
+    ),
+    max_pages_per_driver: int = Option(
+        default=50,
+        help=(
+            "Chrome drivers are kept warm and reused between analysis. "
+            "A driver is recycled after this number of pages. Default is 50"
+        ),
+    ),
+    page_load_timeout: int = Option(
+        default=20,
+        help="Time in seconds after which a page load is failed. Default is 20",
+    ),
+    retries: int = Option(
+        default=2,
+        help=(
+            "Number of times a failed page analysis is retried, with an "
+            "exponential backoff. Default is 2"
+        ),
+    ),
+    retry_on: List[FailureKind] = Option(
+        default=[kind.value for kind in DEFAULT_RETRY_ON],
+        help=(
+            "Kinds of failures that are retried. Default is timeout, network "
+            "and driver-crash"
+        ),
+        case_sensitive=False,
+    ),
+):
+    """
+    Process the analysis of a work queue filled with `ecoindex-cli enqueue`.
+    Results are sent back to the queue, and can be exported with
+    `ecoindex-cli collect`
+    """
+    work_queue = get_work_queue(queue=queue)
+    worker_id = f"{gethostname()}-{getpid()}"
+    max_workers = max_workers if max_workers else cpu_count()
+    driver_pool = DriverPool(
+        size=max_workers,
+        chrome_version=chrome_version,
+        driver_executable_path=chromedriver_path,
+        chrome_executable_path=chrome_executable_path,
+        max_pages_per_driver=max_pages_per_driver,
+        page_load_timeout=page_load_timeout,
+    )
+    scheduler = AnalysisScheduler(max_workers=max_workers)
+    retry_policy = RetryPolicy(max_retries=retries, retry_on=retry_on)
+
+    secho(
+        f"👷️ Worker {worker_id} started with {max_workers} maximum workers",
+        fg=colors.GREEN,
+    )
+
+    async def lease_tasks():
+        while True:
+            task = work_queue.lease(
+                worker=worker_id, visibility_timeout=visibility_timeout
+            )
+
+            if task:
+                yield task
+                continue
+
+            stats = work_queue.stats()
+
+            if exit_when_empty and not stats["pending"] and not stats["leased"]:
+                return
+
+            await sleep(poll_interval)
+
+    async def analyze_task(task: Task):
+        return await run_page_analysis(
+            url=task.url,
+            window_size=task.window_size,
+            driver_pool=driver_pool,
+            scheduler=scheduler,
+            wait_after_scroll=wait_after_scroll,
+            wait_before_scroll=wait_before_scroll,
+            logger=logger,
+            settle=settle,
+            quiet_window=quiet_window,
+            retry_policy=retry_policy,
+        )
+
+    def on_task_done(task: Task, outcome, exception) -> None:
+        if exception:
+            work_queue.fail(task=task, error=str(exception))
+        elif isinstance(outcome, Failure):
+            work_queue.fail(task=task, error=f"{outcome.kind.value}: {outcome.message}")
+        else:
+            work_queue.ack(task=task, result=outcome)
+
+    try:
+        run(
+            scheduler.run(
+                jobs=lease_tasks(), analyze=analyze_task, on_done=on_task_done
+            )
+        )
+    finally:
+        scheduler.close()
+        driver_pool.close()
+
+    display_queue_synthesis(stats=work_queue.stats())
+    display_driver_pool_synthesis(
+        hits=driver_pool.hits,
+        misses=driver_pool.misses,
+        recycles=driver_pool.recycles,
+    )
+    work_queue.close()
+
+
+@app.command()
+def collect(
+    output_file: Path = Argument(
+        ..., help="File where the results of the work queue are exported"
+    ),
+    queue: str = Option(
+        default=DEFAULT_QUEUE,
+        help="Work queue shared by the workers (`sqlite://` uri or file path)",
+    ),
+    export_format: ExportFormat = Option(
+        default=ExportFormat.csv.value,
+        help=(
+            "You can export the results in csv, json, parquet or feather "
+            "(parquet and feather need pyarrow). Default is csv"
+        ),
+        case_sensitive=False,
+    ),
+):
+    """
+    Export the results gathered by the workers of a work queue
+    """
+    try:
+        results_file = get_results_file(
+            filename=output_file, export_format=export_format
+        )
+    except ImportError as e:
+        secho(f"🔥 {e}", fg=colors.RED)
+        raise Exit(code=1)
+
+    work_queue = get_work_queue(queue=queue)
+    output_file.resolve().parent.mkdir(parents=True, exist_ok=True)
+
+    with results_file:
+        for result in work_queue.results():
+            results_file.append(result)
+
+    display_queue_synthesis(stats=work_queue.stats())
+    work_queue.close()
+    secho(
+        f"🙌️ {results_file.count} results written to {output_file} !",
+        fg=colors.GREEN,
+    )
+
+
 @app.command()
 def report(
     results_file: str = Argument(
@@ -350,13 +1217,24 @@ def report(
     """
     output_folder = output_folder if output_folder else dirname(results_file)
 
-    Report(
-        results_file=results_file,
-        output_path=output_folder,
-        domain=domain,
-        date=datetime.now(),
-        language=html_report_language,
-    ).create_report()
+    try:
+        report = Report(
+            results_file=results_file,
+            output_path=output_folder,
+            domain=domain,
+            date=datetime.now(),
+            language=html_report_language,
+            cache_folder="/tmp/ecoindex-cli/cache/charts",
+        )
+    except (ValueError, OSError, ImportError) as e:
+        secho(f"🔥 Can not read results from `{results_file}`: {e}", fg=colors.RED)
+        raise Exit(code=1)
+
+    if not report.aggregate.sketches["score"].count:
+        secho(f"🔥 There is no result in `{results_file}`", fg=colors.RED)
+        raise Exit(code=1)
+
+    report.create_report()
 
     secho(
         f"🦄️ Amazing! A report has been generated to {output_folder}/index.html",
@@ -365,5 +1243,121 @@ def report(
     open_webbrowser(f"file:///{output_folder}/index.html")
 
 
+@app.command()
+def history(
+    domain: str = Argument(
+        default=None,
+        help=(
+            "Only show the runs and pages of this domain (the name of the output "
+            "folder of its runs). Default is all the domains"
+        ),
+    ),
+    url: str = Option(
+        default=None,
+        help="Show all the results of this page instead",
+    ),
+    history_file: str = Option(
+        default=DEFAULT_HISTORY_FILE,
+        help="Sqlite database of the history of the results",
+    ),
+    threshold: float = Option(
+        default=5,
+        help="Drop of the score, in points, that is reported as a regression",
+    ),
+    limit: int = Option(
+        default=20,
+        help="Number of runs and pages shown",
+    ),
+    chart_folder: Path = Option(
+        default=None,
+        help="Write the evolution of the scores as a svg chart in this folder",
+    ),
+    fail_on_regression: bool = Option(
+        default=False,
+        help="Exit with an error code when a regression is found, IE in a CI job",
+    ),
+):
+    """
+    Show the evolution of the results recorded by the previous analyses:
+    mean score of each run, and pages whose score changed the most since
+    their previous analysis
+    """
+    if not isfile(history_file):
+        secho(f"🔥 There is no history in `{history_file}`", fg=colors.RED)
+        raise Exit(code=1)
+
+    results_history = ResultsHistory(filename=history_file)
+
+    if url:
+        results = results_history.get_page_history(url=url)
+        results_history.close()
+
+        if not results:
+            secho(f"🔥 `{url}` has never been analyzed", fg=colors.RED)
+            raise Exit(code=1)
+
+        display_page_history(results=results)
+        chart = Chart(
+            name="history",
+            title=url,
+            xlabel="Date",
+            ylabel="Score",
+            values=[result.score for result in results],
+            weights=[],
+            labels=[
+                f"{result.date:%Y-%m-%d %H:%M} ({result.width}x{result.height})"
+                for result in results
+            ],
+            kind=ChartKind.line,
+        )
+        regressions = 0
+    else:
+        runs = results_history.get_runs(domain=domain, limit=limit)
+        trends = results_history.get_trends(domain=domain, limit=limit)
+        regressions = results_history.count_regressions(
+            threshold=threshold, domain=domain
+        )
+        results_history.close()
+
+        if not runs:
+            secho("🔥 No run recorded yet", fg=colors.RED)
+            raise Exit(code=1)
+
+        display_history_runs(runs=runs, threshold=threshold)
+
+        if trends:
+            display_page_trends(trends=trends, threshold=threshold)
+
+        chart = Chart(
+            name="history",
+            title=domain if domain else "Mean score",
+            xlabel="Date",
+            ylabel="Mean score",
+            values=[run.mean_score for run in runs],
+            weights=[],
+            labels=[f"{run.date:%Y-%m-%d %H:%M}" for run in runs],
+            kind=ChartKind.line,
+        )
+
+        if regressions:
+            secho(
+                f"📉 {regressions} page(s) lost {threshold:g} points or more",
+                fg=colors.RED,
+            )
+        else:
+            secho("🙌️ No regression found", fg=colors.GREEN)
+
+    if chart_folder:
+        chart_folder.mkdir(parents=True, exist_ok=True)
+        render_charts(charts=[chart], output_path=str(chart_folder))
+        secho(
+            f"📈 Chart written to {chart_folder.resolve()}/history.svg",
+            fg=colors.GREEN,
+        )
+
+    if fail_on_regression and regressions:
+        raise Exit(code=1)
+
+
 if __name__ == "__main__":
     app()
@@ -1,3 +1,5 @@
+import re
+from datetime import datetime
 from tempfile import NamedTemporaryFile
 from typing import List, Set, Tuple
 from urllib.parse import urlparse
@@ -7,55 +9,90 @@ from ecoindex.models import WindowSize
 from pydantic import validate_arguments
 from pydantic.error_wrappers import ErrorWrapper, ValidationError
 from pydantic.networks import HttpUrl
-from pydantic.types import FilePath
 from scrapy.crawler import CrawlerProcess
 
-from ecoindex_cli.crawl import EcoindexSpider
+from ecoindex_cli.crawl import CrawlLimits, EcoindexSpider, get_crawler_settings
+from ecoindex_cli.sitemap import get_last_run, iter_sitemap_urls
+from ecoindex_cli.urls import UrlCanonicalizer
 
 
-@validate_arguments
-def validate_list_of_urls(urls: List[HttpUrl]) -> Tuple[HttpUrl]:
+@validate_arguments(config=dict(arbitrary_types_allowed=True))
+def validate_list_of_urls(
+    urls: List[HttpUrl], canonicalizer: UrlCanonicalizer | None = None
+) -> Set[HttpUrl]:
+    canonicalizer = canonicalizer if canonicalizer else UrlCanonicalizer()
     result = set()
 
     for url in urls:
-        splitted_url = url.split("?")
-        result.add(splitted_url[0])
+        result.add(canonicalizer.canonicalize(url))
 
     return result
 
 
-@validate_arguments
-def get_urls_from_file(urls_file: FilePath) -> List[HttpUrl]:
-    with open(urls_file) as fp:
-        urls_from_file = set()
-
-        for url in fp.readlines():
-            url = url.strip()
-
-            if url:
-                urls_from_file.add(url)
-
-    return validate_list_of_urls(urls_from_file)
-
-
-def get_urls_recursive(main_url: str) -> Tuple[str]:
+def get_urls_recursive(
+    main_url: str,
+    limits: CrawlLimits = CrawlLimits(),
+    canonicalizer: UrlCanonicalizer | None = None,
+) -> Set[str]:
     parsed_url = urlparse(main_url)
-    domain = parsed_url.netloc
-    main_url = f"{parsed_url.scheme}://{domain}"
-    process = CrawlerProcess()
+    main_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
+    process = CrawlerProcess(settings=get_crawler_settings(limits))
 
     with NamedTemporaryFile(mode="w+t") as temp_file:
         process.crawl(
             crawler_or_spidercls=EcoindexSpider,
-            allowed_domains=[domain],
+            # Allowed domains can not have a port
+            allowed_domains=[parsed_url.hostname],
             start_urls=[main_url],
             temp_file=temp_file,
+            limits=limits,
         )
         process.start()
         temp_file.seek(0)
         urls = temp_file.readlines()
 
-    return validate_list_of_urls(urls)
+    return validate_list_of_urls(urls=urls, canonicalizer=canonicalizer)
+
+
+@validate_arguments(config=dict(arbitrary_types_allowed=True))
+def get_urls_from_sitemap(
+    sitemap: HttpUrl,
+    since: datetime | None = None,
+    canonicalizer: UrlCanonicalizer | None = None,
+) -> Set[HttpUrl]:
+    return validate_list_of_urls(
+        urls=iter_sitemap_urls(sitemap_url=sitemap, since=since),
+        canonicalizer=canonicalizer,
+    )
+
+
+def get_sitemap_since_from_args(
+    sitemap: str, since: str | None, state_file: str
+) -> datetime | None:
+    """
+    Returns the date from which pages of the sitemap have to be analyzed:
+    either a given ISO date, or the date of the last run with `last-run`
+    """
+    if not since:
+        return None
+
+    if since == "last-run":
+        return get_last_run(sitemap_url=sitemap, state_file=state_file)
+
+    try:
+        return datetime.fromisoformat(since)
+    except ValueError:
+        raise ValidationError(
+            errors=[
+                ErrorWrapper(
+                    BadParameter(
+                        message=f"🔥 `{since}` is not a valid date. Must be an ISO date (IE `2023-04-14`) or `last-run`"
+                    ),
+                    loc="sitemap_since",
+                )
+            ],
+            model=datetime,
+        )
 
 
 @validate_arguments
@@ -90,6 +127,57 @@ def get_window_sizes_from_args(window_sizes: List[str]) -> List[WindowSize]:
     return result
 
 
+def get_crawl_limits_from_args(
+    max_depth: int | None = None,
+    max_pages: int | None = None,
+    include: List[str] | None = None,
+    exclude: List[str] | None = None,
+    samples: List[str] | None = None,
+) -> CrawlLimits:
+    errors = []
+
+    for pattern in (include or []) + (exclude or []):
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            errors.append(
+                ErrorWrapper(
+                    BadParameter(
+                        message=f"🔥 `{pattern}` is not a valid regular expression: {e}"
+                    ),
+                    loc="include" if pattern in (include or []) else "exclude",
+                )
+            )
+
+    crawl_samples = {}
+
+    for sample in samples or []:
+        pattern, _, size = sample.rpartition("=")
+
+        if pattern and size.isdigit():
+            crawl_samples[pattern] = int(size)
+        else:
+            errors.append(
+                ErrorWrapper(
+                    BadParameter(
+                        message=f"🔥 `{sample}` is not a valid sample. Must be of type `/product/*=10`"
+                    ),
+                    loc="crawl_sample",
+                )
+            )
+
+    if errors:
+        raise ValidationError(errors=errors, model=CrawlLimits)
+
+    return CrawlLimits(
+        max_depth=max_depth,
+        max_pages=max_pages,
+        include=include or [],
+        exclude=exclude or [],
+        samples=crawl_samples,
+    )
+
+
 def get_file_prefix_input_file_logger_file(
     urls: List[HttpUrl],
     urls_file: str | None = None,
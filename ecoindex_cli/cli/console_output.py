@@ -1,14 +1,223 @@
+from typing import Dict, List, Tuple
+
 from rich.console import Console
 from rich.table import Table
 
+from ecoindex_cli.history import PageResult, PageTrend, RunSummary
+from ecoindex_cli.politeness import HostStats
+
 
-def display_result_synthesis(total: int, success: int) -> None:
+def display_result_synthesis(
+    total: int,
+    success: int,
+    cache_hits: int | None = None,
+    cache_misses: int | None = None,
+) -> None:
     console = Console()
 
     table = Table(show_header=True)
     table.add_column("Total analysis")
     table.add_column("Success", header_style="green")
     table.add_column("Failed", header_style="red")
-    table.add_row(str(total), str(success), str(total - success))
+    row = [str(total), str(success), str(total - success)]
+
+    if cache_hits is not None:
+        table.add_column("Cache hits", header_style="green")
+        table.add_column("Cache misses", header_style="yellow")
+        row += [str(cache_hits), str(cache_misses)]
+
+    table.add_row(*row)
+
+    console.print(table)
+
+
+def display_driver_pool_synthesis(hits: int, misses: int, recycles: int) -> None:
+    console = Console()
+
+    table = Table(show_header=True)
+    table.add_column("Warm drivers reused", header_style="green")
+    table.add_column("Drivers launched", header_style="yellow")
+    table.add_column("Drivers recycled", header_style="red")
+    table.add_row(str(hits), str(misses), str(recycles))
+
+    console.print(table)
+
+
+def display_queue_synthesis(stats: Dict[str, int]) -> None:
+    console = Console()
+
+    table = Table(show_header=True)
+    table.add_column("Pending")
+    table.add_column("Leased", header_style="yellow")
+    table.add_column("Done", header_style="green")
+    table.add_column("Failed", header_style="red")
+    table.add_row(
+        str(stats["pending"]),
+        str(stats["leased"]),
+        str(stats["done"]),
+        str(stats["failed"]),
+    )
+
+    console.print(table)
+
+
+def display_phase_timings(
+    percentiles: Dict[str, Tuple[int, float, float, float]]
+) -> None:
+    console = Console()
+
+    table = Table(show_header=True)
+    table.add_column("Phase")
+    table.add_column("Count")
+    table.add_column("p50 (s)", header_style="green")
+    table.add_column("p95 (s)", header_style="yellow")
+    table.add_column("p99 (s)", header_style="red")
+
+    for phase, (count, p50, p95, p99) in percentiles.items():
+        table.add_row(phase, str(count), f"{p50:.3f}", f"{p95:.3f}", f"{p99:.3f}")
+
+    console.print(table)
+
+
+def display_host_synthesis(stats: Dict[str, HostStats], max_hosts: int = 20) -> None:
+    console = Console()
+
+    table = Table(show_header=True)
+    table.add_column("Host")
+    table.add_column("Pages")
+    table.add_column("Failed", header_style="red")
+    table.add_column("Max in flight")
+    table.add_column("Pages / s", header_style="green")
+    table.add_column("Mean duration (s)")
+    table.add_column("Mean wait (s)", header_style="yellow")
+
+    hosts = sorted(stats.items(), key=lambda item: item[1].analyses, reverse=True)
+
+    for host, host_stats in hosts[:max_hosts]:
+        analyses = max(host_stats.analyses, 1)
+        table.add_row(
+            host,
+            str(host_stats.analyses),
+            str(host_stats.errors),
+            str(host_stats.max_in_flight),
+            f"{host_stats.get_rate():.2f}",
+            f"{host_stats.duration / analyses:.3f}",
+            f"{host_stats.waited / analyses:.3f}",
+        )
+
+    if len(hosts) > max_hosts:
+        table.add_row(f"... {len(hosts) - max_hosts} other hosts")
+
+    console.print(table)
+
+
+def display_failure_synthesis(
+    failures: Dict[str, int], retries: int, refused: int
+) -> None:
+    console = Console()
+
+    table = Table(show_header=True)
+
+    for kind in failures:
+        table.add_column(kind.capitalize(), header_style="red")
+
+    table.add_column("Retries", header_style="yellow")
+    table.add_column("Retries over budget", header_style="red")
+    table.add_row(
+        *[str(count) for count in failures.values()], str(retries), str(refused)
+    )
+
+    console.print(table)
+
+
+def format_delta(delta: float | None, threshold: float) -> str:
+    if delta is None:
+        return ""
+
+    color = "red" if delta <= -threshold else "green" if delta > 0 else "default"
+
+    return f"[{color}]{delta:+.2f}[/{color}]"
+
+
+def display_history_runs(runs: List[RunSummary], threshold: float) -> None:
+    console = Console()
+
+    table = Table(show_header=True)
+    table.add_column("Date")
+    table.add_column("Domain")
+    table.add_column("Pages")
+    table.add_column("Mean score", header_style="green")
+    table.add_column("Change")
+
+    previous = None
+
+    for run in runs:
+        table.add_row(
+            run.date.strftime("%Y-%m-%d %H:%M:%S"),
+            run.domain,
+            str(run.pages),
+            f"{run.mean_score:.2f}",
+            format_delta(
+                run.mean_score - previous.mean_score if previous else None,
+                threshold=threshold,
+            ),
+        )
+        previous = run
+
+    console.print(table)
+
+
+def display_page_trends(trends: List[PageTrend], threshold: float) -> None:
+    console = Console()
+
+    table = Table(show_header=True)
+    table.add_column("Url")
+    table.add_column("Window size")
+    table.add_column("Runs")
+    table.add_column("Previous score")
+    table.add_column("Score", header_style="green")
+    table.add_column("Change")
+    table.add_column("Grade")
+
+    for trend in trends:
+        table.add_row(
+            trend.url,
+            f"{trend.width}x{trend.height}",
+            str(trend.runs),
+            f"{trend.previous_score:.2f}",
+            f"{trend.score:.2f}",
+            format_delta(trend.delta, threshold=threshold),
+            (
+                f"{trend.previous_grade} → {trend.grade}"
+                if trend.previous_grade != trend.grade
+                else str(trend.grade)
+            ),
+        )
+
+    console.print(table)
+
+
+def display_page_history(results: List[PageResult]) -> None:
+    console = Console()
+
+    table = Table(show_header=True)
+    table.add_column("Date")
+    table.add_column("Window size")
+    table.add_column("Score", header_style="green")
+    table.add_column("Grade")
+    table.add_column("Size")
+    table.add_column("Nodes")
+    table.add_column("Requests")
+
+    for result in results:
+        table.add_row(
+            result.date.strftime("%Y-%m-%d %H:%M:%S"),
+            f"{result.width}x{result.height}",
+            f"{result.score:.2f}",
+            str(result.grade),
+            f"{result.size:.2f}",
+            str(result.nodes),
+            str(result.requests),
+        )
 
     console.print(table)
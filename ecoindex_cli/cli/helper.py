@@ -1,45 +1,518 @@
-from asyncio import run
+from asyncio import new_event_loop, set_event_loop
+from datetime import datetime
+from itertools import count
+from multiprocessing.util import Finalize
+from os import getpid
+from time import monotonic
+from typing import Dict, List, Tuple
 
-from ecoindex.models import Result, WindowSize
+from ecoindex.ecoindex import get_ecoindex
+from ecoindex.models import PageMetrics, PageType, Result, WindowSize
 from ecoindex_scraper.scrap import EcoindexScraper
+from loguru import logger
+from selenium.common.exceptions import JavascriptException, WebDriverException
 
+from ecoindex_cli.cache import ResultCache
+from ecoindex_cli.concurrency import AdaptiveConcurrency
+from ecoindex_cli.driver_pool import DriverPool
+from ecoindex_cli.enums import FailureKind, SettleMode
+from ecoindex_cli.retry import Failure, HttpError, RetryPolicy, get_failure
+from ecoindex_cli.scheduler import AnalysisScheduler, run_coroutine
+from ecoindex_cli.settle import wait_for_settle
+from ecoindex_cli.timing import PhaseTimer
 
-def run_page_analysis(
+# Http status of the main document, 0 when the browser does not expose it
+NAVIGATION_STATUS_SCRIPT = (
+    "const entry = performance.getEntriesByType('navigation')[0];"
+    "return entry && entry.responseStatus ? entry.responseStatus : null;"
+)
+
+
+async def get_result(
     url: str,
     window_size: WindowSize,
-    chrome_version: int | None = None,
-    driver_executable_path: str = "",
-    chrome_executable_path: str = "",
-    wait_after_scroll: int = 3,
-    wait_before_scroll: int = 3,
-    logger=None,
+    page_metrics: PageMetrics,
+    page_type: PageType | None,
 ) -> Result:
+    ecoindex = await get_ecoindex(
+        dom=page_metrics.nodes,
+        size=page_metrics.size,
+        requests=page_metrics.requests,
+    )
+
+    return Result(
+        score=ecoindex.score,
+        ges=ecoindex.ges,
+        water=ecoindex.water,
+        grade=ecoindex.grade,
+        url=url,
+        date=datetime.now(),
+        width=window_size.width,
+        height=window_size.height,
+        nodes=page_metrics.nodes,
+        size=page_metrics.size,
+        requests=page_metrics.requests,
+        page_type=page_type,
+    )
+
+
+async def get_http_status(driver, scheduler: AnalysisScheduler) -> int | None:
+    """
+    Returns the http status of the loaded page, when the browser exposes it
+    """
+    try:
+        status = await scheduler.run_blocking(
+            driver.execute_script, NAVIGATION_STATUS_SCRIPT
+        )
+    except JavascriptException:
+        return None
+
+    return status if isinstance(status, int) else None
+
+
+async def analyze_viewports(
+    url: str,
+    window_sizes: List[WindowSize],
+    indexes: List[int],
+    results: Dict[int, Result | Failure],
+    driver_pool: DriverPool,
+    scheduler: AnalysisScheduler,
+    wait_after_scroll: int,
+    wait_before_scroll: int,
+    timer: PhaseTimer,
+    settle: SettleMode,
+    quiet_window: float,
+) -> None:
+    """
+    Makes one attempt to analyze a page in the window sizes of the given
+    `indexes`, and stores the result of each window size in `results` as
+    soon as it is measured. Raises the exception of the failed attempt
+    """
     scraper = EcoindexScraper(
         url=url,
-        window_size=window_size,
-        chrome_version_main=chrome_version,
-        driver_executable_path=driver_executable_path,
+        window_size=window_sizes[indexes[0]],
         wait_after_scroll=wait_after_scroll,
         wait_before_scroll=wait_before_scroll,
-        chrome_executable_path=chrome_executable_path,
-        page_load_timeout=20,
+        page_load_timeout=driver_pool.page_load_timeout,
     )
+
+    with timer.phase("driver"):
+        pooled = await scheduler.run_blocking(
+            driver_pool.acquire, window_size=window_sizes[indexes[0]]
+        )
+    healthy = True
+
     try:
-        scraper.init_chromedriver()
+        scraper.driver = pooled.driver
+
+        with timer.phase("load"):
+            await scheduler.run_blocking(scraper.driver.get, url)
+            status = await get_http_status(driver=scraper.driver, scheduler=scheduler)
+
+        if status and status >= 400:
+            raise HttpError(status=status)
+
+        # Requests of the page load are counted in each window size, and the
+        # ones made while the page is in a window size only in this one
+        with timer.phase("load"):
+            await scheduler.run_blocking(run_coroutine, scraper.get_all_requests())
+            page_requests = dict(scraper.all_requests)
+
+        page_type = None
+
+        for index in indexes:
+            window_size = window_sizes[index]
+
+            if index != indexes[0]:
+                with timer.phase("resize"):
+                    await scheduler.run_blocking(
+                        run_coroutine, scraper.get_all_requests()
+                    )
+                    scraper.all_requests = dict(page_requests)
+                    await scheduler.run_blocking(
+                        scraper.driver.set_window_size,
+                        window_size.width,
+                        window_size.height,
+                    )
+
+            with timer.phase("wait_before_scroll"):
+                settle_time = await wait_for_settle(
+                    driver=scraper.driver,
+                    scheduler=scheduler,
+                    max_wait=wait_before_scroll,
+                    mode=settle,
+                    quiet_window=quiet_window,
+                )
+                timer.record(name="settle", duration=settle_time)
 
-        return (run(scraper.get_page_analysis()), True)
-    except Exception as e:
-        logger.error(f"{url} -- {e.msg if hasattr(e, 'msg') else e}")
+            with timer.phase("scroll"):
+                await scheduler.run_blocking(run_coroutine, scraper.scroll_to_bottom())
 
-        return (
-            Result(
+            with timer.phase("wait_after_scroll"):
+                settle_time = await wait_for_settle(
+                    driver=scraper.driver,
+                    scheduler=scheduler,
+                    max_wait=wait_after_scroll,
+                    mode=settle,
+                    quiet_window=quiet_window,
+                )
+                timer.record(name="settle", duration=settle_time)
+
+            with timer.phase("metrics"):
+                if index == indexes[0]:
+                    page_type = await scheduler.run_blocking(
+                        run_coroutine, scraper.get_page_type()
+                    )
+
+                page_metrics = await scheduler.run_blocking(
+                    run_coroutine, scraper.get_page_metrics()
+                )
+
+            with timer.phase("compute"):
+                results[index] = await get_result(
+                    url=url,
+                    window_size=window_size,
+                    page_metrics=page_metrics,
+                    page_type=page_type,
+                )
+    except WebDriverException:
+        healthy = False
+        raise
+    finally:
+        with timer.phase("driver"):
+            await scheduler.run_blocking(
+                driver_pool.release, pooled=pooled, healthy=healthy
+            )
+
+
+async def run_viewports_analysis(
+    url: str,
+    window_sizes: List[WindowSize],
+    driver_pool: DriverPool,
+    scheduler: AnalysisScheduler,
+    wait_after_scroll: int = 3,
+    wait_before_scroll: int = 3,
+    logger=None,
+    cache: ResultCache | None = None,
+    concurrency: AdaptiveConcurrency | None = None,
+    timer: PhaseTimer | None = None,
+    settle: SettleMode = SettleMode.fixed,
+    quiet_window: float = 0.5,
+    retry_policy: RetryPolicy | None = None,
+) -> List[Result | Failure]:
+    """
+    Analyzes a page in each of the given window sizes with a driver borrowed
+    from the pool. The page is loaded once, then for each window size the
+    driver is resized, and the page is settled, scrolled and measured again.
+    Each window size counts the requests of the page load and its own ones.
+
+    Each blocking driver call is run in the scheduler executor, while waits
+    are plain asynchronous sleeps that do not hold any thread. With the
+    `network-idle` settle mode, waits end as soon as the page is quiet. When
+    a cache is provided, window sizes with a fresh cached result are not
+    analyzed again. The latency of the analysis is recorded by the adaptive
+    `concurrency`, and the time spent in each phase by the `timer`.
+
+    Failed attempts are retried according to the `retry_policy`, and window
+    sizes that could not be analyzed are returned as a `Failure`. The slot
+    of the analysis in the scheduler is released while waiting before a
+    retry
+    """
+    timer = timer if timer else PhaseTimer()
+    results: Dict[int, Result | Failure] = {}
+
+    if cache:
+        with timer.phase("cache"):
+            for index, window_size in enumerate(window_sizes):
+                cached_result = cache.get(url=url, window_size=window_size)
+
+                if cached_result:
+                    results[index] = cached_result
+
+    analyzed = [index for index in range(len(window_sizes)) if index not in results]
+    pending = analyzed
+
+    for attempt in count():
+        if not pending:
+            break
+
+        start = monotonic()
+
+        try:
+            await analyze_viewports(
                 url=url,
-                water=0,
-                width=window_size.width,
-                height=window_size.height,
-                size=0,
-                nodes=0,
-                requests=0,
-            ),
-            False,
+                window_sizes=window_sizes,
+                indexes=pending,
+                results=results,
+                driver_pool=driver_pool,
+                scheduler=scheduler,
+                wait_after_scroll=wait_after_scroll,
+                wait_before_scroll=wait_before_scroll,
+                timer=timer,
+                settle=settle,
+                quiet_window=quiet_window,
+            )
+
+            if concurrency:
+                concurrency.record(latency=monotonic() - start)
+
+            break
+        except Exception as e:
+            failure = get_failure(
+                url=url, width=0, height=0, exception=e, attempts=attempt + 1
+            )
+
+            if concurrency:
+                concurrency.record(
+                    latency=monotonic() - start,
+                    timed_out=failure.kind == FailureKind.timeout,
+                )
+
+            pending = [index for index in pending if index not in results]
+
+            if retry_policy and retry_policy.should_retry(
+                kind=failure.kind, attempt=attempt
+            ):
+                delay = retry_policy.get_delay(attempt=attempt)
+                logger.warning(
+                    f"{url} -- {failure.kind.value}: {failure.message} "
+                    f"(retry in {delay:.1f}s)"
+                )
+                await scheduler.backoff(delay)
+                continue
+
+            logger.error(f"{url} -- {failure.kind.value}: {failure.message}")
+
+            for index in pending:
+                results[index] = failure._replace(
+                    width=window_sizes[index].width,
+                    height=window_sizes[index].height,
+                )
+
+            break
+
+    if cache:
+        with timer.phase("cache"):
+            for index in analyzed:
+                if isinstance(results[index], Result):
+                    cache.set(result=results[index], window_size=window_sizes[index])
+
+    return [results[index] for index in range(len(window_sizes))]
+
+
+async def run_page_analysis(
+    url: str,
+    window_size: WindowSize,
+    driver_pool: DriverPool,
+    scheduler: AnalysisScheduler,
+    wait_after_scroll: int = 3,
+    wait_before_scroll: int = 3,
+    logger=None,
+    cache: ResultCache | None = None,
+    concurrency: AdaptiveConcurrency | None = None,
+    timer: PhaseTimer | None = None,
+    settle: SettleMode = SettleMode.fixed,
+    quiet_window: float = 0.5,
+    retry_policy: RetryPolicy | None = None,
+) -> Result | Failure:
+    """
+    Analyzes a page in a single window size, see `run_viewports_analysis`
+    """
+    (result,) = await run_viewports_analysis(
+        url=url,
+        window_sizes=[window_size],
+        driver_pool=driver_pool,
+        scheduler=scheduler,
+        wait_after_scroll=wait_after_scroll,
+        wait_before_scroll=wait_before_scroll,
+        logger=logger,
+        cache=cache,
+        concurrency=concurrency,
+        timer=timer,
+        settle=settle,
+        quiet_window=quiet_window,
+        retry_policy=retry_policy,
+    )
+
+    return result
+
+
+# State of an analysis process, set up by `init_analysis_process`
+process_state: Dict = {}
+
+
+def init_analysis_process(driver_pool_settings: Dict, logger_file: str | None) -> None:
+    """
+    Initializer of the processes of the `--executor process` mode: each
+    process has its own logger, event loop, and pool with one warm driver
+    """
+    if logger_file:
+        logger.remove()
+        logger.add(logger_file, format="{time} | {level} | {message}", level="INFO")
+
+    loop = new_event_loop()
+    set_event_loop(loop)
+    driver_pool = DriverPool(size=1, **driver_pool_settings)
+    Finalize(None, driver_pool.close, exitpriority=10)
+
+    process_state.update(
+        loop=loop,
+        driver_pool=driver_pool,
+        scheduler=AnalysisScheduler(max_workers=1),
+    )
+
+
+def analyze_page_in_process(
+    url: str,
+    window_sizes: List[Tuple[int, int]],
+    wait_after_scroll: int = 3,
+    wait_before_scroll: int = 3,
+    settle: SettleMode = SettleMode.fixed,
+    quiet_window: float = 0.5,
+) -> Tuple[List[Tuple | Failure], bool, Dict[str, float], Tuple[int, int, int, int]]:
+    """
+    Makes one attempt to analyze a page in an analysis process. Results are
+    returned as tuples of values, which are much cheaper to pickle than the
+    pydantic model, along with a timeout flag, the phase timings and the
+    driver pool counters of the process. Retries are handled by the main
+    process
+    """
+    driver_pool: DriverPool = process_state["driver_pool"]
+    timer = PhaseTimer()
+    results = process_state["loop"].run_until_complete(
+        run_viewports_analysis(
+            url=url,
+            window_sizes=[
+                WindowSize(width=width, height=height) for width, height in window_sizes
+            ],
+            driver_pool=driver_pool,
+            scheduler=process_state["scheduler"],
+            wait_after_scroll=wait_after_scroll,
+            wait_before_scroll=wait_before_scroll,
+            logger=logger,
+            timer=timer,
+            settle=settle,
+            quiet_window=quiet_window,
         )
+    )
+
+    return (
+        [
+            result if isinstance(result, Failure) else tuple(result.__dict__.values())
+            for result in results
+        ],
+        any(
+            isinstance(result, Failure) and result.kind == FailureKind.timeout
+            for result in results
+        ),
+        timer.timings,
+        (getpid(), driver_pool.hits, driver_pool.misses, driver_pool.recycles),
+    )
+
+
+def load_compact_result(values: Tuple) -> Result:
+    """
+    Builds back a result returned by an analysis process, without validating
+    it again
+    """
+    return Result.construct(**dict(zip(Result.__fields__, values)))
+
+
+async def run_viewports_analysis_in_process(
+    url: str,
+    window_sizes: List[WindowSize],
+    scheduler: AnalysisScheduler,
+    wait_after_scroll: int = 3,
+    wait_before_scroll: int = 3,
+    cache: ResultCache | None = None,
+    driver_pool_stats: Dict[int, Tuple[int, int, int]] | None = None,
+    concurrency: AdaptiveConcurrency | None = None,
+    timer: PhaseTimer | None = None,
+    settle: SettleMode = SettleMode.fixed,
+    quiet_window: float = 0.5,
+    retry_policy: RetryPolicy | None = None,
+) -> List[Result | Failure]:
+    """
+    Same as `run_viewports_analysis`, but the analysis is run by one of the
+    processes of the scheduler. The cache and the retries are handled by
+    the main process, and the driver pool counters of each process are
+    stored in `driver_pool_stats`
+    """
+    timer = timer if timer else PhaseTimer()
+    results: Dict[int, Result | Failure] = {}
+
+    if cache:
+        with timer.phase("cache"):
+            for index, window_size in enumerate(window_sizes):
+                cached_result = cache.get(url=url, window_size=window_size)
+
+                if cached_result:
+                    results[index] = cached_result
+
+    analyzed = [index for index in range(len(window_sizes)) if index not in results]
+    pending = analyzed
+
+    for attempt in count():
+        if not pending:
+            break
+
+        start = monotonic()
+        (
+            compact_results,
+            timed_out,
+            timings,
+            (pid, *counters),
+        ) = await scheduler.run_blocking(
+            analyze_page_in_process,
+            url=url,
+            window_sizes=[
+                (window_sizes[index].width, window_sizes[index].height)
+                for index in pending
+            ],
+            wait_after_scroll=wait_after_scroll,
+            wait_before_scroll=wait_before_scroll,
+            settle=settle,
+            quiet_window=quiet_window,
+        )
+
+        for phase, duration in timings.items():
+            timer.timings[phase] = timer.timings.get(phase, 0) + duration
+
+        for index, value in zip(pending, compact_results):
+            results[index] = (
+                value._replace(attempts=attempt + 1)
+                if isinstance(value, Failure)
+                else load_compact_result(value)
+            )
+
+        if concurrency:
+            concurrency.record(latency=monotonic() - start, timed_out=timed_out)
+
+        if driver_pool_stats is not None:
+            driver_pool_stats[pid] = tuple(counters)
+
+        pending = [index for index in pending if isinstance(results[index], Failure)]
+
+        if not pending:
+            break
+
+        failure = results[pending[0]]
+
+        if not retry_policy or not retry_policy.should_retry(
+            kind=failure.kind, attempt=attempt
+        ):
+            break
+
+        delay = retry_policy.get_delay(attempt=attempt)
+        logger.warning(
+            f"{url} -- {failure.kind.value}: {failure.message} (retry in {delay:.1f}s)"
+        )
+        await scheduler.backoff(delay)
+
+    if cache:
+        with timer.phase("cache"):
+            for index in analyzed:
+                if isinstance(results[index], Result):
+                    cache.set(result=results[index], window_size=window_sizes[index])
+
+    return [results[index] for index in range(len(window_sizes))]
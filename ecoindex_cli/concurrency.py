@@ -0,0 +1,151 @@
+from asyncio import Future, get_running_loop
+from multiprocessing import cpu_count
+from os import getloadavg, sysconf
+from time import monotonic
+from typing import List
+
+from loguru import logger
+
+
+def get_available_memory() -> int:
+    """
+    Returns the memory available for new processes in bytes
+    """
+    try:
+        with open("/proc/meminfo") as fp:
+            for line in fp:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    return sysconf("SC_AVPHYS_PAGES") * sysconf("SC_PAGE_SIZE")
+
+
+def get_load_per_cpu() -> float:
+    return getloadavg()[0] / cpu_count()
+
+
+class AdaptiveConcurrency:
+    """
+    Limits the number of analyses in flight, and tunes this limit while
+    running in an AIMD fashion: the limit is increased by one when the
+    analyses are using all the slots and the system is healthy, and is
+    multiplied by `backoff_factor` when page load timeouts spike, latency
+    degrades, memory runs low or cpu load is too high.
+
+    It can be used in place of an `asyncio.Semaphore` by the scheduler
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        min_limit: int = 1,
+        initial_limit: int | None = None,
+        interval: float = 10,
+        backoff_factor: float = 0.7,
+        max_timeout_ratio: float = 0.2,
+        max_latency_ratio: float = 2,
+        min_available_memory: int = 512 * 1024 * 1024,
+        max_load_per_cpu: float = 2,
+    ) -> None:
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = (
+            initial_limit if initial_limit else max(min_limit, min(4, max_limit))
+        )
+        self.interval = interval
+        self.backoff_factor = backoff_factor
+        self.max_timeout_ratio = max_timeout_ratio
+        self.max_latency_ratio = max_latency_ratio
+        self.min_available_memory = min_available_memory
+        self.max_load_per_cpu = max_load_per_cpu
+
+        self.in_flight = 0
+        self.saturated = False
+        self.waiters: List[Future] = []
+        self.latencies: List[float] = []
+        self.timeouts = 0
+        self.baseline_latency: float | None = None
+        self.last_adjustment = monotonic()
+
+    async def acquire(self) -> None:
+        while self.in_flight >= self.limit:
+            self.saturated = True
+            waiter = get_running_loop().create_future()
+            self.waiters.append(waiter)
+            await waiter
+
+        self.in_flight += 1
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self.wake_up()
+
+    def wake_up(self) -> None:
+        waiters, self.waiters = self.waiters, []
+
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def record(self, latency: float, timed_out: bool = False) -> None:
+        """
+        Records the latency of a completed analysis, and adjusts the
+        limit once per `interval` seconds
+        """
+        self.latencies.append(latency)
+        self.timeouts += timed_out
+
+        if monotonic() - self.last_adjustment >= self.interval:
+            self.adjust()
+
+    def get_overload_reason(self) -> str | None:
+        timeout_ratio = self.timeouts / len(self.latencies)
+        latency = sum(self.latencies) / len(self.latencies)
+        available_memory = get_available_memory()
+        load_per_cpu = get_load_per_cpu()
+
+        if self.baseline_latency is None or latency < self.baseline_latency:
+            self.baseline_latency = latency
+
+        if timeout_ratio > self.max_timeout_ratio:
+            return f"{timeout_ratio:.0%} of page loads timed out"
+
+        if latency > self.baseline_latency * self.max_latency_ratio:
+            return (
+                f"latency {latency:.1f}s is more than {self.max_latency_ratio} times "
+                f"the best observed latency {self.baseline_latency:.1f}s"
+            )
+
+        if available_memory < self.min_available_memory:
+            return f"only {available_memory // 1024**2} MB of memory available"
+
+        if load_per_cpu > self.max_load_per_cpu:
+            return f"cpu load is {load_per_cpu:.1f} per core"
+
+        return None
+
+    def adjust(self) -> None:
+        if not self.latencies:
+            return
+
+        previous_limit = self.limit
+        reason = self.get_overload_reason()
+
+        if reason:
+            self.limit = max(self.min_limit, int(self.limit * self.backoff_factor))
+        elif self.saturated:
+            self.limit = min(self.max_limit, self.limit + 1)
+            reason = "all slots were in use and the system is healthy"
+
+        if self.limit != previous_limit:
+            logger.info(
+                f"Concurrency adjusted from {previous_limit} to {self.limit}: {reason}"
+            )
+            self.wake_up()
+
+        self.latencies = []
+        self.timeouts = 0
+        self.saturated = False
+        self.last_adjustment = monotonic()
@@ -1,20 +1,70 @@
-from tempfile import NamedTemporaryFile
-from typing import List
+import re
+from asyncio import get_running_loop
+from fnmatch import fnmatch
+from multiprocessing import get_context
+from multiprocessing.process import BaseProcess
+from multiprocessing.queues import Queue
+from queue import Empty
+from typing import IO, AsyncIterator, Dict, List, NamedTuple, Set
+from urllib.parse import urlparse
 
+from scrapy.crawler import CrawlerProcess
+from scrapy.exceptions import CloseSpider
+from scrapy.link import Link
 from scrapy.linkextractors import LinkExtractor
 from scrapy.spiders import CrawlSpider, Rule
 
+from ecoindex_cli.urls import SeenSet, UrlCanonicalizer
+
+
+class CrawlLimits(NamedTuple):
+    """
+    Limits of a recursive crawl. `include` and `exclude` are regular
+    expressions searched in the urls, and `samples` maps glob patterns of
+    url paths (IE `/product/*`) to the maximum number of pages crawled for
+    each of them
+    """
+
+    max_depth: int | None = None
+    max_pages: int | None = None
+    include: List[str] | None = None
+    exclude: List[str] | None = None
+    samples: Dict[str, int] | None = None
+
+
+def get_crawler_settings(limits: CrawlLimits) -> Dict:
+    """
+    Settings of the crawler process. The crawl is breadth first, so that
+    the shallowest pages, which are most likely to cover all the page types
+    of the website, are found first when the crawl is limited
+    """
+    return {
+        "DEPTH_LIMIT": limits.max_depth or 0,
+        "DEPTH_PRIORITY": 1,
+        "SCHEDULER_DISK_QUEUE": "scrapy.squeues.PickleFifoDiskQueue",
+        "SCHEDULER_MEMORY_QUEUE": "scrapy.squeues.FifoMemoryQueue",
+    }
+
 
 class EcoindexSpider(CrawlSpider):
+    """
+    Crawls a website. Links matching an `exclude` pattern are not followed,
+    and links of a sampled path pattern are not followed anymore once the
+    sample is complete. Only pages matching an `include` pattern, if any,
+    are kept, but the crawl goes through the other pages too. The crawl
+    stops after `max_pages` pages are kept
+    """
+
     name = "EcoindexSpider"
     custom_settings = {"LOG_ENABLED": False}
-    rules = (Rule(LinkExtractor(), callback="parse_item", follow=True),)
 
     def __init__(
         self,
         allowed_domains: List[str],
         start_urls: List[str],
-        temp_file: NamedTemporaryFile,
+        temp_file: IO[str] | None = None,
+        url_queue: Queue | None = None,
+        limits: CrawlLimits = CrawlLimits(),
         *a,
         **kw,
     ):
@@ -22,7 +72,138 @@ class EcoindexSpider(CrawlSpider):
         self.allowed_domains = allowed_domains
         self.start_urls = start_urls
         self.temp_file = temp_file
+        self.url_queue = url_queue
+        self.limits = limits
+        self.include = [re.compile(pattern) for pattern in limits.include or []]
+        self.samples = limits.samples or {}
+        self.sampled: Dict[str, Set[str]] = {pattern: set() for pattern in self.samples}
+        self.pages = 0
+        # Rules are compiled by the CrawlSpider constructor
+        self.rules = (
+            Rule(
+                LinkExtractor(deny=limits.exclude or ()),
+                callback="parse_item",
+                follow=True,
+                process_links="sample_links",
+            ),
+        )
         super().__init__(*a, **kw)
 
+    def get_sample_pattern(self, url: str) -> str | None:
+        path = urlparse(url).path
+
+        for pattern in self.samples:
+            if fnmatch(path, pattern):
+                return pattern
+
+        return None
+
+    def sample_links(self, links: List[Link]) -> List[Link]:
+        sampled_links = []
+
+        for link in links:
+            pattern = self.get_sample_pattern(link.url)
+
+            if pattern is None:
+                sampled_links.append(link)
+                continue
+
+            sampled = self.sampled[pattern]
+
+            if link.url in sampled or len(sampled) < self.samples[pattern]:
+                sampled.add(link.url)
+                sampled_links.append(link)
+
+        return sampled_links
+
     def parse_item(self, response):
-        self.temp_file.write(f"{response.url}\n")
+        # Responses already in flight when the spider is closed are still
+        # parsed, and must not be kept
+        if self.limits.max_pages and self.pages >= self.limits.max_pages:
+            return
+
+        if self.include and not any(
+            pattern.search(response.url) for pattern in self.include
+        ):
+            return
+
+        self.pages += 1
+
+        if self.temp_file:
+            self.temp_file.write(f"{response.url}\n")
+
+        if self.url_queue:
+            # Blocks when the analysis lags behind, which pauses the crawl
+            self.url_queue.put(response.url)
+
+        if self.limits.max_pages and self.pages >= self.limits.max_pages:
+            raise CloseSpider(reason="max_pages")
+
+
+def run_crawl(main_url: str, url_queue: Queue, limits: CrawlLimits) -> None:
+    """
+    Crawls the website of `main_url` and sends the urls found to `url_queue`,
+    followed by `None` when the crawl is over
+    """
+    process = CrawlerProcess(settings=get_crawler_settings(limits))
+    process.crawl(
+        crawler_or_spidercls=EcoindexSpider,
+        # Allowed domains can not have a port
+        allowed_domains=[urlparse(main_url).hostname],
+        start_urls=[main_url],
+        url_queue=url_queue,
+        limits=limits,
+    )
+    process.start()
+    url_queue.put(None)
+
+
+def get_next_url(url_queue: Queue, process: BaseProcess) -> str | None:
+    while True:
+        try:
+            return url_queue.get(timeout=1)
+        except Empty:
+            if not process.is_alive():
+                return None
+
+
+async def crawl_urls(
+    main_url: str,
+    limits: CrawlLimits = CrawlLimits(),
+    max_queue_size: int = 10_000,
+    canonicalizer: UrlCanonicalizer | None = None,
+) -> AsyncIterator[str]:
+    """
+    Crawls a website in a separate process, and yields the urls as soon as
+    they are found, canonicalized and deduplicated. The crawl is paused
+    when `max_queue_size` urls are waiting to be consumed
+    """
+    canonicalizer = canonicalizer if canonicalizer else UrlCanonicalizer()
+    parsed_url = urlparse(main_url)
+    context = get_context("spawn")
+    url_queue = context.Queue(maxsize=max_queue_size)
+    process = context.Process(
+        target=run_crawl,
+        args=(f"{parsed_url.scheme}://{parsed_url.netloc}", url_queue, limits),
+        daemon=True,
+    )
+    process.start()
+    seen = SeenSet()
+    loop = get_running_loop()
+
+    try:
+        while True:
+            url = await loop.run_in_executor(None, get_next_url, url_queue, process)
+
+            if url is None:
+                return
+
+            url = canonicalizer.canonicalize(url)
+
+            if seen.add(url):
+                yield url
+    finally:
+        if process.is_alive():
+            process.terminate()
+
+        process.join()
@@ -0,0 +1,167 @@
+from contextlib import contextmanager
+from queue import Empty, LifoQueue
+from threading import BoundedSemaphore, Lock
+from typing import Iterator
+
+from ecoindex.models import WindowSize
+from ecoindex_scraper.scrap import EcoindexScraper
+from loguru import logger
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver import Chrome
+
+
+class PooledDriver:
+    def __init__(self, launcher: EcoindexScraper) -> None:
+        # The launcher owns the copy of the chromedriver executable,
+        # so it has to live as long as the driver itself
+        self.launcher = launcher
+        self.driver: Chrome = launcher.driver
+        self.pages = 0
+
+
+class DriverPool:
+    """
+    Bounded pool of warm chrome drivers shared by the page analyses.
+    A driver is reset between two pages, and recycled after
+    `max_pages_per_driver` pages or as soon as it crashed
+    """
+
+    def __init__(
+        self,
+        size: int,
+        chrome_version: int | None = None,
+        driver_executable_path: str = "",
+        chrome_executable_path: str = "",
+        max_pages_per_driver: int = 50,
+        page_load_timeout: int = 20,
+    ) -> None:
+        self.size = size
+        self.chrome_version = chrome_version
+        self.driver_executable_path = driver_executable_path
+        self.chrome_executable_path = chrome_executable_path
+        self.max_pages_per_driver = max_pages_per_driver
+        self.page_load_timeout = page_load_timeout
+
+        self.idle: LifoQueue[PooledDriver] = LifoQueue()
+        self.slots = BoundedSemaphore(size)
+        self.lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.recycles = 0
+
+    def launch(self, window_size: WindowSize) -> PooledDriver:
+        launcher = EcoindexScraper(
+            url="about:blank",
+            window_size=window_size,
+            chrome_version_main=self.chrome_version,
+            driver_executable_path=self.driver_executable_path,
+            chrome_executable_path=self.chrome_executable_path,
+            page_load_timeout=self.page_load_timeout,
+        ).init_chromedriver()
+        launcher.driver.set_script_timeout(10)
+
+        return PooledDriver(launcher=launcher)
+
+    @staticmethod
+    def reset(pooled: PooledDriver, window_size: WindowSize) -> None:
+        driver = pooled.driver
+
+        try:
+            driver.execute_script(
+                "window.localStorage.clear(); window.sessionStorage.clear();"
+            )
+        except WebDriverException:
+            pass
+
+        driver.get("about:blank")
+        driver.delete_all_cookies()
+        driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+        driver.set_window_size(window_size.width, window_size.height)
+
+        # Drain the performance logs of the previous page, they would
+        # otherwise be counted in the requests of the next one
+        driver.get_log("performance")
+
+    def discard(self, pooled: PooledDriver) -> None:
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            logger.warning(f"Could not quit chrome driver -- {e}")
+
+        with self.lock:
+            self.recycles += 1
+
+    def acquire(self, window_size: WindowSize) -> PooledDriver:
+        self.slots.acquire()
+
+        try:
+            try:
+                pooled = self.idle.get_nowait()
+            except Empty:
+                with self.lock:
+                    self.misses += 1
+
+                return self.launch(window_size=window_size)
+
+            try:
+                self.reset(pooled=pooled, window_size=window_size)
+            except WebDriverException:
+                self.discard(pooled=pooled)
+                with self.lock:
+                    self.misses += 1
+
+                return self.launch(window_size=window_size)
+
+            with self.lock:
+                self.hits += 1
+
+            return pooled
+        except Exception:
+            self.slots.release()
+            raise
+
+    def release(self, pooled: PooledDriver, healthy: bool = True) -> None:
+        pooled.pages += 1
+
+        if healthy and pooled.pages < self.max_pages_per_driver:
+            self.idle.put(pooled)
+        else:
+            self.discard(pooled=pooled)
+
+        self.slots.release()
+
+    def get_browser_version(self, window_size: WindowSize) -> str | None:
+        """
+        Returns the version reported by the browser, with a driver of the
+        pool that is then kept warm for the analyses
+        """
+        with self.driver(window_size=window_size) as driver:
+            return driver.capabilities.get("browserVersion")
+
+    @contextmanager
+    def driver(self, window_size: WindowSize) -> Iterator[Chrome]:
+        pooled = self.acquire(window_size=window_size)
+
+        try:
+            yield pooled.driver
+        except WebDriverException:
+            self.release(pooled=pooled, healthy=False)
+            raise
+        except Exception:
+            self.release(pooled=pooled)
+            raise
+        else:
+            self.release(pooled=pooled)
+
+    def close(self) -> None:
+        while True:
+            try:
+                pooled = self.idle.get_nowait()
+            except Empty:
+                break
+
+            try:
+                pooled.driver.quit()
+            except Exception as e:
+                logger.warning(f"Could not quit chrome driver -- {e}")
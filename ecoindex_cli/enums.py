@@ -4,6 +4,8 @@ from enum import Enum
 class ExportFormat(Enum):
     csv = "csv"
     json = "json"
+    parquet = "parquet"
+    feather = "feather"
 
 
 class Language(Enum):
@@ -21,3 +23,34 @@ class GlobalMedian(Enum):
     nodes = 693
     requests = 78
     size = 2410
+
+
+class Executor(Enum):
+    thread = "thread"
+    process = "process"
+
+
+class SettleMode(Enum):
+    fixed = "fixed"
+    network_idle = "network-idle"
+
+
+class TrailingSlash(Enum):
+    keep = "keep"
+    strip = "strip"
+    add = "add"
+
+
+class FailureKind(Enum):
+    timeout = "timeout"
+    dns = "dns"
+    http = "http"
+    network = "network"
+    driver_crash = "driver-crash"
+    other = "other"
+
+
+class ChartKind(Enum):
+    histogram = "histogram"
+    bar = "bar"
+    line = "line"
@@ -1,14 +1,18 @@
 from abc import ABC, abstractmethod
-from csv import DictWriter
-from json import dump
-from os import makedirs
-from os.path import dirname, exists
-from typing import Dict, List
+from csv import DictReader, DictWriter, reader, writer
+from io import SEEK_END
+from json import JSONDecodeError, dumps, load, loads
+from os import makedirs, replace
+from os.path import dirname, exists, getsize
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Set, TextIO, Tuple
 
 from ecoindex.models import Result
+from loguru import logger
 from yaml import safe_load as load_yaml
 
 from ecoindex_cli.enums import ExportFormat, Language
+from ecoindex_cli.retry import Failure
 
 
 def create_folder(path: str) -> None:
@@ -16,56 +20,483 @@ def create_folder(path: str) -> None:
         makedirs(path)
 
 
+def read_tail(fp: BinaryIO, size: int = 4096) -> Tuple[int, bytes]:
+    """
+    Returns the last bytes of a binary file, with their offset
+    """
+    fp.seek(0, SEEK_END)
+    start = max(fp.tell() - size, 0)
+    fp.seek(start)
+
+    return start, fp.read()
+
+
+def is_json(line: bytes) -> bool:
+    """
+    Returns whether a line of a json results file is complete: an opening
+    or closing bracket, or a result followed or not by a comma
+    """
+    line = line.strip().rstrip(b",")
+
+    if line in (b"[", b"]"):
+        return True
+
+    try:
+        loads(line)
+    except ValueError:
+        return False
+
+    return True
+
+
 class File(ABC):
+    """
+    Results file. Results can be written all at once with `write`, or
+    appended one by one as soon as each analysis completes:
+
+    ```
+    with CsvFile(filename="results.csv") as file:
+        file.append(result)
+    ```
+    """
+
     def __init__(
         self,
         filename: str,
-        results: List[Result],
+        results: List[Result] | None = None,
         export_format: ExportFormat | None = ExportFormat.csv,
     ):
         self.filename = filename
-        self.results = results
+        self.results = results if results else []
         self.export_format = export_format
+        self.fp: TextIO | None = None
+        self.count = 0
+
+    def __enter__(self) -> "File":
+        self.open()
+
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def open(self, append: bool = False) -> None:
+        """
+        Opens the file for writing. With `append`, results are added after
+        the ones of an existing file, for example to resume a previous run
+        """
+        self.resumed = append and exists(self.filename) and getsize(self.filename) > 0
+
+        if self.resumed:
+            self.prepare_resume()
+
+        self.fp = open(self.filename, "a" if self.resumed else "w")
+        self.count = 0
+
+    def prepare_resume(self) -> None:
+        pass
 
     @abstractmethod
-    def write(self) -> None:
+    def append(self, result: Result) -> None:
         pass
 
+    @abstractmethod
+    def read(self) -> Iterator[Dict]:
+        pass
+
+    def close(self) -> None:
+        if self.fp:
+            self.fp.close()
+            self.fp = None
 
-class CsvFile(File):
     def write(self) -> None:
-        headers = self.results[0].__dict__
+        with self:
+            for result in self.results:
+                self.append(result)
+
+
+class CsvFile(File):
+    def open(self, append: bool = False) -> None:
+        self.writer: DictWriter | None = None
+        super().open(append=append)
+
+        if self.resumed:
+            with open(self.filename) as fp:
+                fieldnames = next(reader(fp))
+
+            self.writer = DictWriter(self.fp, fieldnames=fieldnames)
+
+    def prepare_resume(self) -> None:
+        # Drop the last row if it has been interrupted while written
+        with open(self.filename, "rb+") as fp:
+            start, tail = read_tail(fp)
+            fp.truncate(start + tail.rfind(b"\n") + 1)
+
+    def append(self, result: Result) -> None:
+        if self.writer is None:
+            self.writer = DictWriter(self.fp, fieldnames=result.__dict__)
+            self.writer.writeheader()
 
-        with open(self.filename, "w") as fp:
-            writer = DictWriter(fp, fieldnames=headers)
+        self.writer.writerow(result.__dict__)
+        self.fp.flush()
+        self.count += 1
 
-            writer.writeheader()
-            for ecoindex in self.results:
-                writer.writerow(ecoindex.__dict__)
+    def read(self) -> Iterator[Dict]:
+        with open(self.filename) as fp:
+            yield from DictReader(fp)
+
+
+class FailuresFile:
+    """
+    Sidecar csv file of the results, with the pages that could not be
+    analyzed. The file is only created when a first failure is written
+    """
+
+    def __init__(self, filename: str, append: bool = False) -> None:
+        self.filename = filename
+        self.append_to_file = append
+        self.fp: TextIO | None = None
+        self.count = 0
+
+    def append(self, failure: Failure) -> None:
+        if self.fp is None:
+            resume = (
+                self.append_to_file
+                and exists(self.filename)
+                and getsize(self.filename) > 0
+            )
+            self.fp = open(self.filename, "a" if resume else "w")
+            self.writer = writer(self.fp)
+
+            if not resume:
+                self.writer.writerow(Failure._fields)
+
+        self.writer.writerow(
+            failure._replace(kind=failure.kind.value, date=failure.date.isoformat())
+        )
+        self.fp.flush()
+        self.count += 1
+
+    def close(self) -> None:
+        if self.fp:
+            self.fp.close()
+            self.fp = None
 
 
 class JsonFile(File):
-    def write(self) -> None:
-        with open(self.filename, "w") as fp:
-            dump(
-                obj=[ecoindex.__dict__ for ecoindex in self.results],
-                fp=fp,
-                indent=4,
-                default=str,
+    """
+    Results are streamed as a json array with one result per line, so that
+    the file is always complete up to the last finished analysis
+    """
+
+    def open(self, append: bool = False) -> None:
+        self.empty = True
+        super().open(append=append)
+
+        if not self.resumed:
+            self.fp.write("[")
+
+    def prepare_resume(self) -> None:
+        with open(self.filename, "rb+") as fp:
+            start, tail = read_tail(fp)
+            tail = tail.rstrip()
+
+            # Drop the last line if it has been interrupted while written.
+            # Results are not followed by a new line until the next one, so
+            # the last line is kept when it is complete
+            end = tail.rfind(b"\n") + 1
+
+            if not is_json(tail[end:]):
+                tail = tail[:end].rstrip()
+
+            # Then remove the closing bracket of the array, if the previous
+            # run had the time to write it, and the separator of the next
+            # result
+            tail = tail[:-1].rstrip() if tail.endswith(b"]") else tail
+            tail = tail[:-1] if tail.endswith(b",") else tail
+            self.empty = tail.endswith(b"[")
+            fp.truncate(start + len(tail))
+
+    def append(self, result: Result) -> None:
+        self.fp.write("\n" if self.empty else ",\n")
+        self.fp.write(dumps(obj=result.__dict__, default=str))
+        self.fp.flush()
+        self.empty = False
+        self.count += 1
+
+    def close(self) -> None:
+        if self.fp:
+            self.fp.write("]\n" if self.empty else "\n]\n")
+
+        super().close()
+
+    def read(self) -> Iterator[Dict]:
+        """
+        Reads results line by line, so that a file interrupted before its
+        closing bracket can still be read. Files written with an
+        indentation by previous versions are loaded at once
+        """
+        with open(self.filename) as fp:
+            for line in fp:
+                line = line.strip().rstrip(",")
+
+                if line in ("", "[", "]", "[]"):
+                    continue
+
+                try:
+                    yield loads(line)
+                except JSONDecodeError:
+                    if line == "{":
+                        fp.seek(0)
+                        yield from load(fp)
+
+                        return
+
+                    logger.warning(f"Skipped invalid line in {self.filename}")
+
+
+def import_pyarrow() -> Any:
+    try:
+        import pyarrow
+    except ModuleNotFoundError:
+        raise ModuleNotFoundError(
+            "The parquet and feather formats need pyarrow, "
+            "install it with `pip install ecoindex-cli[arrow]`"
+        )
+
+    return pyarrow
+
+
+def get_arrow_schema(pyarrow: Any, fields: Iterable[str]) -> Any:
+    """
+    Returns the schema of the results: repeated strings are dictionary
+    encoded, and unknown fields are strings
+    """
+    dictionary = pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+    types = {
+        "url": dictionary,
+        "grade": dictionary,
+        "page_type": dictionary,
+        "ecoindex_version": dictionary,
+        "width": pyarrow.int32(),
+        "height": pyarrow.int32(),
+        "nodes": pyarrow.int64(),
+        "requests": pyarrow.int64(),
+        "size": pyarrow.float64(),
+        "score": pyarrow.float64(),
+        "ges": pyarrow.float64(),
+        "water": pyarrow.float64(),
+        "date": pyarrow.timestamp("us"),
+    }
+
+    return pyarrow.schema(
+        [(field, types.get(field, pyarrow.string())) for field in fields]
+    )
+
+
+class ArrowFile(File):
+    """
+    Results in a columnar format of Apache Arrow, with typed columns and
+    compression. Results are written by batches of `batch_size` rows, and
+    the file can only be read once closed. It is written under a temporary
+    name, and only replaces the file of `filename` when closed, so that an
+    interrupted analysis never leaves an unreadable file: results of a run
+    that could not close the file are lost, but the previous file is kept.
+    Columnar files can not be appended to: when resuming, the previous
+    results are copied to the new file first
+    """
+
+    batch_size = 10000
+
+    def __init__(
+        self,
+        filename: str,
+        results: List[Result] | None = None,
+        export_format: ExportFormat | None = None,
+    ):
+        super().__init__(
+            filename=filename, results=results, export_format=export_format
+        )
+        self.pyarrow = import_pyarrow()
+        self.writer = None
+        self.rows: List[Dict] | None = None
+
+    def open(self, append: bool = False) -> None:
+        self.resumed = append and exists(self.filename) and getsize(self.filename) > 0
+        self.write_filename = f"{self.filename}.tmp"
+        self.rows = []
+        self.writer = None
+        self.count = 0
+
+        if self.resumed:
+            for batch in self.read_batches():
+                if self.writer is None:
+                    self.open_writer(schema=batch.schema)
+
+                self.writer.write_batch(self.get_batch(batch.to_pylist()))
+
+    @abstractmethod
+    def open_writer(self, schema: Any) -> None:
+        pass
+
+    @abstractmethod
+    def read_batches(self) -> Iterator[Any]:
+        pass
+
+    def get_batch(self, rows: List[Dict]) -> Any:
+        return self.pyarrow.RecordBatch.from_pylist(rows, schema=self.schema)
+
+    def append(self, result: Result) -> None:
+        if self.writer is None:
+            self.open_writer(
+                schema=get_arrow_schema(pyarrow=self.pyarrow, fields=result.__dict__)
             )
 
+        self.rows.append(result.__dict__)
+        self.count += 1
 
-def write_results_to_file(
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.rows:
+            self.writer.write_batch(self.get_batch(self.rows))
+            self.rows = []
+
+    def close(self) -> None:
+        if self.rows is None:
+            return
+
+        if self.writer is None:
+            # A valid file without any result
+            self.open_writer(
+                schema=get_arrow_schema(pyarrow=self.pyarrow, fields=Result.__fields__)
+            )
+
+        self.flush()
+        self.writer.close()
+        replace(self.write_filename, self.filename)
+
+        self.rows = None
+
+    def read(self) -> Iterator[Dict]:
+        for batch in self.read_batches():
+            yield from batch.to_pylist()
+
+
+class ParquetFile(ArrowFile):
+    def open_writer(self, schema: Any) -> None:
+        from pyarrow.parquet import ParquetWriter
+
+        self.schema = schema
+        self.writer = ParquetWriter(self.write_filename, schema, compression="zstd")
+
+    def read_batches(self) -> Iterator[Any]:
+        from pyarrow.parquet import ParquetFile as ParquetReader
+
+        yield from ParquetReader(self.filename).iter_batches()
+
+
+class FeatherFile(ArrowFile):
+    """
+    Results in the Arrow IPC file format (Feather V2). The dictionary of an
+    encoded column can only grow from one batch to the next in this format,
+    so the dictionaries are kept while the file is written
+    """
+
+    def open_writer(self, schema: Any) -> None:
+        self.schema = schema
+        self.dictionaries: Dict[str, Dict[str, int]] = {}
+        self.writer = self.pyarrow.ipc.new_file(
+            self.write_filename,
+            schema,
+            options=self.pyarrow.ipc.IpcWriteOptions(
+                compression="zstd", emit_dictionary_deltas=True
+            ),
+        )
+
+    def get_batch(self, rows: List[Dict]) -> Any:
+        pyarrow = self.pyarrow
+        arrays = []
+
+        for field in self.schema:
+            values = [row.get(field.name) for row in rows]
+
+            if not pyarrow.types.is_dictionary(field.type):
+                arrays.append(pyarrow.array(values, type=field.type))
+                continue
+
+            dictionary = self.dictionaries.setdefault(field.name, {})
+            indices = [
+                None if value is None else dictionary.setdefault(value, len(dictionary))
+                for value in values
+            ]
+            arrays.append(
+                pyarrow.DictionaryArray.from_arrays(
+                    pyarrow.array(indices, type=field.type.index_type),
+                    pyarrow.array(list(dictionary), type=field.type.value_type),
+                )
+            )
+
+        return pyarrow.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+    def read_batches(self) -> Iterator[Any]:
+        with self.pyarrow.OSFile(self.filename) as source:
+            reader = self.pyarrow.ipc.open_file(source)
+
+            for index in range(reader.num_record_batches):
+                yield reader.get_batch(index)
+
+
+def get_results_file(
     filename: str,
-    results: List[Result],
+    results: List[Result] | None = None,
     export_format: ExportFormat | None = ExportFormat.csv,
-) -> None:
+) -> File:
     if export_format == ExportFormat.csv:
-        file = CsvFile(filename=filename, results=results, export_format=export_format)
+        return CsvFile(filename=filename, results=results, export_format=export_format)
     elif export_format == ExportFormat.json:
-        file = JsonFile(filename=filename, results=results, export_format=export_format)
+        return JsonFile(filename=filename, results=results, export_format=export_format)
+    elif export_format == ExportFormat.parquet:
+        return ParquetFile(
+            filename=filename, results=results, export_format=export_format
+        )
+    elif export_format == ExportFormat.feather:
+        return FeatherFile(
+            filename=filename, results=results, export_format=export_format
+        )
+
+
+def get_export_format_from_filename(filename: str) -> ExportFormat:
+    suffix = Path(filename).suffix.lstrip(".").lower()
+
+    # Feather files are arrow ipc files
+    return ExportFormat("feather" if suffix in ("arrow", "ipc") else suffix)
+
+
+def get_analyzed_keys(
+    filename: str,
+) -> Set[Tuple[str, int, int]]:
+    """
+    Returns the (url, width, height) of the analysis already
+    written in an existing results file
+    """
+    file = get_results_file(
+        filename=filename,
+        export_format=get_export_format_from_filename(filename),
+    )
 
-    file.write()
+    return {(row["url"], int(row["width"]), int(row["height"])) for row in file.read()}
+
+
+def write_results_to_file(
+    filename: str,
+    results: List[Result],
+    export_format: ExportFormat | None = ExportFormat.csv,
+) -> None:
+    get_results_file(
+        filename=filename, results=results, export_format=export_format
+    ).write()
 
 
 def write_urls_to_file(file_prefix: str, urls: List[str]) -> None:
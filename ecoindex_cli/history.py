@@ -0,0 +1,266 @@
+from datetime import datetime
+from os.path import dirname
+from sqlite3 import connect
+from typing import Any, List, NamedTuple
+
+from ecoindex_cli.cache import CachedResult
+from ecoindex_cli.files import create_folder
+
+DEFAULT_HISTORY_FILE = "/tmp/ecoindex-cli/history.sqlite"
+
+
+class RunSummary(NamedTuple):
+    id: int
+    domain: str
+    date: datetime
+    results_file: str | None
+    pages: int
+    mean_score: float | None
+
+
+class PageTrend(NamedTuple):
+    url: str
+    width: int
+    height: int
+    runs: int
+    date: datetime
+    score: float | None
+    grade: str | None
+    previous_score: float | None
+    previous_grade: str | None
+
+    @property
+    def delta(self) -> float | None:
+        if self.score is None or self.previous_score is None:
+            return None
+
+        return self.score - self.previous_score
+
+
+class PageResult(NamedTuple):
+    run_id: int
+    date: datetime
+    width: int
+    height: int
+    score: float | None
+    grade: str | None
+    size: float | None
+    nodes: int | None
+    requests: int | None
+
+
+def get_timestamp(date: Any, default: datetime) -> float:
+    if isinstance(date, datetime):
+        return date.timestamp()
+
+    try:
+        return datetime.fromisoformat(str(date)).timestamp()
+    except ValueError:
+        return default.timestamp()
+
+
+class ResultsHistory:
+    """
+    Append-only store of the results of all the runs, in a sqlite
+    database. Results are indexed by url, window size and date.
+
+    The last two results of each page, and the number of pages and sum of
+    the scores of each run, are updated as results are added, so that
+    trends are read without going through past results again
+    """
+
+    def __init__(self, filename: str = DEFAULT_HISTORY_FILE) -> None:
+        self.filename = filename
+        self.run_id: int | None = None
+        self.run_date: datetime | None = None
+        self.run_domain: str | None = None
+        self.pending = 0
+        self.pending_score = 0.0
+        self.count = 0
+
+        create_folder(dirname(filename))
+        self.connection = connect(filename)
+        self.connection.executescript(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "id INTEGER PRIMARY KEY, "
+            "domain TEXT NOT NULL, "
+            "date REAL NOT NULL, "
+            "results_file TEXT, "
+            "pages INTEGER NOT NULL DEFAULT 0, "
+            "score_sum REAL NOT NULL DEFAULT 0);"
+            "CREATE INDEX IF NOT EXISTS runs_domain ON runs (domain, date);"
+            "CREATE TABLE IF NOT EXISTS results ("
+            "run_id INTEGER NOT NULL, "
+            "url TEXT NOT NULL, "
+            "width INTEGER NOT NULL, "
+            "height INTEGER NOT NULL, "
+            "date REAL NOT NULL, "
+            "score REAL, "
+            "grade TEXT, "
+            "size REAL, "
+            "nodes INTEGER, "
+            "requests INTEGER, "
+            "ges REAL, "
+            "water REAL);"
+            "CREATE INDEX IF NOT EXISTS results_page "
+            "ON results (url, width, height, date);"
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT NOT NULL, "
+            "width INTEGER NOT NULL, "
+            "height INTEGER NOT NULL, "
+            "domain TEXT NOT NULL, "
+            "runs INTEGER NOT NULL, "
+            "date REAL NOT NULL, "
+            "score REAL, "
+            "grade TEXT, "
+            "previous_score REAL, "
+            "previous_grade TEXT, "
+            "PRIMARY KEY (url, width, height));"
+            "CREATE INDEX IF NOT EXISTS pages_domain ON pages (domain);"
+        )
+        self.connection.commit()
+
+    def start_run(
+        self, domain: str, date: datetime, results_file: str | None = None
+    ) -> int:
+        cursor = self.connection.execute(
+            "INSERT INTO runs (domain, date, results_file) VALUES (?, ?, ?)",
+            (domain, date.timestamp(), results_file),
+        )
+        self.connection.commit()
+        self.run_id = cursor.lastrowid
+        self.run_date = date
+        self.run_domain = domain
+
+        return self.run_id
+
+    def add(self, result: Any) -> None:
+        """
+        Adds a result to the current run. Results served by the cache are
+        not new measurements, and are skipped so that the last two results
+        of a page are the ones of its last two measurements
+        """
+        if isinstance(result, CachedResult):
+            return
+
+        date = get_timestamp(getattr(result, "date", None), default=self.run_date)
+        self.connection.execute(
+            "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                self.run_id,
+                result.url,
+                result.width,
+                result.height,
+                date,
+                result.score,
+                result.grade,
+                result.size,
+                result.nodes,
+                result.requests,
+                result.ges,
+                result.water,
+            ),
+        )
+        # The previous values are the ones before the update
+        self.connection.execute(
+            "INSERT INTO pages "
+            "(url, width, height, domain, runs, date, score, grade) "
+            "VALUES (?, ?, ?, ?, 1, ?, ?, ?) "
+            "ON CONFLICT (url, width, height) DO UPDATE SET "
+            "previous_score = score, previous_grade = grade, "
+            "score = excluded.score, grade = excluded.grade, "
+            "date = excluded.date, domain = excluded.domain, runs = runs + 1",
+            (
+                result.url,
+                result.width,
+                result.height,
+                self.run_domain,
+                date,
+                result.score,
+                result.grade,
+            ),
+        )
+        self.pending += 1
+        self.pending_score += result.score or 0
+        self.count += 1
+
+        if self.pending >= 100:
+            self.commit()
+
+    def commit(self) -> None:
+        if self.pending:
+            self.connection.execute(
+                "UPDATE runs SET pages = pages + ?, score_sum = score_sum + ? "
+                "WHERE id = ?",
+                (self.pending, self.pending_score, self.run_id),
+            )
+
+        self.connection.commit()
+        self.pending = 0
+        self.pending_score = 0.0
+
+    def get_runs(self, domain: str | None = None, limit: int = 20) -> List[RunSummary]:
+        """Returns the last runs, from the oldest"""
+        rows = self.connection.execute(
+            "SELECT id, domain, date, results_file, pages, score_sum FROM runs "
+            "WHERE pages > 0 AND (? IS NULL OR domain = ?) "
+            "ORDER BY date DESC, id DESC LIMIT ?",
+            (domain, domain, limit),
+        ).fetchall()
+
+        return [
+            RunSummary(
+                id=id,
+                domain=run_domain,
+                date=datetime.fromtimestamp(date),
+                results_file=results_file,
+                pages=pages,
+                mean_score=score_sum / pages,
+            )
+            for id, run_domain, date, results_file, pages, score_sum in reversed(rows)
+        ]
+
+    def get_trends(
+        self, domain: str | None = None, limit: int | None = 20
+    ) -> List[PageTrend]:
+        """
+        Returns the pages analyzed more than once, from the largest drop of
+        their score between their last two results
+        """
+        rows = self.connection.execute(
+            "SELECT url, width, height, runs, date, score, grade, "
+            "previous_score, previous_grade FROM pages "
+            "WHERE runs > 1 AND (? IS NULL OR domain = ?) "
+            "ORDER BY score - previous_score, url LIMIT ?",
+            (domain, domain, -1 if limit is None else limit),
+        ).fetchall()
+
+        return [
+            PageTrend(*row[:4], datetime.fromtimestamp(row[4]), *row[5:])
+            for row in rows
+        ]
+
+    def count_regressions(self, threshold: float, domain: str | None = None) -> int:
+        """Returns the number of pages whose score dropped by `threshold` or more"""
+        (count,) = self.connection.execute(
+            "SELECT COUNT(*) FROM pages WHERE runs > 1 "
+            "AND score - previous_score <= ? AND (? IS NULL OR domain = ?)",
+            (-threshold, domain, domain),
+        ).fetchone()
+
+        return count
+
+    def get_page_history(self, url: str) -> List[PageResult]:
+        rows = self.connection.execute(
+            "SELECT run_id, date, width, height, score, grade, size, nodes, "
+            "requests FROM results WHERE url = ? ORDER BY date",
+            (url,),
+        ).fetchall()
+
+        return [
+            PageResult(row[0], datetime.fromtimestamp(row[1]), *row[2:]) for row in rows
+        ]
+
+    def close(self) -> None:
+        self.commit()
+        self.connection.close()
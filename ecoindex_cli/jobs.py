@@ -0,0 +1,104 @@
+from os.path import dirname
+from typing import AsyncIterator, Callable, Iterable, Iterator, List, Set, Tuple
+
+from ecoindex.models import WindowSize
+
+from ecoindex_cli.crawl import CrawlLimits, crawl_urls
+from ecoindex_cli.files import create_folder
+from ecoindex_cli.urls import UrlCanonicalizer
+
+# A url with the window sizes to analyze from the same page load
+Job = Tuple[str, List[WindowSize]]
+
+
+class JobSource:
+    """
+    Jobs of an analysis run. With `multi_viewport`, all the window sizes of
+    a url are analyzed from the same page load, otherwise each one from its
+    own page load. Analyses already done, given as `(url, width, height)` in
+    `analyzed`, are skipped.
+
+    `count` is the number of analyses of the jobs yielded so far. When the
+    jobs are read lazily, `on_total` is called with this number as soon as
+    it is known, or each time it grows for a crawl
+    """
+
+    def __init__(
+        self,
+        window_sizes: List[WindowSize],
+        multi_viewport: bool = False,
+        analyzed: Set[Tuple[str, int, int]] | None = None,
+    ) -> None:
+        self.window_sizes = window_sizes
+        self.multi_viewport = multi_viewport
+        self.analyzed = analyzed if analyzed else set()
+        self.count = 0
+
+    def get_url_jobs(self, url: str) -> List[Job]:
+        sizes = [
+            window_size
+            for window_size in self.window_sizes
+            if (url, window_size.width, window_size.height) not in self.analyzed
+        ]
+
+        if self.multi_viewport:
+            return [(url, sizes)] if sizes else []
+
+        return [(url, [window_size]) for window_size in sizes]
+
+    def add_url(self, url: str) -> List[Job]:
+        jobs = self.get_url_jobs(url)
+        self.count += sum(len(sizes) for _, sizes in jobs)
+
+        return jobs
+
+    def add_crawled_url(
+        self, url: str, on_total: Callable[[int], None] | None = None
+    ) -> List[Job]:
+        jobs = self.add_url(url)
+
+        if jobs and on_total:
+            on_total(self.count)
+
+        return jobs
+
+    def iter_jobs(
+        self, urls: Iterable[str], on_total: Callable[[int], None] | None = None
+    ) -> Iterator[Job]:
+        for url in urls:
+            yield from self.add_url(url)
+
+        if on_total:
+            on_total(self.count)
+
+    async def iter_crawled_jobs(
+        self,
+        main_url: str,
+        input_file: str,
+        limits: CrawlLimits = CrawlLimits(),
+        canonicalizer: UrlCanonicalizer | None = None,
+        on_total: Callable[[int], None] | None = None,
+    ) -> AsyncIterator[Job]:
+        """
+        Yields the jobs of the urls of a website as soon as they are found
+        by the crawler, and records these urls in `input_file`. The main url
+        is analyzed when no url is found
+        """
+        create_folder(dirname(input_file))
+
+        with open(input_file, "w") as fp:
+            found = False
+
+            async for url in crawl_urls(
+                main_url=main_url, limits=limits, canonicalizer=canonicalizer
+            ):
+                found = True
+                fp.write(f"{url}\n")
+                fp.flush()
+
+                for job in self.add_crawled_url(url, on_total):
+                    yield job
+
+            if not found:
+                for job in self.add_crawled_url(main_url, on_total):
+                    yield job
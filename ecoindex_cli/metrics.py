@@ -0,0 +1,314 @@
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from json import dumps
+from os import getpid, listdir, sysconf
+from resource import RUSAGE_SELF, getrusage
+from threading import Event, Lock, Thread
+from time import monotonic, time
+from typing import Callable, Dict, List
+
+from ecoindex_cli.concurrency import get_available_memory
+from ecoindex_cli.timing import PHASES
+
+# Upper bounds of the phase latency histograms, in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+def get_resident_memory() -> int:
+    """
+    Returns the resident set size of the current process in bytes
+    """
+    try:
+        with open("/proc/self/statm") as fp:
+            return int(fp.read().split()[1]) * sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # Maximum resident set size, in kilobytes on linux
+        return getrusage(RUSAGE_SELF).ru_maxrss * 1024
+
+
+def get_process_memory(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/statm") as fp:
+            return int(fp.read().split()[1]) * sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # The process exited in the meantime
+        return 0
+
+
+def get_children_memory() -> int:
+    """
+    Returns the sum of the resident set sizes of all the descendants of the
+    current process in bytes: browsers, drivers and analysis processes.
+    Pages shared between processes are counted by each of them
+    """
+    children: Dict[int, List[int]] = {}
+
+    try:
+        pids = [int(name) for name in listdir("/proc") if name.isdigit()]
+    except OSError:
+        return 0
+
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat") as fp:
+                # The command name is in parentheses and may contain spaces
+                parent = int(fp.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+
+        children.setdefault(parent, []).append(pid)
+
+    memory, to_visit = 0, list(children.get(getpid(), []))
+
+    while to_visit:
+        pid = to_visit.pop()
+        memory += get_process_memory(pid)
+        to_visit += children.get(pid, [])
+
+    return memory
+
+
+class Histogram:
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def get_cumulative_counts(self) -> List[int]:
+        cumulative, total = [], 0
+
+        for count in self.counts:
+            total += count
+            cumulative.append(total)
+
+        return cumulative
+
+
+class RunMetrics:
+    """
+    Live metrics of an analysis run: analyses completed, failed and in
+    flight, throughput, phase latency histograms, browser pool and memory.
+    An analysis is the one of a page at one window size, so that all the
+    counters have the same unit. They can be exposed in the OpenMetrics text
+    format, and as json progress events
+    """
+
+    def __init__(
+        self,
+        total: int | None = None,
+        pool_size: int = 0,
+        get_idle_drivers: Callable[[], int] | None = None,
+    ) -> None:
+        self.total = total
+        self.pool_size = pool_size
+        self.get_idle_drivers = get_idle_drivers
+        self.lock = Lock()
+
+        self.start = monotonic()
+        self.start_timestamp = time()
+        self.last_completion_timestamp: float | None = None
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.phases: Dict[str, Histogram] = {}
+
+    def set_total(self, total: int | None) -> None:
+        with self.lock:
+            self.total = total
+
+    def start_analysis(self, analyses: int = 1) -> None:
+        """Starts the `analyses` of a page, one per window size"""
+        with self.lock:
+            self.in_flight += analyses
+
+    def end_analysis(
+        self, completed: int, failed: int, timings: Dict[str, float]
+    ) -> None:
+        with self.lock:
+            self.in_flight -= completed + failed
+            self.completed += completed
+            self.failed += failed
+            self.last_completion_timestamp = time()
+
+            for phase, duration in timings.items():
+                self.phases.setdefault(phase, Histogram()).observe(duration)
+
+    def get_analyses_per_second(self) -> float:
+        elapsed = monotonic() - self.start
+
+        return (self.completed + self.failed) / elapsed if elapsed > 0 else 0
+
+    def get_snapshot(self) -> Dict:
+        """Returns the current values of the counters and gauges"""
+        with self.lock:
+            return {
+                "completed": self.completed,
+                "failed": self.failed,
+                "in_flight": self.in_flight,
+                "total": self.total,
+                "analyses_per_second": round(self.get_analyses_per_second(), 3),
+                "elapsed": round(monotonic() - self.start, 3),
+                "last_completion": self.last_completion_timestamp,
+                "pool_size": self.pool_size,
+                "idle_drivers": (
+                    self.get_idle_drivers() if self.get_idle_drivers else None
+                ),
+                "resident_memory": get_resident_memory(),
+                "children_resident_memory": get_children_memory(),
+                "available_memory": get_available_memory(),
+            }
+
+    def render(self) -> str:
+        """Returns the metrics in the OpenMetrics text format"""
+        snapshot = self.get_snapshot()
+        lines = [
+            "# TYPE ecoindex_analyses counter",
+            "# HELP ecoindex_analyses Analyses done, by status",
+            f'ecoindex_analyses_total{{status="success"}} {snapshot["completed"]}',
+            f'ecoindex_analyses_total{{status="failed"}} {snapshot["failed"]}',
+            "# TYPE ecoindex_analyses_expected gauge",
+            "# HELP ecoindex_analyses_expected Analyses to do, NaN while unknown",
+            f"ecoindex_analyses_expected {snapshot['total'] if snapshot['total'] is not None else 'NaN'}",
+            "# TYPE ecoindex_analyses_in_flight gauge",
+            f"ecoindex_analyses_in_flight {snapshot['in_flight']}",
+            "# TYPE ecoindex_analyses_per_second gauge",
+            f"ecoindex_analyses_per_second {snapshot['analyses_per_second']}",
+            "# TYPE ecoindex_run_start_timestamp_seconds gauge",
+            f"ecoindex_run_start_timestamp_seconds {self.start_timestamp}",
+            "# TYPE ecoindex_last_completion_timestamp_seconds gauge",
+            "# HELP ecoindex_last_completion_timestamp_seconds When the last analysis completed, to detect stalled runs",
+            f"ecoindex_last_completion_timestamp_seconds {snapshot['last_completion'] or self.start_timestamp}",
+            "# TYPE ecoindex_browser_pool_size gauge",
+            f"ecoindex_browser_pool_size {snapshot['pool_size']}",
+        ]
+
+        if snapshot["idle_drivers"] is not None:
+            lines += [
+                "# TYPE ecoindex_browser_pool_idle gauge",
+                f"ecoindex_browser_pool_idle {snapshot['idle_drivers']}",
+            ]
+
+        lines += [
+            "# TYPE ecoindex_resident_memory_bytes gauge",
+            f"ecoindex_resident_memory_bytes {snapshot['resident_memory']}",
+            "# TYPE ecoindex_children_resident_memory_bytes gauge",
+            "# HELP ecoindex_children_resident_memory_bytes Resident memory of the browsers, drivers and analysis processes",
+            f"ecoindex_children_resident_memory_bytes {snapshot['children_resident_memory']}",
+            "# TYPE ecoindex_available_memory_bytes gauge",
+            f"ecoindex_available_memory_bytes {snapshot['available_memory']}",
+            "# TYPE ecoindex_phase_duration_seconds histogram",
+            "# HELP ecoindex_phase_duration_seconds Time spent in each phase of an analysis",
+        ]
+
+        with self.lock:
+            for phase in PHASES + tuple(sorted(set(self.phases) - set(PHASES))):
+                if phase not in self.phases:
+                    continue
+
+                histogram = self.phases[phase]
+                bounds = [str(bound) for bound in histogram.buckets] + ["+Inf"]
+
+                for bound, count in zip(bounds, histogram.get_cumulative_counts()):
+                    lines.append(
+                        f'ecoindex_phase_duration_seconds_bucket{{phase="{phase}",le="{bound}"}} {count}'
+                    )
+
+                lines += [
+                    f'ecoindex_phase_duration_seconds_sum{{phase="{phase}"}} {histogram.sum}',
+                    f'ecoindex_phase_duration_seconds_count{{phase="{phase}"}} {histogram.count}',
+                ]
+
+        lines.append("# EOF")
+
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """
+    Serves the metrics of a run on `/metrics`, from a background thread
+    """
+
+    def __init__(self, metrics: RunMetrics, port: int, host: str = "0.0.0.0") -> None:
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def __enter__(self) -> "MetricsServer":
+        self.thread.start()
+
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class ProgressStream:
+    """
+    Writes newline-delimited json events to a file descriptor: an `analysis`
+    event when each analysis completes, and a `progress` event with the run
+    metrics every `interval` seconds and at the end of the run
+    """
+
+    def __init__(self, metrics: RunMetrics, fd: int, interval: float = 10) -> None:
+        self.metrics = metrics
+        self.interval = interval
+        self.fp = open(fd, "w", buffering=1, closefd=False)
+        self.lock = Lock()
+        self.stopped = Event()
+        self.thread = Thread(target=self.run, daemon=True)
+
+    def write(self, event: str, **values) -> None:
+        line = dumps({"event": event, "timestamp": time(), **values}, default=str)
+
+        with self.lock:
+            try:
+                self.fp.write(line + "\n")
+            except (OSError, ValueError):
+                # The reader went away, the run goes on
+                pass
+
+    def write_analysis(self, url: str, width: int, height: int, status: str) -> None:
+        self.write("analysis", url=url, width=width, height=height, status=status)
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            self.write("progress", **self.metrics.get_snapshot())
+
+    def __enter__(self) -> "ProgressStream":
+        self.thread.start()
+
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stopped.set()
+        self.thread.join()
+        self.write("done", **self.metrics.get_snapshot())
+        self.fp.close()
@@ -0,0 +1,143 @@
+from collections import deque
+from time import monotonic
+from typing import Any, Deque, Dict, Tuple
+from urllib.parse import urlsplit
+
+
+def get_host(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+
+class HostStats:
+    def __init__(self) -> None:
+        self.analyses = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.duration = 0.0
+        self.waited = 0.0
+        self.first_start: float | None = None
+        self.last_end: float | None = None
+
+    def get_rate(self) -> float:
+        """Returns the number of analyses per second while the host was active"""
+        if self.first_start is None or self.last_end is None:
+            return 0
+
+        elapsed = self.last_end - self.first_start
+
+        return self.analyses / elapsed if elapsed > 0 else 0
+
+
+class HostPoliteness:
+    """
+    Bounds the load put on each host: at most `max_per_host` analyses of a
+    host run at the same time, and they are started at most `max_rps_per_host`
+    times per second.
+
+    Jobs are queued by host and handed out in a round-robin fashion among
+    the hosts that are ready, so that jobs of other hosts are run while a
+    host is at its limits. At most `lookahead` jobs are queued, so that job
+    sources can stay lazy
+    """
+
+    def __init__(
+        self,
+        max_per_host: int | None = None,
+        max_rps_per_host: float | None = None,
+        lookahead: int = 1000,
+    ) -> None:
+        self.max_per_host = max_per_host
+        self.interval = 1 / max_rps_per_host if max_rps_per_host else 0
+        self.lookahead = lookahead
+
+        # Hosts with queued jobs, in round-robin order
+        self.queues: Dict[str, Deque[Tuple[Any, float]]] = {}
+        self.next_start: Dict[str, float] = {}
+        self.stats: Dict[str, HostStats] = {}
+        self.queued = 0
+
+    def is_full(self) -> bool:
+        return self.queued >= self.lookahead
+
+    def push(self, host: str, job: Any) -> None:
+        self.queues.setdefault(host, deque()).append((job, monotonic()))
+        self.stats.setdefault(host, HostStats())
+        self.queued += 1
+
+    def get_delay(self, host: str, now: float) -> float | None:
+        """
+        Returns how long to wait before starting a job of the host, or None
+        when the host is running its maximum number of analyses
+        """
+        if self.max_per_host and self.stats[host].in_flight >= self.max_per_host:
+            return None
+
+        return max(self.next_start.get(host, 0) - now, 0)
+
+    def pop(self) -> Tuple[str, Any] | None:
+        """
+        Returns the next job that can be started, or None if every host with
+        queued jobs is at its limits
+        """
+        now = monotonic()
+
+        for host in self.queues:
+            if self.get_delay(host=host, now=now) == 0:
+                break
+        else:
+            return None
+
+        queue = self.queues.pop(host)
+        job, queued_at = queue.popleft()
+        self.queued -= 1
+
+        # The host goes to the end of the round
+        if queue:
+            self.queues[host] = queue
+
+        stats = self.stats[host]
+        stats.waited += now - queued_at
+        stats.in_flight += 1
+        stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+
+        if stats.first_start is None:
+            stats.first_start = now
+
+        if self.interval:
+            self.next_start[host] = now + self.interval
+
+        return (host, job)
+
+    def get_wait_time(self) -> float | None:
+        """
+        Returns how long to wait before a queued job can be started, or None
+        if it depends on running analyses
+        """
+        now = monotonic()
+        delays = [
+            delay
+            for delay in (self.get_delay(host=host, now=now) for host in self.queues)
+            if delay is not None
+        ]
+
+        return min(delays) if delays else None
+
+    def add_failure(self, host: str) -> None:
+        """Records an analysis that completed without a result"""
+        self.stats[host].errors += 1
+
+    def pause(self, host: str) -> None:
+        """
+        Releases the slot of a running analysis of the host, while it waits
+        before a retry. It is queued again to be resumed
+        """
+        self.stats[host].in_flight -= 1
+
+    def done(self, host: str, duration: float, failed: bool = False) -> None:
+        stats = self.stats[host]
+        stats.in_flight -= 1
+        stats.analyses += 1
+        stats.errors += failed
+        stats.duration += duration
+        stats.last_end = monotonic()
@@ -0,0 +1,166 @@
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from ecoindex.models import Result
+from loguru import logger
+
+from ecoindex_cli.cache import CachedResult
+from ecoindex_cli.enums import FailureKind
+from ecoindex_cli.files import FailuresFile, File
+from ecoindex_cli.history import ResultsHistory
+from ecoindex_cli.jobs import Job
+from ecoindex_cli.metrics import ProgressStream, RunMetrics
+from ecoindex_cli.politeness import HostPoliteness, get_host
+from ecoindex_cli.report.report import Report
+from ecoindex_cli.retry import Failure, get_failure
+from ecoindex_cli.timing import TimingsFile, TimingStats
+
+
+class ResultRecorder:
+    """
+    Records the outcome of each analysis of a run. Results are written to
+    the results file, and added to the report and the history if any.
+    Failures are written to a sidecar `.failures.csv` file, and with
+    `timings` the phase timings to a sidecar `.timings.csv` file. The run
+    metrics, the progress stream and the progress bar, with `on_progress`,
+    are updated as soon as an analysis completes
+    """
+
+    def __init__(
+        self,
+        results_file: File,
+        append: bool = False,
+        timings: bool = False,
+        report: Report | None = None,
+        history: ResultsHistory | None = None,
+        metrics: RunMetrics | None = None,
+        progress_stream: ProgressStream | None = None,
+        politeness: HostPoliteness | None = None,
+        on_progress: Callable[[int], None] | None = None,
+    ) -> None:
+        self.results_file = results_file
+        self.append = append
+        self.report = report
+        self.history = history
+        self.metrics = metrics if metrics else RunMetrics()
+        self.progress_stream = progress_stream
+        self.politeness = politeness
+        self.on_progress = on_progress
+
+        filename = Path(results_file.filename)
+        self.failures_file = FailuresFile(
+            filename=str(filename.with_suffix(".failures.csv")), append=append
+        )
+        self.timings_file = (
+            TimingsFile(
+                filename=str(filename.with_suffix(".timings.csv")), append=append
+            )
+            if timings
+            else None
+        )
+        self.timing_stats = TimingStats()
+        self.failure_counts: Dict[FailureKind, int] = {}
+        self.error_found = False
+
+    def open(self) -> None:
+        self.results_file.open(append=self.append)
+
+    def start(self, job: Job) -> None:
+        _, sizes = job
+        self.metrics.start_analysis(analyses=len(sizes))
+
+    def record(
+        self,
+        job: Job,
+        outcome: Tuple[List[Result | Failure], Dict] | None,
+        exception: Exception | None,
+    ) -> None:
+        """
+        Records the results of a job and their phase timings, given as the
+        outcome of `AnalysisRuntime.analyze`, or a failure for each of its
+        window sizes if the analysis raised `exception`
+        """
+        url, sizes = job
+
+        if exception:
+            logger.error(
+                f"{url} -- {exception.msg if hasattr(exception, 'msg') else exception}"
+            )
+            results = [
+                get_failure(
+                    url=url,
+                    width=size.width,
+                    height=size.height,
+                    exception=exception,
+                )
+                for size in sizes
+            ]
+            phase_timings = {}
+        else:
+            results, phase_timings = outcome
+            self.timing_stats.add(phase_timings)
+
+        for result in results:
+            if isinstance(result, Failure):
+                self.failures_file.append(result)
+                self.failure_counts[result.kind] = (
+                    self.failure_counts.get(result.kind, 0) + 1
+                )
+            else:
+                self.results_file.append(result)
+
+                if self.report:
+                    self.report.add(result)
+
+                if self.history:
+                    self.history.add(result)
+
+        if any(isinstance(result, Failure) for result in results):
+            self.error_found = True
+
+            # Exceptions are already counted by the scheduler
+            if self.politeness and not exception:
+                self.politeness.add_failure(get_host(url))
+
+        if self.timings_file and not exception:
+            # Timings of a multi viewport analysis cover all its sizes
+            self.timings_file.append(
+                url=url,
+                width=sizes[0].width if len(sizes) == 1 else None,
+                height=sizes[0].height if len(sizes) == 1 else None,
+                timings=phase_timings,
+            )
+
+        failed = sum(isinstance(result, Failure) for result in results)
+        self.metrics.end_analysis(
+            completed=len(results) - failed, failed=failed, timings=phase_timings
+        )
+
+        if self.progress_stream:
+            for result in results:
+                self.progress_stream.write_analysis(
+                    url=url,
+                    width=result.width,
+                    height=result.height,
+                    status=(
+                        result.kind.value
+                        if isinstance(result, Failure)
+                        else "cached"
+                        if isinstance(result, CachedResult)
+                        else "success"
+                    ),
+                )
+
+        if self.on_progress:
+            self.on_progress(len(sizes))
+
+    def close(self) -> None:
+        self.results_file.close()
+
+        if self.timings_file:
+            self.timings_file.close()
+
+        if self.history:
+            self.history.close()
+
+        self.failures_file.close()
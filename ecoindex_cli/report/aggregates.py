@@ -0,0 +1,214 @@
+from heapq import heappush, heappushpop
+from itertools import count
+from math import ceil, floor, log
+from typing import Any, Dict, Iterable, List, Tuple
+
+GRADES = ("A", "B", "C", "D", "E", "F", "G")
+PROPERTIES = ("score", "size", "nodes", "requests", "ges", "water")
+TOP_COLUMNS = ("url", "score", "size", "nodes", "requests")
+
+
+def get_field(result: Any, name: str) -> Any:
+    """Returns a field of a result, or of a row read from a results file"""
+    return result.get(name) if isinstance(result, dict) else getattr(result, name)
+
+
+def get_number(value: Any) -> float | None:
+    if value is None or value == "":
+        return None
+
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class QuantileSketch:
+    """
+    Streaming summary of a non negative property: count, sum, min, max and
+    quantiles. The first `exact_limit` values are kept, so that quantiles of
+    usual runs are exact. Above it, values are counted in logarithmic
+    buckets, and quantiles are within `relative_accuracy` of the exact ones
+    whatever the number of values, for a bounded memory
+    """
+
+    def __init__(
+        self, relative_accuracy: float = 0.01, exact_limit: int = 10000
+    ) -> None:
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = log(self.gamma)
+        self.exact_limit = exact_limit
+
+        self.values: List[float] | None = []
+        self.buckets: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min: float | None = None
+        self.max: float | None = None
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+        if self.values is not None:
+            self.values.append(value)
+
+            if len(self.values) > self.exact_limit:
+                for exact_value in self.values:
+                    self.add_to_bucket(exact_value)
+
+                self.values = None
+
+            return
+
+        self.add_to_bucket(value)
+
+    def add_to_bucket(self, value: float) -> None:
+        if value <= 0:
+            self.zeros += 1
+            return
+
+        index = ceil(log(value) / self.log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def get_bucket_value(self, index: int) -> float:
+        return 2 * self.gamma**index / (self.gamma + 1)
+
+    def get_mean(self) -> float | None:
+        return self.sum / self.count if self.count else None
+
+    def get_weighted_values(self) -> Tuple[List[float], List[int]]:
+        """
+        Returns the values with their number of occurrences, to draw a
+        histogram of the property
+        """
+        if self.values is not None:
+            return self.values, [1] * len(self.values)
+
+        indexes = sorted(self.buckets)
+        values = [0.0] * bool(self.zeros) + [self.get_bucket_value(i) for i in indexes]
+        weights = [self.zeros] * bool(self.zeros) + [self.buckets[i] for i in indexes]
+
+        return values, weights
+
+    def quantile(self, q: float) -> float | None:
+        if not self.count:
+            return None
+
+        if q <= 0 or q >= 1:
+            return self.min if q <= 0 else self.max
+
+        if self.values is not None:
+            # Linear interpolation, as pandas does
+            values = sorted(self.values)
+            rank = q * (len(values) - 1)
+            lower = floor(rank)
+            upper = min(lower + 1, len(values) - 1)
+
+            return values[lower] + (values[upper] - values[lower]) * (rank - lower)
+
+        rank = q * (self.count - 1)
+        seen = self.zeros
+
+        if rank < seen:
+            return 0.0
+
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+
+            if rank < seen:
+                return min(max(self.get_bucket_value(index), self.min), self.max)
+
+        return self.max
+
+    def get_median(self) -> float | None:
+        return self.quantile(0.5)
+
+
+class TopResults:
+    """
+    Keeps the `n` results with the largest (or smallest) score, in a heap
+    of bounded size. Among equal scores, the first results are kept
+    """
+
+    def __init__(self, n: int = 10, largest: bool = True) -> None:
+        self.n = n
+        self.sign = 1 if largest else -1
+        self.heap: List[Tuple[float, int, Dict]] = []
+
+    def add(self, score: float, index: int, row: Dict) -> None:
+        item = (self.sign * score, -index, row)
+
+        if len(self.heap) < self.n:
+            heappush(self.heap, item)
+        elif item[:2] > self.heap[0][:2]:
+            heappushpop(self.heap, item)
+
+    def get_rows(self) -> List[Tuple[int, Dict]]:
+        return [
+            (-index, row)
+            for _, index, row in sorted(
+                self.heap, key=lambda item: (-item[0], -item[1])
+            )
+        ]
+
+
+class ResultsAggregate:
+    """
+    Aggregates of the results needed by the report, computed as results
+    are added one by one: a sketch of each property, the number of pages
+    by grade, and the best and worst pages. Memory does not grow with the
+    number of results
+    """
+
+    def __init__(self, top: int = 10) -> None:
+        self.count = 0
+        self.sketches = {property: QuantileSketch() for property in PROPERTIES}
+        self.grades = {grade: 0 for grade in GRADES}
+        self.best = TopResults(n=top, largest=True)
+        self.worst = TopResults(n=top, largest=False)
+        self.indexes = count()
+
+    def add(self, result: Any) -> int:
+        """Adds a result, and returns its index in the results"""
+        index = next(self.indexes)
+        self.count += 1
+
+        for property, sketch in self.sketches.items():
+            value = get_number(get_field(result, property))
+
+            if value is not None:
+                sketch.add(value)
+
+        grade = get_field(result, "grade")
+
+        if grade in self.grades:
+            self.grades[grade] += 1
+
+        score = get_number(get_field(result, "score"))
+
+        if score is not None:
+            row = {column: get_field(result, column) for column in TOP_COLUMNS}
+            self.best.add(score=score, index=index, row=row)
+            self.worst.add(score=score, index=index, row=row)
+
+        return index
+
+    def add_all(self, results: Iterable[Any]) -> None:
+        for result in results:
+            self.add(result)
+
+    def get_summary(self) -> Dict[str, Dict[str, float | None]]:
+        """Returns the mean, median, min and max of each property"""
+        return {
+            property: {
+                "mean": sketch.get_mean(),
+                "50%": sketch.get_median(),
+                "min": sketch.min,
+                "max": sketch.max,
+            }
+            for property, sketch in self.sketches.items()
+        }
@@ -0,0 +1,149 @@
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import sha256
+from importlib.metadata import PackageNotFoundError, version
+from json import dumps
+from multiprocessing import cpu_count, get_context
+from os import makedirs, replace
+from os.path import exists, join
+from shutil import copyfile
+from typing import Iterable, List, NamedTuple, Tuple
+
+from ecoindex_cli.enums import ChartKind
+
+# To be changed when the rendering of charts changes, to invalidate the cache
+CHARTS_VERSION = 1
+
+
+class Line(NamedTuple):
+    x: float
+    color: str
+    label: str
+    linestyle: str = "-"
+
+
+class Chart(NamedTuple):
+    """
+    Data of a chart, rendered as `{name}.svg`: a histogram of `values`
+    weighted by `weights`, a bar chart of the `weights` of each label, or
+    a line of the `values` of each label
+    """
+
+    name: str
+    title: str
+    xlabel: str
+    ylabel: str
+    values: List[float]
+    weights: List[float]
+    labels: Tuple[str, ...] = ()
+    colors: Tuple[str, ...] = ()
+    lines: Tuple[Line, ...] = ()
+    kind: ChartKind = ChartKind.histogram
+
+
+def get_matplotlib_version() -> str:
+    try:
+        return version("matplotlib")
+    except PackageNotFoundError:
+        return ""
+
+
+def get_chart_key(chart: Chart) -> str:
+    """Returns a hash of everything that the rendered chart depends on"""
+    return sha256(
+        dumps(
+            [CHARTS_VERSION, get_matplotlib_version(), chart],
+            sort_keys=True,
+            default=str,
+        ).encode()
+    ).hexdigest()
+
+
+def render_chart(chart: Chart, filename: str) -> None:
+    """
+    Renders a chart with its own figure, so that charts can be rendered
+    concurrently. Matplotlib is only imported when a chart is rendered
+    """
+    from matplotlib.figure import Figure
+
+    figure = Figure()
+    ax = figure.subplots()
+    ax.set_title(chart.title)
+    ax.set_xlabel(chart.xlabel)
+    ax.set_ylabel(chart.ylabel)
+
+    if chart.kind == ChartKind.bar:
+        ax.bar(x=chart.labels, height=chart.weights, color=chart.colors or None)
+    elif chart.kind == ChartKind.line:
+        ax.plot(
+            chart.labels,
+            chart.values,
+            marker="o",
+            color=chart.colors[0] if chart.colors else None,
+        )
+        figure.autofmt_xdate()
+    else:
+        ax.hist(chart.values, weights=chart.weights, label="_nolegend_")
+
+    for line in chart.lines:
+        ax.axvline(
+            x=line.x, color=line.color, linestyle=line.linestyle, label=line.label
+        )
+
+    if chart.lines:
+        ax.legend()
+
+    # Written under another name first, so that a chart is never read half written
+    figure.savefig(f"{filename}.tmp", format="svg")
+    replace(f"{filename}.tmp", filename)
+
+
+def render_charts(
+    charts: Iterable[Chart],
+    output_path: str,
+    cache_folder: str | None = None,
+    max_workers: int | None = None,
+) -> Tuple[int, int]:
+    """
+    Renders charts to `output_path`, in parallel processes. Charts already
+    rendered from the same data are copied from `cache_folder`. Returns the
+    number of charts rendered and copied from the cache
+    """
+    to_render = []
+    copied = 0
+
+    if cache_folder:
+        makedirs(cache_folder, exist_ok=True)
+
+    for chart in charts:
+        filename = join(output_path, f"{chart.name}.svg")
+        cached = (
+            join(cache_folder, f"{get_chart_key(chart)}.svg") if cache_folder else None
+        )
+
+        if cached and exists(cached):
+            copyfile(cached, filename)
+            copied += 1
+        else:
+            to_render.append((chart, filename, cached))
+
+    max_workers = min(len(to_render), max_workers if max_workers else cpu_count())
+
+    if max_workers > 1:
+        with ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=get_context("spawn")
+        ) as executor:
+            for future in [
+                executor.submit(render_chart, chart, filename)
+                for chart, filename, _ in to_render
+            ]:
+                future.result()
+    else:
+        for chart, filename, _ in to_render:
+            render_chart(chart=chart, filename=filename)
+
+    for _, filename, cached in to_render:
+        if cached:
+            copyfile(filename, f"{cached}.tmp")
+            replace(f"{cached}.tmp", cached)
+
+    return len(to_render), copied
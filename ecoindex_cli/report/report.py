@@ -1,162 +1,274 @@
 from datetime import datetime
+from html import escape
 from pathlib import Path
+from typing import Any, Iterable, List, Tuple
 
 from jinja2 import Environment, FileSystemLoader
-from matplotlib import pyplot
-from pandas import read_csv, read_json
-from pandas.core.frame import DataFrame
 
-from ecoindex_cli.enums import GlobalMedian, Language, Target
-from ecoindex_cli.files import get_translations
+from ecoindex_cli.enums import ChartKind, GlobalMedian, Language, Target
+from ecoindex_cli.files import (
+    get_export_format_from_filename,
+    get_results_file,
+    get_translations,
+)
+from ecoindex_cli.report.aggregates import (
+    GRADES,
+    PROPERTIES,
+    TOP_COLUMNS,
+    ResultsAggregate,
+    get_field,
+    get_number,
+)
+from ecoindex_cli.report.charts import Chart, Line, render_charts
+from ecoindex_cli.report.shards import ShardWriter
+
+TABLE_CLASSES = "table is-hoverable is-fullwidth is-bordered"
+ALL_DATA_COLUMNS = (
+    "url",
+    "page_type",
+    "score",
+    "size",
+    "nodes",
+    "requests",
+    "water",
+    "ges",
+)
+TEXT_COLUMNS = ("url", "page_type")
+GRADE_COLORS = (
+    "#349A47",
+    "#51B84B",
+    "#CADB2A",
+    "#F6EB15",
+    "#FECD06",
+    "#F99839",
+    "#ED2124",
+)
+
+
+def get_table_head(columns: Iterable[str]) -> str:
+    head = "".join(f"<th>{escape(str(column))}</th>" for column in columns)
+
+    return (
+        f'<table border="1" class="dataframe {TABLE_CLASSES}">'
+        f'<thead><tr style="text-align: right;"><th></th>{head}</tr></thead><tbody>'
+    )
+
+
+def get_table_row(index: Any, values: Iterable[Any]) -> str:
+    cells = "".join(
+        f"<td>{escape(str(value)) if value is not None else ''}</td>"
+        for value in values
+    )
+
+    return f"<tr><th>{escape(str(index))}</th>{cells}</tr>\n"
+
+
+def get_table(columns: Iterable[str], rows: Iterable[Tuple[Any, Iterable]]) -> str:
+    columns = tuple(columns)
+
+    return (
+        get_table_head(columns)
+        + "".join(get_table_row(index, values) for index, values in rows)
+        + "</tbody></table>"
+    )
 
 
 class Report:
+    """
+    Html report of an analysis. Results are read from `results_file`, or
+    given as an iterable with `results` (and then `results_file` is only
+    linked from the report), and more can be added with `add`.
+
+    Results are aggregated as they come and rows of the full results table
+    are written by shards next to the report, that are only loaded by the
+    browser when the table is displayed. The time and memory needed, as
+    well as the size of `index.html`, do not depend on the number of
+    results. Charts are rendered in parallel
+    processes, and copied from `cache_folder` when they were already
+    rendered from the same data
+    """
+
     def __init__(
         self,
         date: datetime,
         domain: str,
         language: Language,
         output_path: str,
-        results_file: Path,
+        results_file: str,
+        results: Iterable[Any] | None = None,
+        cache_folder: str | None = None,
+        max_workers: int | None = None,
     ) -> None:
         self.results_file = results_file
-
-        if "csv" in results_file:
-            self.dataframe = read_csv(results_file)
-
-        if "json" in results_file:
-            self.dataframe = read_json(results_file)
-
+        self.cache_folder = cache_folder
+        self.max_workers = max_workers
         self.date = date
         self.domain = domain
         self.language = language
         self.output_path = output_path
         self.translations = get_translations(language=language)
 
-    def create_report(self) -> None:
-        self.create_histogram(
-            property="requests",
-            target=Target.requests.value,
-            global_median=GlobalMedian.requests.value,
-        )
-        self.create_histogram(
-            property="size",
-            target=Target.size.value,
-            global_median=GlobalMedian.size.value,
+        self.aggregate = ResultsAggregate()
+        self.shards = ShardWriter(output_path=output_path)
+
+        if results is None:
+            results = get_results_file(
+                filename=results_file,
+                export_format=get_export_format_from_filename(results_file),
+            ).read()
+
+        for result in results:
+            self.add(result)
+
+    def add(self, result: Any) -> None:
+        index = self.aggregate.add(result)
+        self.shards.append(
+            [index]
+            + [
+                (
+                    get_field(result, column)
+                    if column in TEXT_COLUMNS
+                    else get_number(get_field(result, column))
+                )
+                for column in ALL_DATA_COLUMNS
+            ]
         )
-        self.create_histogram(
-            property="nodes",
-            target=Target.nodes.value,
-            global_median=GlobalMedian.nodes.value,
+
+    def create_report(self) -> None:
+        render_charts(
+            charts=[
+                self.get_histogram(
+                    property="requests",
+                    target=Target.requests.value,
+                    global_median=GlobalMedian.requests.value,
+                ),
+                self.get_histogram(
+                    property="size",
+                    target=Target.size.value,
+                    global_median=GlobalMedian.size.value,
+                ),
+                self.get_histogram(
+                    property="nodes",
+                    target=Target.nodes.value,
+                    global_median=GlobalMedian.nodes.value,
+                ),
+                self.get_grade_chart(),
+            ],
+            output_path=self.output_path,
+            cache_folder=self.cache_folder,
+            max_workers=self.max_workers,
         )
-        self.create_grade_chart()
+        self.shards.flush()
         self.create_report_file()
 
-    def prepare_graph(self, property: str) -> None:
-        pyplot.clf()
-        pyplot.title(label=self.translations["histograms"][property]["title"])
-        pyplot.xlabel(xlabel=self.translations["histograms"][property]["xlabel"])
-        pyplot.ylabel(ylabel=self.translations["histograms"][property]["ylabel"])
+    def get_chart(self, property: str, **kwargs) -> Chart:
+        translations = self.translations["histograms"][property]
+
+        return Chart(
+            name=property,
+            title=translations["title"],
+            xlabel=translations["xlabel"],
+            ylabel=translations["ylabel"],
+            **kwargs,
+        )
 
-    def create_histogram(
+    def get_histogram(
         self,
         property: str,
         target: int,
         global_median: int,
-    ) -> None:
-        median = round(self.dataframe[property].median())
-        self.prepare_graph(property=property)
-        ax = self.dataframe[property].plot.hist(label="_nolegend_")
-        ax.axvline(
-            median, color="blue", label=f"{self.translations['my_median']}: {median}"
-        )
-        ax.axvline(
-            x=target,
-            color="red",
-            linestyle=":",
-            label=f"{self.translations['target_median']}: {target}",
-        )
-        ax.axvline(
-            x=global_median,
-            color="black",
-            linestyle=":",
-            label=f"{self.translations['global_median']}: {global_median}",
-        )
-        pyplot.legend()
-        fig = ax.get_figure()
-        fig.savefig(f"{self.output_path}/{property}.svg")
-
-    def create_grade_chart(self) -> None:
-        self.prepare_graph(property="grade")
+    ) -> Chart:
+        sketch = self.aggregate.sketches[property]
+        median = round(sketch.get_median())
+        values, weights = sketch.get_weighted_values()
 
-        dataframe_result = DataFrame(
-            data=[0, 0, 0, 0, 0, 0, 0], index=["A", "B", "C", "D", "E", "F", "G"]
+        return self.get_chart(
+            property=property,
+            values=values,
+            weights=weights,
+            lines=(
+                Line(
+                    x=median,
+                    color="blue",
+                    label=f"{self.translations['my_median']}: {median}",
+                ),
+                Line(
+                    x=target,
+                    color="red",
+                    linestyle=":",
+                    label=f"{self.translations['target_median']}: {target}",
+                ),
+                Line(
+                    x=global_median,
+                    color="black",
+                    linestyle=":",
+                    label=f"{self.translations['global_median']}: {global_median}",
+                ),
+            ),
         )
 
-        dataframe_grouped_by_grade = self.dataframe.groupby(["grade"])["grade"].count()
-
-        for grade in dataframe_result.index:
-            if grade in dataframe_grouped_by_grade.index:
-                dataframe_result[0][grade] += dataframe_grouped_by_grade[grade]
-
-        ax = dataframe_result[0].plot.bar(
-            color=[
-                "#349A47",
-                "#51B84B",
-                "#CADB2A",
-                "#F6EB15",
-                "#FECD06",
-                "#F99839",
-                "#ED2124",
-            ]
+    def get_grade_chart(self) -> Chart:
+        return self.get_chart(
+            property="grade",
+            values=[],
+            weights=[self.aggregate.grades[grade] for grade in GRADES],
+            labels=GRADES,
+            colors=GRADE_COLORS,
+            kind=ChartKind.bar,
         )
-        fig = ax.get_figure()
-        fig.savefig(f"{self.output_path}/grade.svg")
 
     def get_property_comment(self, global_median: int, property: str) -> str:
-        if self.dataframe[property].median() <= global_median:
+        median = self.aggregate.sketches[property].get_median()
+
+        if median <= global_median:
             return (
-                f"<span style='color:green'>{self.translations['good_result']} <b>{round(self.dataframe[property].median(), 2)}</b> "
+                f"<span style='color:green'>{self.translations['good_result']} <b>{round(median, 2)}</b> "
                 f"{self.translations['better_than']} <b>{global_median}</b></span>"
             )
 
         return (
-            f"<span style='color:red'>{self.translations['bad_result']} <b>{round(self.dataframe[property].median(), 2)}</b> "
+            f"<span style='color:red'>{self.translations['bad_result']} <b>{round(median, 2)}</b> "
             f"{self.translations['worse_than']} <b>{global_median}</b></span>"
         )
 
+    def get_summary_table(self) -> str:
+        summary = self.aggregate.get_summary()
+
+        return get_table(
+            columns=PROPERTIES,
+            rows=(
+                (
+                    statistic,
+                    (
+                        round(summary[property][statistic], 2)
+                        if summary[property][statistic] is not None
+                        else None
+                        for property in PROPERTIES
+                    ),
+                )
+                for statistic in ("mean", "50%", "min", "max")
+            ),
+        )
+
+    def get_top_table(self, rows: List[Tuple[int, dict]]) -> str:
+        return get_table(
+            columns=TOP_COLUMNS,
+            rows=(
+                (index, (row[column] for column in TOP_COLUMNS)) for index, row in rows
+            ),
+        )
+
     def create_report_file(self) -> None:
         template_vars = {
             "site": self.domain,
             "date": self.date,
             "result_file": self.results_file,
-            "nb_page": len(self.dataframe.index),
-            "all_data": self.dataframe.to_html(
-                columns=[
-                    "url",
-                    "page_type",
-                    "score",
-                    "size",
-                    "nodes",
-                    "requests",
-                    "water",
-                    "ges",
-                ],
-                classes="table is-hoverable is-fullwidth is-bordered",
-            ),
-            "summary": self.dataframe[
-                ["score", "size", "nodes", "requests", "ges", "water"]
-            ]
-            .describe(percentiles=[0.5])
-            .loc[["mean", "50%", "min", "max"]]
-            .round(2)
-            .to_html(classes="table is-hoverable is-fullwidth is-bordered"),
-            "best": self.dataframe.nlargest(n=10, columns="score")[
-                ["url", "score", "size", "nodes", "requests"]
-            ].to_html(classes="table is-hoverable is-fullwidth is-bordered"),
-            "worst": self.dataframe.nsmallest(n=10, columns="score")[
-                ["url", "score", "size", "nodes", "requests"]
-            ].to_html(classes="table is-hoverable is-fullwidth is-bordered"),
+            "nb_page": self.aggregate.count,
+            "all_data_columns": ALL_DATA_COLUMNS,
+            "all_data_shards": self.shards.shards,
+            "summary": self.get_summary_table(),
+            "best": self.get_top_table(self.aggregate.best.get_rows()),
+            "worst": self.get_top_table(self.aggregate.worst.get_rows()),
             "size_comment": self.get_property_comment(
                 global_median=GlobalMedian.size.value,
                 property="size",
@@ -0,0 +1,51 @@
+from base64 import b64encode
+from glob import glob
+from gzip import compress
+from json import dumps
+from os import makedirs, remove
+from os.path import join
+from typing import Any, List
+
+SHARDS_FOLDER = "data"
+SHARD_PREFIX = "results-"
+
+
+class ShardWriter:
+    """
+    Writes the rows of the full results table next to the report, by
+    shards of `rows_per_shard` rows, that the report loads when the table
+    is displayed. Each shard is a script calling `ecoindexShard` with its
+    rows as gzipped and base64 encoded json, so that it can be loaded from
+    a report opened as a local file, where `fetch` is not allowed
+    """
+
+    def __init__(self, output_path: str, rows_per_shard: int = 5000) -> None:
+        self.folder = join(output_path, SHARDS_FOLDER)
+        self.rows_per_shard = rows_per_shard
+        self.rows: List[List[Any]] = []
+        self.shards: List[str] = []
+
+        makedirs(self.folder, exist_ok=True)
+
+        # Shards of a previous report of the same folder
+        for filename in glob(join(self.folder, f"{SHARD_PREFIX}*.js")):
+            remove(filename)
+
+    def append(self, row: List[Any]) -> None:
+        self.rows.append(row)
+
+        if len(self.rows) >= self.rows_per_shard:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.rows:
+            return
+
+        name = f"{SHARD_PREFIX}{len(self.shards):05d}.js"
+        data = b64encode(compress(dumps(self.rows, default=str).encode())).decode()
+
+        with open(join(self.folder, name), "w") as fp:
+            fp.write(f'ecoindexShard({len(self.shards)}, "{data}");\n')
+
+        self.shards.append(f"{SHARDS_FOLDER}/{name}")
+        self.rows = []
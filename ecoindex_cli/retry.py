@@ -0,0 +1,149 @@
+from datetime import datetime
+from random import uniform
+from typing import Iterable, NamedTuple
+
+from selenium.common.exceptions import (
+    InvalidSessionIdException,
+    NoSuchWindowException,
+    TimeoutException,
+    WebDriverException,
+)
+
+from ecoindex_cli.enums import FailureKind
+
+DNS_ERRORS = ("ERR_NAME_NOT_RESOLVED", "ERR_NAME_RESOLUTION_FAILED", "ERR_DNS_")
+HTTP_ERRORS = (
+    "ERR_HTTP_RESPONSE_CODE_FAILURE",
+    "ERR_INVALID_RESPONSE",
+    "ERR_EMPTY_RESPONSE",
+    "ERR_TOO_MANY_REDIRECTS",
+)
+DRIVER_CRASH_ERRORS = (
+    "chrome not reachable",
+    "session deleted",
+    "disconnected",
+    "tab crashed",
+    "target window already closed",
+)
+DEFAULT_RETRY_ON = (FailureKind.timeout, FailureKind.network, FailureKind.driver_crash)
+
+
+class HttpError(Exception):
+    """The page was answered with an http error status"""
+
+    def __init__(self, status: int) -> None:
+        self.status = status
+        self.msg = f"HTTP error {status}"
+        super().__init__(self.msg)
+
+
+class Failure(NamedTuple):
+    url: str
+    width: int
+    height: int
+    kind: FailureKind
+    message: str
+    attempts: int
+    date: datetime
+
+
+def classify_failure(exception: Exception) -> FailureKind:
+    """
+    Returns the kind of failure of a page analysis from its exception.
+    Network errors of chrome are reported in the message of a
+    `WebDriverException` (IE `unknown error: net::ERR_NAME_NOT_RESOLVED`)
+    """
+    if isinstance(exception, HttpError):
+        return FailureKind.http
+
+    if isinstance(exception, TimeoutException):
+        return FailureKind.timeout
+
+    if isinstance(exception, (InvalidSessionIdException, NoSuchWindowException)):
+        return FailureKind.driver_crash
+
+    # Connection errors to chromedriver itself
+    if type(exception).__module__.startswith("urllib3"):
+        return FailureKind.driver_crash
+
+    if isinstance(exception, WebDriverException):
+        message = exception.msg or ""
+
+        if any(error in message for error in DNS_ERRORS):
+            return FailureKind.dns
+
+        if any(error in message for error in HTTP_ERRORS):
+            return FailureKind.http
+
+        if "net::ERR_" in message:
+            return FailureKind.network
+
+        if "timeout" in message.lower():
+            return FailureKind.timeout
+
+        if any(error in message for error in DRIVER_CRASH_ERRORS):
+            return FailureKind.driver_crash
+
+    return FailureKind.other
+
+
+def get_failure(
+    url: str, width: int, height: int, exception: Exception, attempts: int = 1
+) -> Failure:
+    return Failure(
+        url=url,
+        width=width,
+        height=height,
+        kind=classify_failure(exception),
+        message=getattr(exception, "msg", None) or str(exception),
+        attempts=attempts,
+        date=datetime.now(),
+    )
+
+
+class RetryPolicy:
+    """
+    Decides whether a failed page analysis is retried: only failures of
+    the `retry_on` kinds are retried, at most `max_retries` times per page
+    and `budget` times for the whole run. The delay before a retry grows
+    exponentially from `base_delay` up to `max_delay`, with a random jitter
+    so that retries of pages that failed together are spread out
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 2,
+        base_delay: float = 1,
+        max_delay: float = 30,
+        retry_on: Iterable[FailureKind] = DEFAULT_RETRY_ON,
+        budget: int | None = None,
+    ) -> None:
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on = set(retry_on)
+        self.budget = budget
+
+        self.retries = 0
+        self.refused = 0
+
+    def get_delay(self, attempt: int) -> float:
+        delay = min(self.base_delay * 2**attempt, self.max_delay)
+
+        return delay / 2 + uniform(0, delay / 2)
+
+    def should_retry(self, kind: FailureKind, attempt: int) -> bool:
+        """
+        Returns whether a page that failed on its `attempt`-th try (from 0)
+        has to be tried again, and counts the retry in the budget
+        """
+        if kind not in self.retry_on or attempt >= self.max_retries:
+            return False
+
+        if self.budget is not None and self.retries >= self.budget:
+            self.refused += 1
+            return False
+
+        self.retries += 1
+
+        return True
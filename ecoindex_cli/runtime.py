@@ -0,0 +1,205 @@
+from typing import AsyncIterable, Callable, Dict, Iterable, List, Tuple
+
+from ecoindex.models import Result, WindowSize
+from loguru import logger
+
+from ecoindex_cli.cache import ResultCache
+from ecoindex_cli.cli.helper import (
+    init_analysis_process,
+    run_viewports_analysis,
+    run_viewports_analysis_in_process,
+)
+from ecoindex_cli.concurrency import AdaptiveConcurrency
+from ecoindex_cli.driver_pool import DriverPool
+from ecoindex_cli.enums import Executor, SettleMode
+from ecoindex_cli.jobs import Job
+from ecoindex_cli.politeness import HostPoliteness, get_host
+from ecoindex_cli.recorder import ResultRecorder
+from ecoindex_cli.retry import Failure, RetryPolicy
+from ecoindex_cli.scheduler import AnalysisScheduler
+from ecoindex_cli.timing import PhaseTimer
+
+
+class AnalysisRuntime:
+    """
+    Browsers, scheduler and cache of an analysis run. With the thread
+    executor, the analyses borrow the drivers of a pool of the main process,
+    with the process executor each process of the scheduler has its own pool
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        executor: Executor = Executor.thread,
+        chrome_version: int | None = None,
+        driver_executable_path: str = "",
+        chrome_executable_path: str = "",
+        max_pages_per_driver: int = 50,
+        page_load_timeout: int = 20,
+        wait_after_scroll: int = 3,
+        wait_before_scroll: int = 3,
+        settle: SettleMode = SettleMode.fixed,
+        quiet_window: float = 0.5,
+        adaptive_concurrency: bool = False,
+        max_per_host: int | None = None,
+        max_rps_per_host: float | None = None,
+        retry_policy: RetryPolicy | None = None,
+        logger_file: str | None = None,
+    ) -> None:
+        self.max_workers = max_workers
+        self.executor = executor
+        self.page_load_timeout = page_load_timeout
+        self.wait_after_scroll = wait_after_scroll
+        self.wait_before_scroll = wait_before_scroll
+        self.settle = settle
+        self.quiet_window = quiet_window
+        self.retry_policy = retry_policy
+
+        driver_settings = {
+            "chrome_version": chrome_version,
+            "driver_executable_path": driver_executable_path,
+            "chrome_executable_path": chrome_executable_path,
+            "max_pages_per_driver": max_pages_per_driver,
+            "page_load_timeout": page_load_timeout,
+        }
+        self.driver_pool = DriverPool(size=max_workers, **driver_settings)
+        # Driver pool counters of each analysis process, by pid
+        self.driver_pool_stats: Dict[int, Tuple[int, int, int]] = {}
+        self.concurrency = (
+            AdaptiveConcurrency(max_limit=max_workers) if adaptive_concurrency else None
+        )
+        self.politeness = HostPoliteness(
+            max_per_host=max_per_host, max_rps_per_host=max_rps_per_host
+        )
+        self.scheduler = AnalysisScheduler(
+            max_workers=max_workers,
+            limiter=self.concurrency,
+            politeness=self.politeness,
+            executor=executor,
+            initializer=init_analysis_process,
+            initargs=(driver_settings, logger_file),
+        )
+        self.cache: ResultCache | None = None
+
+    def open_cache(
+        self,
+        window_size: WindowSize,
+        multi_viewport: bool = False,
+        ttl: int = 24 * 3600,
+        max_size: int = 100 * 1024 * 1024,
+        folder: str = "/tmp/ecoindex-cli/cache",
+        read: bool = True,
+    ) -> ResultCache | None:
+        """
+        Opens the cache of the results measured with the same browser and
+        scraper settings. The browser is launched once at `window_size` to
+        get its version, and the results are not cached if it fails
+        """
+        try:
+            browser_version = self.driver_pool.get_browser_version(
+                window_size=window_size
+            )
+        except Exception as e:
+            logger.warning(f"Results are not cached, browser failed -- {e}")
+            browser_version = None
+
+        # The driver of the main process is not used by analysis processes
+        if self.executor == Executor.process:
+            self.driver_pool.close()
+
+        if browser_version:
+            self.cache = ResultCache(
+                settings={
+                    "browser_version": browser_version,
+                    "page_load_timeout": self.page_load_timeout,
+                    "wait_after_scroll": self.wait_after_scroll,
+                    "wait_before_scroll": self.wait_before_scroll,
+                    "settle": self.settle.value,
+                    "quiet_window": self.quiet_window,
+                    "multi_viewport": multi_viewport,
+                },
+                ttl=ttl,
+                max_size=max_size,
+                folder=folder,
+                read=read,
+            )
+
+        return self.cache
+
+    def get_idle_drivers(self) -> Callable[[], int] | None:
+        """Returns the gauge of the idle drivers, only known by a thread run"""
+        return self.driver_pool.idle.qsize if self.executor == Executor.thread else None
+
+    def get_driver_pool_stats(self) -> Tuple[int, int, int]:
+        """Returns the hits, misses and recycles of the drivers of the run"""
+        if self.driver_pool_stats:
+            return tuple(map(sum, zip(*self.driver_pool_stats.values())))
+
+        return (
+            self.driver_pool.hits,
+            self.driver_pool.misses,
+            self.driver_pool.recycles,
+        )
+
+    async def analyze(self, job: Job) -> Tuple[List[Result | Failure], Dict]:
+        """Returns the results of a job with their phase timings"""
+        url, sizes = job
+        timer = PhaseTimer()
+
+        if self.executor == Executor.process:
+            results = await run_viewports_analysis_in_process(
+                url=url,
+                window_sizes=sizes,
+                scheduler=self.scheduler,
+                wait_after_scroll=self.wait_after_scroll,
+                wait_before_scroll=self.wait_before_scroll,
+                cache=self.cache,
+                driver_pool_stats=self.driver_pool_stats,
+                concurrency=self.concurrency,
+                timer=timer,
+                settle=self.settle,
+                quiet_window=self.quiet_window,
+                retry_policy=self.retry_policy,
+            )
+        else:
+            results = await run_viewports_analysis(
+                url=url,
+                window_sizes=sizes,
+                driver_pool=self.driver_pool,
+                scheduler=self.scheduler,
+                wait_after_scroll=self.wait_after_scroll,
+                wait_before_scroll=self.wait_before_scroll,
+                logger=logger,
+                cache=self.cache,
+                concurrency=self.concurrency,
+                timer=timer,
+                settle=self.settle,
+                quiet_window=self.quiet_window,
+                retry_policy=self.retry_policy,
+            )
+
+        return (results, timer.timings)
+
+    async def run(
+        self, jobs: Iterable[Job] | AsyncIterable[Job], recorder: ResultRecorder
+    ) -> None:
+        """Analyzes the jobs, whose outcomes are recorded by `recorder`"""
+
+        async def analyze(job: Job) -> Tuple[List[Result | Failure], Dict]:
+            recorder.start(job)
+
+            return await self.analyze(job)
+
+        await self.scheduler.run(
+            jobs=jobs,
+            analyze=analyze,
+            on_done=recorder.record,
+            get_host=lambda job: get_host(job[0]),
+        )
+
+    def close(self) -> None:
+        self.scheduler.close()
+        self.driver_pool.close()
+
+        if self.cache:
+            self.cache.close()
@@ -0,0 +1,311 @@
+from asyncio import (
+    Event,
+    Future,
+    Semaphore,
+    Task,
+    TimeoutError,
+    create_task,
+    gather,
+    get_event_loop,
+    get_running_loop,
+    new_event_loop,
+    set_event_loop,
+    sleep,
+    wait_for,
+)
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextvars import ContextVar
+from functools import partial
+from heapq import heappop, heappush
+from itertools import count
+from multiprocessing import cpu_count, get_context
+from time import monotonic
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Iterable,
+    List,
+    NamedTuple,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+from ecoindex_cli.concurrency import AdaptiveConcurrency
+from ecoindex_cli.enums import Executor
+from ecoindex_cli.politeness import HostPoliteness
+
+Job = TypeVar("Job")
+T = TypeVar("T")
+
+END_OF_JOBS = object()
+
+
+class ScheduledJob:
+    """State of a job run by `AnalysisScheduler.run`, in the context of its task"""
+
+    def __init__(self, host: str | None) -> None:
+        self.host = host
+        self.start = monotonic()
+        self.paused = 0.0
+
+
+class Resume(NamedTuple):
+    """Queued in place of a job waiting in `AnalysisScheduler.backoff`"""
+
+    resumed: Future
+
+
+scheduled_job: ContextVar[ScheduledJob | None] = ContextVar(
+    "scheduled_job", default=None
+)
+
+
+def init_worker_event_loop() -> None:
+    set_event_loop(new_event_loop())
+
+
+def run_coroutine(coroutine: Coroutine[Any, Any, T]) -> T:
+    """
+    Runs a coroutine to completion on the event loop of the current executor
+    thread. The scraper exposes its blocking selenium calls as coroutines, so
+    they must be run outside of the scheduler loop
+    """
+    return get_event_loop().run_until_complete(coroutine)
+
+
+class AnalysisScheduler:
+    """
+    Runs all the page analyses on a single event loop: the number of
+    analyses in flight is bounded by a semaphore, and blocking driver
+    calls are pushed to a bounded thread executor.
+
+    With a process executor, each blocking call is run in a pool of
+    processes, set up with the given `initializer`. An adaptive `limiter`
+    can replace the semaphore to tune the number of analyses in flight, and
+    a `politeness` policy bounds the load put on each host. An analysis
+    waiting before a retry does not hold its slots, see `backoff`
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_blocking_workers: int | None = None,
+        executor: Executor = Executor.thread,
+        initializer: Callable[..., None] | None = None,
+        initargs: Tuple = (),
+        limiter: AdaptiveConcurrency | None = None,
+        politeness: HostPoliteness | None = None,
+    ) -> None:
+        self.max_workers = max_workers
+        self.limiter = limiter
+        self.politeness = politeness
+
+        # Jobs waiting in `backoff`, by time they can be resumed
+        self.deferred: List[Tuple[float, int, str | None, Future]] = []
+        self.sequence = count()
+        self.slots: AdaptiveConcurrency | Semaphore | None = None
+        self.wakeup: Event | None = None
+
+        if executor == Executor.process:
+            self.max_blocking_workers = (
+                max_blocking_workers if max_blocking_workers else max_workers
+            )
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.max_blocking_workers,
+                mp_context=get_context("spawn"),
+                initializer=initializer,
+                initargs=initargs,
+            )
+        else:
+            self.max_blocking_workers = (
+                max_blocking_workers
+                if max_blocking_workers
+                else min(max_workers, cpu_count() + 4)
+            )
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.max_blocking_workers,
+                initializer=init_worker_event_loop,
+            )
+
+    async def run_blocking(self, func: Callable[..., T], *args, **kwargs) -> T:
+        return await get_running_loop().run_in_executor(
+            self.executor, partial(func, *args, **kwargs)
+        )
+
+    async def backoff(self, delay: float) -> None:
+        """
+        Waits `delay` seconds before a retry of the current job. Within a job
+        run by `run`, the slot of the job and the one of its host are
+        released while waiting: the job is queued again, and resumed before
+        new jobs as soon as its delay is over and a slot is available
+        """
+        job = scheduled_job.get()
+
+        if job is None or self.wakeup is None:
+            await sleep(delay)
+            return
+
+        start = monotonic()
+        resumed = get_running_loop().create_future()
+        heappush(self.deferred, (start + delay, next(self.sequence), job.host, resumed))
+
+        if job.host is not None:
+            self.politeness.pause(job.host)
+
+        self.slots.release()
+        self.wakeup.set()
+        await resumed
+        job.paused += monotonic() - start
+
+    async def run(
+        self,
+        jobs: Iterable[Job] | AsyncIterable[Job],
+        analyze: Callable[[Job], Awaitable[T]],
+        on_done: Callable[[Job, T | None, Exception | None], None],
+        get_host: Callable[[Job], str] | None = None,
+    ) -> None:
+        """
+        Schedules the analysis of each job as soon as a slot is available.
+        Jobs are consumed lazily, and `on_done` is called with the outcome
+        (or the exception) of each analysis as soon as it completes.
+
+        With a politeness policy, `get_host` returns the host of a job, and
+        jobs are started as soon as a slot is available and their host is
+        within its limits
+        """
+        semaphore = self.limiter if self.limiter else Semaphore(self.max_workers)
+        politeness = self.politeness if get_host else None
+        tasks: Set[Task] = set()
+        running = 0
+        self.slots = semaphore
+        self.wakeup = Event()
+        self.deferred = []
+
+        async def run_job(job: Job, host: str | None = None) -> None:
+            nonlocal running
+            scheduled = ScheduledJob(host=host)
+            scheduled_job.set(scheduled)
+            failed = False
+
+            try:
+                outcome = await analyze(job)
+            except Exception as e:
+                failed = True
+                on_done(job, None, e)
+            else:
+                on_done(job, outcome, None)
+            finally:
+                if politeness:
+                    politeness.done(
+                        host=host,
+                        duration=monotonic() - scheduled.start - scheduled.paused,
+                        failed=failed,
+                    )
+
+                running -= 1
+                self.wakeup.set()
+                semaphore.release()
+
+        iterator = aiter(jobs) if hasattr(jobs, "__aiter__") else iter(jobs)
+        exhausted = False
+
+        async def get_next_job() -> Job:
+            # StopIteration can not be raised through a coroutine
+            if isinstance(iterator, AsyncIterator):
+                return await anext(iterator, END_OF_JOBS)
+
+            return next(iterator, END_OF_JOBS)
+
+        async def get_ready_job() -> Tuple[Job | Resume, str | None] | None:
+            """
+            Returns the next job to start, or to resume after its backoff,
+            with its host. Returns None once all the jobs are done
+            """
+            nonlocal exhausted
+
+            while True:
+                now = monotonic()
+
+                while self.deferred and self.deferred[0][0] <= now:
+                    _, _, host, resumed = heappop(self.deferred)
+
+                    if not politeness:
+                        return (Resume(resumed), None)
+
+                    politeness.push(host=host, job=Resume(resumed))
+
+                if politeness:
+                    ready = politeness.pop()
+
+                    if ready:
+                        host, job = ready
+                        return (job, host)
+
+                if not exhausted and not (politeness and politeness.is_full()):
+                    # Jobs are pulled until one of them can be started
+                    job = await get_next_job()
+
+                    if job is END_OF_JOBS:
+                        exhausted = True
+                    elif politeness:
+                        politeness.push(host=get_host(job), job=job)
+                    else:
+                        return (job, None)
+
+                    continue
+
+                # Running jobs may still be retried after a backoff
+                if exhausted and not self.deferred and not running:
+                    if not politeness or not politeness.queued:
+                        return None
+
+                wait_times = [
+                    wait_time
+                    for wait_time in (
+                        politeness.get_wait_time() if politeness else None,
+                        self.deferred[0][0] - now if self.deferred else None,
+                    )
+                    if wait_time is not None
+                ]
+                self.wakeup.clear()
+
+                try:
+                    await wait_for(
+                        self.wakeup.wait(),
+                        timeout=min(wait_times) if wait_times else None,
+                    )
+                except TimeoutError:
+                    pass
+
+        while True:
+            # A job is only pulled once a slot is available, so that job
+            # sources can be lazy (files, crawls or work queues)
+            await semaphore.acquire()
+            next_job = await get_ready_job()
+
+            if next_job is None:
+                semaphore.release()
+                break
+
+            job, host = next_job
+
+            if isinstance(job, Resume):
+                # The slot is handed over to the job waiting for it
+                job.resumed.set_result(None)
+                continue
+
+            running += 1
+            task = create_task(run_job(job, host))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        await gather(*tasks)
+        self.wakeup = None
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,89 @@
+from asyncio import sleep
+from time import monotonic
+
+from selenium.common.exceptions import JavascriptException
+from selenium.webdriver import Chrome
+
+from ecoindex_cli.enums import SettleMode
+from ecoindex_cli.scheduler import AnalysisScheduler
+
+# Installs a mutation observer and a resource observer on the first call, and
+# returns the activity of the page: time of the last DOM mutation and number
+# of loaded resources. Resources are counted by the observer, as the browser
+# stops recording them in the performance timeline once its buffer is full
+# (250 entries by default)
+SETTLE_SCRIPT = """
+if (!window.__ecoindexSettle) {
+    window.__ecoindexSettle = {
+        lastMutation: performance.now(),
+        resources: performance.getEntriesByType("resource").length
+    };
+    new MutationObserver(() => {
+        window.__ecoindexSettle.lastMutation = performance.now();
+    }).observe(document, {
+        attributes: true, characterData: true, childList: true, subtree: true
+    });
+    new PerformanceObserver((entries) => {
+        window.__ecoindexSettle.resources += entries.getEntries().length;
+    }).observe({ type: "resource" });
+}
+return {
+    readyState: document.readyState,
+    idleTime: (performance.now() - window.__ecoindexSettle.lastMutation) / 1000,
+    resources: window.__ecoindexSettle.resources
+};
+"""
+
+
+async def wait_for_settle(
+    driver: Chrome,
+    scheduler: AnalysisScheduler,
+    max_wait: float,
+    mode: SettleMode = SettleMode.fixed,
+    quiet_window: float = 0.5,
+    poll_interval: float = 0.1,
+) -> float:
+    """
+    Waits for the page to settle, and returns the time actually waited.
+    In `fixed` mode, waits `max_wait` seconds. In `network-idle` mode, the
+    wait ends as soon as the page is loaded, no new resource has been
+    loaded and the DOM has not changed for `quiet_window` seconds, but
+    never lasts more than `max_wait` seconds
+    """
+    start = monotonic()
+    deadline = start + max_wait
+
+    if mode == SettleMode.fixed:
+        await sleep(max_wait)
+
+        return monotonic() - start
+
+    resources = -1
+    last_resource_change = start
+
+    while monotonic() < deadline:
+        try:
+            activity = await scheduler.run_blocking(
+                driver.execute_script, SETTLE_SCRIPT
+            )
+        except JavascriptException:
+            # The activity of the page can not be observed
+            await sleep(max(deadline - monotonic(), 0))
+            break
+
+        now = monotonic()
+
+        if activity["resources"] != resources:
+            resources = activity["resources"]
+            last_resource_change = now
+
+        if (
+            activity["readyState"] == "complete"
+            and now - last_resource_change >= quiet_window
+            and activity["idleTime"] >= quiet_window
+        ):
+            break
+
+        await sleep(min(poll_interval, max(deadline - now, 0)))
+
+    return monotonic() - start
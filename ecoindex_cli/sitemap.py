@@ -0,0 +1,127 @@
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from gzip import GzipFile
+from json import dump, load
+from os.path import dirname, exists
+from typing import IO, Deque, Iterator
+from urllib.request import Request, urlopen
+from xml.etree.ElementTree import iterparse
+
+from ecoindex_cli.files import create_folder
+
+GZIP_MAGIC_NUMBER = b"\x1f\x8b"
+
+
+def get_tag(element) -> str:
+    """Returns the tag of an element without its namespace"""
+    return element.tag.rpartition("}")[2]
+
+
+def parse_lastmod(lastmod: str | None) -> datetime | None:
+    """
+    Parses a W3C datetime as used by sitemaps. Dates without a time zone
+    are considered as UTC
+    """
+    if not lastmod:
+        return None
+
+    try:
+        parsed = datetime.fromisoformat(lastmod.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+@contextmanager
+def open_sitemap(url: str, timeout: int = 30) -> Iterator[IO[bytes]]:
+    """
+    Opens a sitemap, transparently decompressing gzipped sitemaps
+    """
+    with urlopen(
+        Request(url, headers={"User-Agent": "ecoindex-cli"}), timeout=timeout
+    ) as response:
+        if response.peek(2)[:2] == GZIP_MAGIC_NUMBER:
+            with GzipFile(fileobj=response) as stream:
+                yield stream
+        else:
+            yield response
+
+
+def iter_sitemap_urls(sitemap_url: str, since: datetime | None = None) -> Iterator[str]:
+    """
+    Yields the page urls of a sitemap, following sitemap indexes. Sitemaps
+    are parsed as a stream, and parsed elements are dropped as soon as they
+    are read, so that memory stays bounded whatever the size of the sitemap.
+    When `since` is given, pages and sitemaps with a `lastmod` older than
+    `since` are skipped, but entries without a `lastmod` are kept
+    """
+    if since and not since.tzinfo:
+        since = since.replace(tzinfo=timezone.utc)
+
+    sitemaps: Deque[str] = deque([sitemap_url])
+    visited = set()
+
+    while sitemaps:
+        url = sitemaps.popleft()
+
+        if url in visited:
+            continue
+
+        visited.add(url)
+
+        with open_sitemap(url) as stream:
+            root, loc, lastmod = None, None, None
+
+            for event, element in iterparse(stream, events=("start", "end")):
+                tag = get_tag(element)
+
+                if event == "start":
+                    if root is None:
+                        root = element
+                    elif tag in ("url", "sitemap"):
+                        loc, lastmod = None, None
+
+                    continue
+
+                if tag == "loc":
+                    loc = (element.text or "").strip()
+                elif tag == "lastmod":
+                    lastmod = parse_lastmod(element.text)
+                elif tag in ("url", "sitemap"):
+                    if loc and not (since and lastmod and lastmod < since):
+                        if tag == "sitemap":
+                            sitemaps.append(loc)
+                        else:
+                            yield loc
+
+                    # Drops the entries already read
+                    root.clear()
+
+
+def get_last_run(sitemap_url: str, state_file: str) -> datetime | None:
+    """
+    Returns when the pages of a sitemap were analyzed for the last time
+    """
+    if not exists(state_file):
+        return None
+
+    with open(state_file) as fp:
+        last_run = load(fp).get(sitemap_url)
+
+    return datetime.fromisoformat(last_run) if last_run else None
+
+
+def set_last_run(sitemap_url: str, state_file: str, date: datetime) -> None:
+    state = {}
+
+    if exists(state_file):
+        with open(state_file) as fp:
+            state = load(fp)
+
+    state[sitemap_url] = date.astimezone(timezone.utc).isoformat()
+    create_folder(dirname(state_file))
+
+    with open(state_file, "w") as fp:
+        dump(state, fp, indent=2)
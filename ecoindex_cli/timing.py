@@ -0,0 +1,144 @@
+from array import array
+from contextlib import contextmanager
+from csv import writer
+from math import ceil
+from os.path import exists, getsize
+from random import randrange
+from time import perf_counter
+from typing import Dict, Iterator, Tuple
+
+PHASES = (
+    "cache",
+    "driver",
+    "load",
+    "resize",
+    "wait_before_scroll",
+    "scroll",
+    "wait_after_scroll",
+    "metrics",
+    "compute",
+)
+
+# Durations measured within the phases, and not part of the total time of
+# an analysis: time the page actually needed to settle, in the waits before
+# and after scroll
+MEASURES = ("settle",)
+
+
+class PhaseTimer:
+    """
+    Records the time spent in each phase of a page analysis:
+
+    ```
+    timer = PhaseTimer()
+    with timer.phase("load"):
+        driver.get(url)
+    ```
+
+    Other durations, measured by the analysis itself, are added with `record`
+    """
+
+    def __init__(self) -> None:
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = perf_counter()
+
+        try:
+            yield
+        finally:
+            self.record(name=name, duration=perf_counter() - start)
+
+    def record(self, name: str, duration: float) -> None:
+        self.timings[name] = self.timings.get(name, 0) + duration
+
+
+class TimingStats:
+    """
+    Collects the phase timings of all the analyses to compute percentiles.
+    Above `max_samples` analyses, percentiles are computed on a uniform
+    random sample (reservoir sampling), so that memory stays bounded
+    """
+
+    def __init__(self, max_samples: int = 100_000) -> None:
+        self.max_samples = max_samples
+        self.count = 0
+        self.samples: Dict[str, array] = {}
+        self.seen: Dict[str, int] = {}
+
+    def add(self, timings: Dict[str, float]) -> None:
+        self.count += 1
+
+        for phase, duration in timings.items():
+            samples = self.samples.setdefault(phase, array("d"))
+            self.seen[phase] = self.seen.get(phase, 0) + 1
+
+            if len(samples) < self.max_samples:
+                samples.append(duration)
+            else:
+                index = randrange(self.seen[phase])
+
+                if index < self.max_samples:
+                    samples[index] = duration
+
+    @staticmethod
+    def get_percentile(sorted_samples: list, percentile: float) -> float:
+        return sorted_samples[max(ceil(percentile * len(sorted_samples)) - 1, 0)]
+
+    def get_percentiles(self) -> Dict[str, Tuple[int, float, float, float]]:
+        """
+        Returns the number of analyses, p50, p95 and p99 of each phase,
+        in the order of the analysis
+        """
+        percentiles = {}
+
+        for phase in PHASES + tuple(sorted(set(self.samples) - set(PHASES))):
+            if phase not in self.samples:
+                continue
+
+            sorted_samples = sorted(self.samples[phase])
+            percentiles[phase] = (
+                self.seen[phase],
+                self.get_percentile(sorted_samples, 0.5),
+                self.get_percentile(sorted_samples, 0.95),
+                self.get_percentile(sorted_samples, 0.99),
+            )
+
+        return percentiles
+
+
+class TimingsFile:
+    """
+    Sidecar csv file of the results, with the phase timings of each analysis,
+    their total, and the other measures such as the settle time
+    """
+
+    def __init__(self, filename: str, append: bool = False) -> None:
+        self.filename = filename
+        resume = append and exists(filename) and getsize(filename) > 0
+        self.fp = open(filename, "a" if resume else "w")
+        self.writer = writer(self.fp)
+
+        if not resume:
+            self.writer.writerow(
+                ["url", "width", "height", *PHASES, "total", *MEASURES]
+            )
+
+    def append(
+        self, url: str, width: int | None, height: int | None, timings: Dict
+    ) -> None:
+        self.writer.writerow(
+            [
+                url,
+                width,
+                height,
+                *[round(timings.get(phase, 0), 3) for phase in PHASES],
+                round(sum(timings.get(phase, 0) for phase in PHASES), 3),
+                *[round(timings.get(measure, 0), 3) for measure in MEASURES],
+            ]
+        )
+        self.fp.flush()
+
+    def close(self) -> None:
+        self.fp.close()
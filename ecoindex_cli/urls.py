@@ -0,0 +1,226 @@
+import re
+from array import array
+from bisect import bisect_left
+from fnmatch import fnmatchcase
+from hashlib import blake2b
+from typing import Iterable, Iterator, List, Set
+from urllib.parse import unquote_plus, urlsplit, urlunsplit
+
+from loguru import logger
+from pydantic import parse_obj_as
+from pydantic.error_wrappers import ValidationError
+from pydantic.networks import HttpUrl
+
+from ecoindex_cli.enums import TrailingSlash
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Common http urls, that do not need the full (and much slower) pydantic
+# validation: scheme, host name with a top level domain, optional port
+FAST_URL_PATTERN = re.compile(
+    r"https?://"
+    r"(?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+[A-Za-z]{2,63}"
+    r"(?::\d{1,5})?"
+    r"(?:[/#][^\s]*)?"
+)
+
+
+class UrlCanonicalizer:
+    """
+    Gives the same url to the different spellings of a page, so that it is
+    analyzed once: scheme and host are lower cased, default ports, fragments
+    and query parameters are removed, and the trailing slash of the path is
+    handled according to `trailing_slash`.
+
+    Query parameters matching a pattern of `keep_query_params` (IE `page`,
+    `*` for all of them) are kept and sorted, unless they also match a
+    pattern of `drop_query_params` (IE `utm_*`)
+    """
+
+    def __init__(
+        self,
+        keep_query_params: Iterable[str] = (),
+        drop_query_params: Iterable[str] = (),
+        trailing_slash: TrailingSlash = TrailingSlash.keep,
+        keep_fragment: bool = False,
+    ) -> None:
+        self.keep_query_params = tuple(keep_query_params)
+        self.drop_query_params = tuple(drop_query_params)
+        self.trailing_slash = trailing_slash
+        self.keep_fragment = keep_fragment
+
+    def is_kept_param(self, name: str) -> bool:
+        return any(
+            fnmatchcase(name, pattern) for pattern in self.keep_query_params
+        ) and not any(fnmatchcase(name, pattern) for pattern in self.drop_query_params)
+
+    def get_query(self, query: str) -> str:
+        if not query or not self.keep_query_params:
+            return ""
+
+        # Parameters are kept as they are written, only their order changes
+        params = [
+            param
+            for param in query.split("&")
+            if param and self.is_kept_param(unquote_plus(param.partition("=")[0]))
+        ]
+
+        return "&".join(sorted(params))
+
+    def get_path(self, path: str) -> str:
+        if not path or path == "/":
+            return "/"
+
+        if self.trailing_slash == TrailingSlash.strip:
+            return path.rstrip("/") or "/"
+
+        if self.trailing_slash == TrailingSlash.add and not path.endswith("/"):
+            # Paths of files are left untouched
+            if "." not in path.rsplit("/", 1)[-1]:
+                return f"{path}/"
+
+        return path
+
+    def canonicalize(self, url: str) -> str:
+        parts = urlsplit(url.strip())
+        scheme = parts.scheme.lower()
+        netloc = (parts.hostname or "").rstrip(".")
+
+        if ":" in netloc:
+            netloc = f"[{netloc}]"
+
+        if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+            netloc = f"{netloc}:{parts.port}"
+
+        if parts.username:
+            password = f":{parts.password}" if parts.password else ""
+            netloc = f"{parts.username}{password}@{netloc}"
+
+        return urlunsplit(
+            (
+                scheme,
+                netloc,
+                self.get_path(parts.path),
+                self.get_query(parts.query),
+                parts.fragment if self.keep_fragment else "",
+            )
+        )
+
+
+class SeenSet:
+    """
+    Set of the urls already seen, that stores a 64 bits hash of each url
+    instead of the url itself. The probability of a collision is negligible
+    below billions of urls.
+
+    New hashes are kept in a small set, which is stored by chunks as sorted
+    arrays of hashes: each url then only takes 8 bytes. Like the levels of
+    an LSM tree, a new array is merged with the previous one until the
+    previous one is more than `level_ratio` times larger. Each hash is then
+    merged a logarithmic number of times, instead of once per chunk, and
+    only a few arrays are searched
+    """
+
+    def __init__(self, chunk_size: int = 65536, level_ratio: int = 4) -> None:
+        self.chunk_size = chunk_size
+        self.level_ratio = level_ratio
+        self.hashes: Set[int] = set()
+        self.runs: List[array] = []
+
+    @staticmethod
+    def get_hash(url: str) -> int:
+        return int.from_bytes(blake2b(url.encode(), digest_size=8).digest(), "little")
+
+    def contains_hash(self, url_hash: int) -> bool:
+        if url_hash in self.hashes:
+            return True
+
+        for run in self.runs:
+            index = bisect_left(run, url_hash)
+
+            if index < len(run) and run[index] == url_hash:
+                return True
+
+        return False
+
+    def add_run(self, run: array) -> None:
+        while self.runs and len(self.runs[-1]) <= self.level_ratio * len(run):
+            # Timsort merges the two sorted runs in linear time
+            run = array("Q", sorted(self.runs.pop() + run))
+
+        self.runs.append(run)
+
+    def add(self, url: str) -> bool:
+        """Adds the url to the set, and returns whether it was not seen yet"""
+        url_hash = self.get_hash(url)
+
+        if self.contains_hash(url_hash):
+            return False
+
+        self.hashes.add(url_hash)
+
+        if len(self.hashes) >= self.chunk_size:
+            self.add_run(array("Q", sorted(self.hashes)))
+            self.hashes = set()
+
+        return True
+
+    def __contains__(self, url: str) -> bool:
+        return self.contains_hash(self.get_hash(url))
+
+    def __len__(self) -> int:
+        return len(self.hashes) + sum(len(run) for run in self.runs)
+
+
+def is_valid_url(url: str) -> bool:
+    if FAST_URL_PATTERN.fullmatch(url):
+        return True
+
+    try:
+        parse_obj_as(HttpUrl, url)
+    except ValidationError:
+        return False
+
+    return True
+
+
+def count_lines(filename: str, buffer_size: int = 1024 * 1024) -> int:
+    """
+    Counts the lines of a file, without decoding it
+    """
+    count = 0
+    last_byte = b"\n"
+
+    with open(filename, "rb") as fp:
+        while buffer := fp.read(buffer_size):
+            count += buffer.count(b"\n")
+            last_byte = buffer[-1:]
+
+    return count + (last_byte != b"\n")
+
+
+def iter_urls_from_file(
+    urls_file: str, canonicalizer: UrlCanonicalizer | None = None
+) -> Iterator[str]:
+    """
+    Reads the urls of a file line by line. Urls are yielded canonicalized
+    and deduplicated, and invalid urls are skipped with a warning
+    """
+    canonicalizer = canonicalizer if canonicalizer else UrlCanonicalizer()
+    seen = SeenSet()
+
+    with open(urls_file) as fp:
+        for line_number, line in enumerate(fp, start=1):
+            url = line.strip()
+
+            if not url:
+                continue
+
+            if not is_valid_url(url):
+                logger.warning(f"{urls_file}:{line_number} -- `{url}` is not valid")
+                continue
+
+            url = canonicalizer.canonicalize(url)
+
+            if seen.add(url):
+                yield url
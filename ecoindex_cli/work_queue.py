@@ -0,0 +1,202 @@
+from abc import ABC, abstractmethod
+from json import dumps, loads
+from os.path import dirname
+from sqlite3 import connect
+from time import time
+from typing import Dict, Iterable, Iterator, NamedTuple, Tuple
+
+from click.exceptions import BadParameter
+from ecoindex.models import Result, WindowSize
+
+from ecoindex_cli.files import create_folder
+
+
+class Task(NamedTuple):
+    id: int
+    url: str
+    window_size: WindowSize
+    attempts: int
+
+
+class WorkQueue(ABC):
+    """
+    Queue of analysis shared by several workers. A leased task becomes
+    visible again to other workers if it has not been acknowledged before
+    its visibility timeout (at-least-once delivery), and results are
+    deduplicated on (url, window size) in the results sink
+    """
+
+    @abstractmethod
+    def put(self, tasks: Iterable[Tuple[str, WindowSize]]) -> int:
+        """Adds tasks to the queue, and returns the number of new tasks"""
+
+    @abstractmethod
+    def lease(self, worker: str, visibility_timeout: int) -> Task | None:
+        pass
+
+    @abstractmethod
+    def ack(self, task: Task, result: Result) -> None:
+        pass
+
+    @abstractmethod
+    def fail(self, task: Task, error: str) -> None:
+        pass
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        pass
+
+    @abstractmethod
+    def results(self) -> Iterator[Result]:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class SqliteWorkQueue(WorkQueue):
+    def __init__(self, filename: str, max_attempts: int = 3) -> None:
+        self.filename = filename
+        self.max_attempts = max_attempts
+
+        create_folder(dirname(filename) or ".")
+        self.connection = connect(filename, timeout=30, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "id INTEGER PRIMARY KEY, "
+            "url TEXT NOT NULL, "
+            "width INTEGER NOT NULL, "
+            "height INTEGER NOT NULL, "
+            "status TEXT NOT NULL DEFAULT 'pending', "
+            "attempts INTEGER NOT NULL DEFAULT 0, "
+            "worker TEXT, "
+            "error TEXT, "
+            "lease_expires_at REAL, "
+            "UNIQUE (url, width, height))"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, lease_expires_at)"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "url TEXT NOT NULL, "
+            "width INTEGER NOT NULL, "
+            "height INTEGER NOT NULL, "
+            "result TEXT NOT NULL, "
+            "PRIMARY KEY (url, width, height))"
+        )
+
+    def put(self, tasks: Iterable[Tuple[str, WindowSize]]) -> int:
+        self.connection.execute("BEGIN IMMEDIATE")
+        added = 0
+
+        for url, window_size in tasks:
+            added += self.connection.execute(
+                "INSERT OR IGNORE INTO tasks (url, width, height) VALUES (?, ?, ?)",
+                (url, window_size.width, window_size.height),
+            ).rowcount
+
+        self.connection.execute("COMMIT")
+
+        return added
+
+    def lease(self, worker: str, visibility_timeout: int) -> Task | None:
+        now = time()
+        self.connection.execute("BEGIN IMMEDIATE")
+
+        try:
+            self.connection.execute(
+                "UPDATE tasks SET status = 'failed', error = 'Lease expired' "
+                "WHERE status = 'leased' AND lease_expires_at < ? AND attempts >= ?",
+                (now, self.max_attempts),
+            )
+            row = self.connection.execute(
+                "SELECT id, url, width, height, attempts FROM tasks "
+                "WHERE status = 'pending' "
+                "OR (status = 'leased' AND lease_expires_at < ?) "
+                "ORDER BY id LIMIT 1",
+                (now,),
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            task_id, url, width, height, attempts = row
+            self.connection.execute(
+                "UPDATE tasks SET status = 'leased', attempts = attempts + 1, "
+                "worker = ?, lease_expires_at = ? WHERE id = ?",
+                (worker, now + visibility_timeout, task_id),
+            )
+
+            return Task(
+                id=task_id,
+                url=url,
+                window_size=WindowSize(width=width, height=height),
+                attempts=attempts + 1,
+            )
+        finally:
+            self.connection.execute("COMMIT")
+
+    def ack(self, task: Task, result: Result) -> None:
+        self.connection.execute("BEGIN IMMEDIATE")
+        self.connection.execute(
+            "INSERT OR IGNORE INTO results VALUES (?, ?, ?, ?)",
+            (
+                task.url,
+                task.window_size.width,
+                task.window_size.height,
+                dumps(result.__dict__, default=str),
+            ),
+        )
+        self.connection.execute(
+            "UPDATE tasks SET status = 'done', lease_expires_at = NULL WHERE id = ?",
+            (task.id,),
+        )
+        self.connection.execute("COMMIT")
+
+    def fail(self, task: Task, error: str) -> None:
+        self.connection.execute(
+            "UPDATE tasks SET status = ?, error = ?, lease_expires_at = NULL "
+            "WHERE id = ? AND status != 'done'",
+            (
+                "failed" if task.attempts >= self.max_attempts else "pending",
+                error,
+                task.id,
+            ),
+        )
+
+    def stats(self) -> Dict[str, int]:
+        stats = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        stats.update(
+            self.connection.execute(
+                "SELECT status, COUNT(*) FROM tasks GROUP BY status"
+            ).fetchall()
+        )
+
+        return stats
+
+    def results(self) -> Iterator[Result]:
+        for (result,) in self.connection.execute("SELECT result FROM results"):
+            yield Result(**loads(result))
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def get_work_queue(queue: str, max_attempts: int = 3) -> WorkQueue:
+    """
+    Returns the work queue backend of the given uri. Only `sqlite://`
+    (or a plain file path) is built in for now
+    """
+    scheme, separator, path = queue.partition("://")
+
+    if not separator:
+        return SqliteWorkQueue(filename=queue, max_attempts=max_attempts)
+
+    if scheme == "sqlite":
+        return SqliteWorkQueue(filename=path, max_attempts=max_attempts)
+
+    raise BadParameter(
+        message=f"🔥 `{scheme}` is not a supported queue backend", param_hint="queue"
+    )
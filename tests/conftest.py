@@ -0,0 +1,23 @@
+from contextlib import ExitStack
+from typing import Callable, Iterator
+
+from pytest import fixture
+
+from tests.fixture_server import FixtureServer, PageSpec
+
+
+@fixture
+def fixture_server() -> Iterator[Callable[..., FixtureServer]]:
+    """
+    Starts local servers of synthetic pages, stopped at the end of the test:
+
+    ```
+    server = fixture_server(pages=5, spec=PageSpec(nodes=10))
+    ```
+    """
+    with ExitStack() as stack:
+
+        def start(pages: int = 1, spec: PageSpec = PageSpec()) -> FixtureServer:
+            return stack.enter_context(FixtureServer(pages=pages, spec=spec))
+
+        yield start
@@ -1,8 +1,11 @@
+from datetime import datetime
 from os import remove
 
+from ecoindex.models import Result
 from typer.testing import CliRunner
 
 from ecoindex_cli.cli.app import app
+from ecoindex_cli.history import ResultsHistory
 
 runner = CliRunner()
 
@@ -35,6 +38,50 @@ def test_analyze_one_invalid_url():
     )
 
 
+def test_analyze_urls_file_not_found():
+    result = runner.invoke(
+        app=app, args=["analyze", "--urls-file", "/tmp/ecoindex-cli/missing.csv"]
+    )
+    assert result.exit_code == 1
+    assert "🔥 File `/tmp/ecoindex-cli/missing.csv` does not exist" in result.stdout
+
+
+def test_analyze_unreadable_urls_file(tmp_path, monkeypatch):
+    def count_lines(filename):
+        raise PermissionError("Permission denied")
+
+    urls_file = tmp_path / "urls.csv"
+    urls_file.write_text("https://www.test.com\n")
+    monkeypatch.setattr("ecoindex_cli.cli.app.count_lines", count_lines)
+    result = runner.invoke(app=app, args=["analyze", "--urls-file", str(urls_file)])
+    assert result.exit_code == 1
+    assert f"🔥 Can not read file `{urls_file}`: Permission denied" in result.stdout
+    assert "sitemap" not in result.stdout
+
+
+def test_enqueue_unreadable_urls_file(tmp_path, monkeypatch):
+    def iter_urls_from_file(urls_file, canonicalizer):
+        raise PermissionError("Permission denied")
+        yield
+
+    urls_file = tmp_path / "urls.csv"
+    urls_file.write_text("https://www.test.com\n")
+    monkeypatch.setattr("ecoindex_cli.cli.app.iter_urls_from_file", iter_urls_from_file)
+    result = runner.invoke(
+        app=app,
+        args=[
+            "enqueue",
+            "--urls-file",
+            str(urls_file),
+            "--queue",
+            str(tmp_path / "queue.sqlite"),
+        ],
+    )
+    assert result.exit_code == 1
+    assert f"🔥 Can not read file `{urls_file}`: Permission denied" in result.stdout
+    assert "sitemap" not in result.stdout
+
+
 def test_analyze_one_valid_url():
     domain = "www.test.com"
     valid_url = f"https://{domain}"
@@ -97,4 +144,76 @@ def test_no_interaction():
 def test_unauthorized_export_format():
     result = runner.invoke(app=app, args=["analyze", "--export-format", "txt"])
     assert result.exit_code == 2
-    assert "'txt' is not one of 'csv', 'json'." in result.stdout
+    assert "'txt' is not one of 'csv', 'json'," in result.stdout
+    assert "'parquet', 'feather'." in result.stdout
+
+
+def test_resume_without_pyarrow(tmp_path, monkeypatch):
+    def import_pyarrow():
+        raise ModuleNotFoundError("The parquet and feather formats need pyarrow")
+
+    monkeypatch.setattr("ecoindex_cli.files.import_pyarrow", import_pyarrow)
+    result = runner.invoke(
+        app=app,
+        args=[
+            "analyze",
+            "--url",
+            "https://www.test.com",
+            "--no-interaction",
+            "--resume",
+            str(tmp_path / "results.parquet"),
+        ],
+    )
+    assert result.exit_code == 1
+    assert "Can not resume from" in result.stdout
+    assert "need pyarrow" in result.stdout
+
+
+def test_history_not_found(tmp_path):
+    result = runner.invoke(
+        app=app,
+        args=["history", "--history-file", str(tmp_path / "history.sqlite")],
+    )
+    assert result.exit_code == 1
+    assert "There is no history" in result.stdout
+
+
+def test_history_fail_on_regression(tmp_path):
+    filename = str(tmp_path / "history.sqlite")
+    history = ResultsHistory(filename=filename)
+
+    for date, score in ((datetime(2023, 1, 1), 80), (datetime(2023, 2, 1), 60)):
+        history.start_run(domain="www.test.com", date=date)
+        history.add(
+            Result(
+                url="https://www.test.com",
+                width=1920,
+                height=1080,
+                size=100,
+                nodes=100,
+                requests=10,
+                grade="B",
+                score=score,
+                ges=1.5,
+                water=2.25,
+                date=date,
+            )
+        )
+
+    history.close()
+
+    result = runner.invoke(
+        app=app,
+        args=[
+            "history",
+            "www.test.com",
+            "--history-file",
+            filename,
+            "--chart-folder",
+            str(tmp_path),
+            "--fail-on-regression",
+        ],
+    )
+    assert result.exit_code == 1
+    assert "1 page(s) lost 5 points or more" in result.stdout
+    assert (tmp_path / "history.svg").exists()
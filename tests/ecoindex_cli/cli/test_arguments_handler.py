@@ -1,13 +1,22 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
 from ecoindex.models import WindowSize
 from pydantic import ValidationError
 from pytest import raises
 
 from ecoindex_cli.cli.arguments_handler import (
+    get_crawl_limits_from_args,
     get_file_prefix_input_file_logger_file,
     get_url_from_args,
-    get_urls_from_file,
+    get_urls_recursive,
     get_window_sizes_from_args,
+    validate_list_of_urls,
 )
+from ecoindex_cli.crawl import CrawlLimits
+from ecoindex_cli.enums import TrailingSlash
+from ecoindex_cli.urls import UrlCanonicalizer
+from tests.fixture_server import PageSpec
 
 
 def test_urls_all_valid_from_args():
@@ -58,13 +67,61 @@ def test_get_file_prefix_input_file_logger_file():
     )
 
 
-def test_read_file_with_empty_lines():
-    urls = ("http://test.com", "https://test.com", "https://www.dummy.com/page/", "")
-    with open(file="/tmp/ecoindex-cli/input/test.com.csv", mode="w") as f:
-        f.write("\n".join(urls))
+def test_validate_list_of_urls():
+    urls = [
+        "HTTP://Test.com/a",
+        "https://test.com/a/",
+        "https://test.com/a#x",
+        "https://test.com/a?utm_source=test",
+        "https://test.com/a?page=2",
+    ]
 
-    validated_urls = get_urls_from_file(
-        urls_file="/tmp/ecoindex-cli/input/test.com.csv"
+    assert validate_list_of_urls(urls) == {
+        "http://test.com/a",
+        "https://test.com/a/",
+        "https://test.com/a",
+    }
+    assert validate_list_of_urls(
+        urls,
+        canonicalizer=UrlCanonicalizer(
+            keep_query_params=["page"], trailing_slash=TrailingSlash.strip
+        ),
+    ) == {"http://test.com/a", "https://test.com/a", "https://test.com/a?page=2"}
+
+
+def test_crawl_limits_from_args():
+    limits = get_crawl_limits_from_args(
+        max_depth=3,
+        include=["/product/"],
+        samples=["/product/*=10", "/a=b/*=2"],
     )
-    assert len(validated_urls) == 3
-    assert "" not in validated_urls
+
+    assert limits.max_depth == 3
+    assert limits.max_pages is None
+    assert limits.include == ["/product/"]
+    assert limits.exclude == []
+    assert limits.samples == {"/product/*": 10, "/a=b/*": 2}
+
+
+def test_invalid_crawl_limits_from_args():
+    with raises(ValidationError):
+        get_crawl_limits_from_args(exclude=["("])
+
+    with raises(ValidationError):
+        get_crawl_limits_from_args(samples=["/product/*"])
+
+    with raises(ValidationError):
+        get_crawl_limits_from_args(samples=["/product/*=ten"])
+
+
+def test_get_urls_recursive_with_port(fixture_server):
+    server = fixture_server(pages=20, spec=PageSpec(nodes=10, requests=1))
+
+    # The crawler can only be started once in a process
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        urls = pool.submit(
+            get_urls_recursive, server.base_url, limits=CrawlLimits(max_pages=3)
+        ).result()
+
+    assert len(urls) == 3
+    assert all(url.startswith(server.base_url) for url in urls)
@@ -0,0 +1,160 @@
+from asyncio import run
+from unittest.mock import patch
+
+from ecoindex.models import WindowSize
+from loguru import logger
+
+from ecoindex_cli.cli.helper import run_page_analysis, run_viewports_analysis
+from ecoindex_cli.driver_pool import PooledDriver
+from ecoindex_cli.enums import FailureKind
+from ecoindex_cli.retry import Failure, RetryPolicy
+from ecoindex_cli.scheduler import AnalysisScheduler
+from ecoindex_cli.timing import PhaseTimer
+from tests.fixture_server import PageSpec
+from tests.stub_scraper import StubDriver, StubDriverPool, StubScraper
+
+
+class ResponsiveDriver(StubDriver):
+    """Loads an image of the width of the window when it is resized"""
+
+    def set_window_size(self, width: int, height: int) -> None:
+        self.requests[f"https://www.test.com/{width}.png"] = 1000
+
+
+class ResponsiveDriverPool(StubDriverPool):
+    def launch(self, window_size: WindowSize) -> PooledDriver:
+        launcher = StubScraper(url="about:blank", window_size=window_size)
+        launcher.driver = ResponsiveDriver()
+
+        return PooledDriver(launcher=launcher)
+
+
+def analyze(coroutine_function, driver_pool_class=StubDriverPool, **kwargs):
+    driver_pool = driver_pool_class(size=1)
+    scheduler = AnalysisScheduler(max_workers=1)
+
+    with patch("ecoindex_cli.cli.helper.EcoindexScraper", StubScraper):
+        try:
+            return (
+                run(
+                    coroutine_function(
+                        driver_pool=driver_pool,
+                        scheduler=scheduler,
+                        wait_after_scroll=0,
+                        wait_before_scroll=0,
+                        **kwargs,
+                    )
+                ),
+                driver_pool,
+            )
+        finally:
+            scheduler.close()
+            driver_pool.close()
+
+
+def test_run_page_analysis(fixture_server):
+    server = fixture_server(spec=PageSpec(nodes=100, requests=5))
+    result, _ = analyze(
+        run_page_analysis,
+        url=server.urls[0],
+        window_size=WindowSize(width=1920, height=1080),
+    )
+
+    assert not isinstance(result, Failure)
+    assert result.nodes == 100
+    assert result.requests == 5
+
+
+def test_run_viewports_analysis_loads_page_once(fixture_server):
+    timer = PhaseTimer()
+    window_sizes = [
+        WindowSize(width=1920, height=1080),
+        WindowSize(width=390, height=844),
+    ]
+
+    server = fixture_server(spec=PageSpec(nodes=100, requests=5))
+    results, driver_pool = analyze(
+        run_viewports_analysis,
+        url=server.urls[0],
+        window_sizes=window_sizes,
+        timer=timer,
+    )
+
+    assert not any(isinstance(result, Failure) for result in results)
+    assert [(result.width, result.height) for result in results] == [
+        (1920, 1080),
+        (390, 844),
+    ]
+    assert driver_pool.misses == 1
+    assert "resize" in timer.timings
+    assert "settle" in timer.timings
+
+
+def test_run_viewports_analysis_counts_requests_by_window_size(fixture_server):
+    server = fixture_server(spec=PageSpec(nodes=100, requests=5))
+    results, _ = analyze(
+        run_viewports_analysis,
+        driver_pool_class=ResponsiveDriverPool,
+        url=server.urls[0],
+        window_sizes=[
+            WindowSize(width=1920, height=1080),
+            WindowSize(width=390, height=844),
+            WindowSize(width=768, height=1024),
+        ],
+    )
+
+    # The image of a window size is not counted in the next ones
+    assert [result.requests for result in results] == [5, 6, 6]
+
+
+def test_run_viewports_analysis_failure():
+    results, _ = analyze(
+        run_viewports_analysis,
+        url="http://127.0.0.1:1/unreachable",
+        window_sizes=[
+            WindowSize(width=1920, height=1080),
+            WindowSize(width=390, height=844),
+        ],
+        logger=logger,
+    )
+
+    assert [type(result) for result in results] == [Failure, Failure]
+    assert [(result.width, result.height) for result in results] == [
+        (1920, 1080),
+        (390, 844),
+    ]
+    assert results[0].kind == FailureKind.network
+    assert results[0].attempts == 1
+
+
+def test_run_page_analysis_retries():
+    retry_policy = RetryPolicy(max_retries=2, base_delay=0.01)
+    result, driver_pool = analyze(
+        run_page_analysis,
+        url="http://127.0.0.1:1/unreachable",
+        window_size=WindowSize(width=1920, height=1080),
+        logger=logger,
+        retry_policy=retry_policy,
+    )
+
+    assert result.kind == FailureKind.network
+    assert result.attempts == 3
+    assert retry_policy.retries == 2
+    # A driver that failed to load a page is not reused
+    assert driver_pool.misses == 3
+
+
+def test_run_page_analysis_http_error(fixture_server):
+    retry_policy = RetryPolicy(base_delay=0.01)
+    server = fixture_server()
+    result, _ = analyze(
+        run_page_analysis,
+        url=f"{server.base_url}/missing.html",
+        window_size=WindowSize(width=1920, height=1080),
+        logger=logger,
+        retry_policy=retry_policy,
+    )
+
+    assert result.kind == FailureKind.http
+    assert result.message == "HTTP error 404"
+    assert retry_policy.retries == 0
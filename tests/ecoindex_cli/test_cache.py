@@ -0,0 +1,60 @@
+from ecoindex.models import Result, WindowSize
+
+from ecoindex_cli.cache import CachedResult, ResultCache
+
+window_size = WindowSize(width=1920, height=1080)
+
+
+def get_result(url: str) -> Result:
+    return Result(
+        url=url,
+        width=window_size.width,
+        height=window_size.height,
+        size=100,
+        nodes=100,
+        requests=10,
+        water=0,
+    )
+
+
+def test_cache_hit_and_miss(tmp_path):
+    cache = ResultCache(settings={"wait_after_scroll": 3}, folder=str(tmp_path))
+
+    assert cache.get(url="https://www.test.com", window_size=window_size) is None
+    cache.set(result=get_result("https://www.test.com"), window_size=window_size)
+    result = cache.get(url="https://www.test.com", window_size=window_size)
+
+    assert result.url == "https://www.test.com"
+    assert isinstance(result, CachedResult)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    other_settings = ResultCache(
+        settings={"wait_after_scroll": 1}, folder=str(tmp_path)
+    )
+    assert (
+        other_settings.get(url="https://www.test.com", window_size=window_size) is None
+    )
+
+
+def test_cache_ttl(tmp_path):
+    cache = ResultCache(settings={}, ttl=0, folder=str(tmp_path))
+    cache.set(result=get_result("https://www.test.com"), window_size=window_size)
+
+    assert cache.get(url="https://www.test.com", window_size=window_size) is None
+
+
+def test_cache_refresh(tmp_path):
+    ResultCache(settings={}, folder=str(tmp_path)).set(
+        result=get_result("https://www.test.com"), window_size=window_size
+    )
+    cache = ResultCache(settings={}, folder=str(tmp_path), read=False)
+
+    assert cache.get(url="https://www.test.com", window_size=window_size) is None
+
+
+def test_cache_eviction(tmp_path):
+    cache = ResultCache(settings={}, max_size=0, folder=str(tmp_path))
+    cache.set(result=get_result("https://www.test.com"), window_size=window_size)
+    cache.evict()
+
+    assert cache.get(url="https://www.test.com", window_size=window_size) is None
@@ -0,0 +1,62 @@
+from ecoindex_cli.enums import ChartKind
+from ecoindex_cli.report.charts import Chart, Line, get_chart_key, render_charts
+
+
+def get_charts():
+    return [
+        Chart(
+            name="size",
+            title="Size",
+            xlabel="Kb",
+            ylabel="Pages",
+            values=[1, 2, 2, 3],
+            weights=[1, 1, 1, 1],
+            lines=(Line(x=2, color="blue", label="Median: 2"),),
+        ),
+        Chart(
+            name="grade",
+            title="Grades",
+            xlabel="Grade",
+            ylabel="Pages",
+            values=[],
+            weights=[1, 3],
+            labels=("A", "B"),
+            colors=("#349A47", "#51B84B"),
+            kind=ChartKind.bar,
+        ),
+    ]
+
+
+def test_get_chart_key():
+    chart = get_charts()[0]
+
+    assert get_chart_key(chart) == get_chart_key(get_charts()[0])
+    assert get_chart_key(chart) != get_chart_key(chart._replace(values=[1, 2, 3, 3]))
+
+
+def test_render_charts_in_parallel(tmp_path):
+    assert render_charts(charts=get_charts(), output_path=str(tmp_path)) == (2, 0)
+    assert (tmp_path / "size.svg").read_text().startswith("<?xml")
+    assert (tmp_path / "grade.svg").exists()
+
+
+def test_render_charts_cache(tmp_path):
+    output, cache = tmp_path / "output", tmp_path / "cache"
+    output.mkdir()
+
+    assert render_charts(
+        charts=get_charts(),
+        output_path=str(output),
+        cache_folder=str(cache),
+        max_workers=1,
+    ) == (2, 0)
+
+    (output / "size.svg").unlink()
+    charts = get_charts()
+    charts[1] = charts[1]._replace(weights=[2, 3])
+
+    assert render_charts(
+        charts=charts, output_path=str(output), cache_folder=str(cache), max_workers=1
+    ) == (1, 1)
+    assert (output / "size.svg").exists()
+    assert len(list(cache.iterdir())) == 3
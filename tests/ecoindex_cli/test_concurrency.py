@@ -0,0 +1,73 @@
+from asyncio import run, sleep
+from math import inf
+
+from ecoindex_cli.concurrency import AdaptiveConcurrency
+from ecoindex_cli.scheduler import AnalysisScheduler
+
+
+def get_concurrency(**kwargs) -> AdaptiveConcurrency:
+    return AdaptiveConcurrency(
+        min_available_memory=0, max_load_per_cpu=inf, interval=inf, **kwargs
+    )
+
+
+def test_additive_increase_when_saturated():
+    concurrency = get_concurrency(max_limit=3, initial_limit=2)
+    concurrency.saturated = True
+    concurrency.record(latency=1)
+    concurrency.adjust()
+
+    assert concurrency.limit == 3
+
+    concurrency.saturated = True
+    concurrency.record(latency=1)
+    concurrency.adjust()
+
+    assert concurrency.limit == 3
+
+
+def test_no_increase_when_not_saturated():
+    concurrency = get_concurrency(max_limit=10, initial_limit=2)
+    concurrency.record(latency=1)
+    concurrency.adjust()
+
+    assert concurrency.limit == 2
+
+
+def test_multiplicative_decrease_on_timeouts():
+    concurrency = get_concurrency(max_limit=20, initial_limit=10)
+    concurrency.record(latency=20, timed_out=True)
+    concurrency.record(latency=1)
+    concurrency.adjust()
+
+    assert concurrency.limit == 7
+
+
+def test_multiplicative_decrease_on_latency():
+    concurrency = get_concurrency(max_limit=20, initial_limit=10)
+    concurrency.record(latency=1)
+    concurrency.adjust()
+    concurrency.record(latency=3)
+    concurrency.adjust()
+
+    assert concurrency.limit == 7
+
+
+def test_scheduler_with_adaptive_concurrency():
+    concurrency = get_concurrency(max_limit=4, initial_limit=2)
+    scheduler = AnalysisScheduler(max_workers=4, limiter=concurrency)
+    in_flight = 0
+    max_in_flight = 0
+
+    async def analyze(job):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await sleep(0.01)
+        in_flight -= 1
+
+    run(scheduler.run(jobs=range(6), analyze=analyze, on_done=lambda *args: None))
+    scheduler.close()
+
+    assert max_in_flight == 2
+    assert concurrency.saturated
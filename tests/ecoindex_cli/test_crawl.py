@@ -0,0 +1,73 @@
+from asyncio import run
+
+from ecoindex_cli.crawl import CrawlLimits, crawl_urls
+from tests.fixture_server import PageSpec
+
+
+async def collect(
+    main_url: str, limit: int | None = None, limits: CrawlLimits = CrawlLimits()
+):
+    urls = []
+
+    async for url in crawl_urls(main_url=main_url, limits=limits):
+        urls.append(url)
+
+        if len(urls) == limit:
+            break
+
+    return urls
+
+
+def test_crawl_urls(fixture_server):
+    server = fixture_server(pages=5, spec=PageSpec(nodes=10, requests=1))
+    urls = run(collect(server.urls[0]))
+
+    assert sorted(urls) == sorted(server.urls)
+
+
+def test_crawl_urls_stops_early(fixture_server):
+    server = fixture_server(pages=20, spec=PageSpec(nodes=10, requests=1))
+    urls = run(collect(server.urls[0], limit=2))
+
+    assert len(urls) == 2
+
+
+def crawl_fixture(fixture_server, pages: int, limits: CrawlLimits):
+    server = fixture_server(pages=pages, spec=PageSpec(nodes=10, requests=1))
+    urls = run(collect(server.urls[0], limits=limits))
+
+    return {url.split("/")[-1] for url in urls}
+
+
+def test_crawl_max_depth(fixture_server):
+    # The index links to page 0, which links to pages 1 and 2
+    assert crawl_fixture(fixture_server, pages=20, limits=CrawlLimits(max_depth=2)) == {
+        "0.html",
+        "1.html",
+        "2.html",
+    }
+
+
+def test_crawl_max_pages(fixture_server):
+    assert (
+        len(crawl_fixture(fixture_server, pages=20, limits=CrawlLimits(max_pages=3)))
+        == 3
+    )
+
+
+def test_crawl_include_exclude(fixture_server):
+    urls = crawl_fixture(
+        fixture_server,
+        pages=10,
+        limits=CrawlLimits(include=[r"/[0-4]\.html"], exclude=[r"/3\.html"]),
+    )
+
+    assert urls == {"0.html", "1.html", "2.html", "4.html"}
+
+
+def test_crawl_samples(fixture_server):
+    urls = crawl_fixture(
+        fixture_server, pages=20, limits=CrawlLimits(samples={"/pages/*": 4})
+    )
+
+    assert len(urls) == 4
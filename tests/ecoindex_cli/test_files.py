@@ -0,0 +1,243 @@
+from csv import DictReader
+from datetime import datetime
+from json import load
+
+from ecoindex.models import Result
+from pytest import importorskip, mark, raises
+
+from ecoindex_cli.enums import ExportFormat, FailureKind
+from ecoindex_cli.files import (
+    CsvFile,
+    FailuresFile,
+    FeatherFile,
+    JsonFile,
+    ParquetFile,
+    get_analyzed_keys,
+    get_export_format_from_filename,
+    get_results_file,
+)
+from ecoindex_cli.retry import Failure
+
+results = [
+    Result(
+        url="https://www.test.com",
+        width=1920,
+        height=1080,
+        size=100,
+        nodes=100,
+        requests=10,
+        water=0,
+    ),
+    Result(
+        url="https://www.test.com/page",
+        width=1920,
+        height=1080,
+        size=200,
+        nodes=200,
+        requests=20,
+        water=0,
+    ),
+]
+
+
+def test_get_results_file():
+    assert isinstance(
+        get_results_file(filename="results.csv", export_format=ExportFormat.csv),
+        CsvFile,
+    )
+    assert isinstance(
+        get_results_file(filename="results.json", export_format=ExportFormat.json),
+        JsonFile,
+    )
+
+
+def test_csv_file_append(tmp_path):
+    filename = tmp_path / "results.csv"
+
+    with CsvFile(filename=filename) as file:
+        file.append(results[0])
+
+        with open(filename) as fp:
+            assert len(list(DictReader(fp))) == 1
+
+        file.append(results[1])
+
+    with open(filename) as fp:
+        rows = list(DictReader(fp))
+
+    assert file.count == 2
+    assert [row["url"] for row in rows] == [result.url for result in results]
+
+
+def test_json_file_append(tmp_path):
+    filename = tmp_path / "results.json"
+
+    with JsonFile(filename=filename) as file:
+        for result in results:
+            file.append(result)
+
+    with open(filename) as fp:
+        rows = load(fp)
+
+    assert file.count == 2
+    assert [row["url"] for row in rows] == [result.url for result in results]
+
+
+def test_json_file_empty(tmp_path):
+    filename = tmp_path / "results.json"
+    JsonFile(filename=filename).write()
+
+    with open(filename) as fp:
+        assert load(fp) == []
+
+
+def test_csv_file_resume(tmp_path):
+    filename = tmp_path / "results.csv"
+
+    with CsvFile(filename=filename) as file:
+        file.append(results[0])
+
+    with open(filename, "a") as fp:
+        fp.write("1920,1080,https://www.test.com/interrupted")
+
+    file = CsvFile(filename=filename)
+    file.open(append=True)
+    file.append(results[1])
+    file.close()
+
+    assert file.resumed
+    assert get_analyzed_keys(str(filename)) == {
+        ("https://www.test.com", 1920, 1080),
+        ("https://www.test.com/page", 1920, 1080),
+    }
+
+
+def test_json_file_resume_interrupted(tmp_path):
+    filename = tmp_path / "results.json"
+
+    file = JsonFile(filename=filename)
+    file.open()
+    file.append(results[0])
+    file.fp.close()
+
+    assert get_analyzed_keys(str(filename)) == {("https://www.test.com", 1920, 1080)}
+
+    file = JsonFile(filename=filename)
+    file.open(append=True)
+    file.append(results[1])
+    file.close()
+
+    with open(filename) as fp:
+        assert [row["url"] for row in load(fp)] == [result.url for result in results]
+
+
+def test_json_file_resume_truncated(tmp_path):
+    filename = tmp_path / "results.json"
+
+    with JsonFile(filename=filename) as file:
+        file.append(results[0])
+
+    # The previous run was killed while writing a result
+    content = filename.read_text().rstrip().rstrip("]").rstrip()
+    filename.write_text(content + ',\n{"url": "https://www.test.com/pa')
+
+    file = JsonFile(filename=filename)
+    file.open(append=True)
+    file.append(results[1])
+    file.close()
+
+    with open(filename) as fp:
+        assert [row["url"] for row in load(fp)] == [result.url for result in results]
+
+
+def test_get_export_format_from_filename():
+    assert get_export_format_from_filename("results.csv") == ExportFormat.csv
+    assert get_export_format_from_filename("/tmp/results.JSON") == ExportFormat.json
+
+    assert get_export_format_from_filename("results.arrow") == ExportFormat.feather
+
+    with raises(ValueError):
+        get_export_format_from_filename("results.txt")
+
+
+@mark.parametrize(
+    "file_class,extension", [(ParquetFile, "parquet"), (FeatherFile, "feather")]
+)
+def test_arrow_file_resume(tmp_path, monkeypatch, file_class, extension):
+    importorskip("pyarrow")
+    filename = str(tmp_path / f"results.{extension}")
+    monkeypatch.setattr(file_class, "batch_size", 1)
+
+    with file_class(filename=filename) as file:
+        file.append(results[0])
+        file.append(results[0])
+
+    file = file_class(filename=filename)
+    file.open(append=True)
+    file.append(results[1])
+    file.close()
+
+    rows = list(
+        get_results_file(
+            filename=filename, export_format=ExportFormat(extension)
+        ).read()
+    )
+
+    assert file.resumed and file.count == 1
+    assert [row["url"] for row in rows] == [
+        results[0].url,
+        results[0].url,
+        results[1].url,
+    ]
+    assert rows[2]["nodes"] == 200 and rows[2]["size"] == 200.0
+    assert get_analyzed_keys(filename) == {
+        ("https://www.test.com", 1920, 1080),
+        ("https://www.test.com/page", 1920, 1080),
+    }
+
+
+@mark.parametrize("file_class", [ParquetFile, FeatherFile])
+def test_arrow_file_interrupted(tmp_path, file_class):
+    importorskip("pyarrow")
+    filename = str(tmp_path / "results")
+
+    with file_class(filename=filename) as file:
+        file.append(results[0])
+
+    # The run is killed before the file is closed
+    file = file_class(filename=filename)
+    file.open(append=True)
+    file.append(results[1])
+    file.flush()
+
+    assert [row["url"] for row in file.read()] == [results[0].url]
+
+
+def test_failures_file(tmp_path):
+    filename = tmp_path / "results.failures.csv"
+    failure = Failure(
+        url="https://www.ecoindex.fr/",
+        width=1920,
+        height=1080,
+        kind=FailureKind.timeout,
+        message="timeout",
+        attempts=3,
+        date=datetime(2023, 4, 14),
+    )
+
+    failures_file = FailuresFile(filename=str(filename))
+    failures_file.close()
+
+    assert not filename.exists()
+
+    for append in (False, True):
+        failures_file = FailuresFile(filename=str(filename), append=append)
+        failures_file.append(failure)
+        failures_file.close()
+
+    with open(filename) as fp:
+        rows = list(DictReader(fp))
+
+    assert len(rows) == 2
+    assert rows[0]["kind"] == "timeout"
+    assert rows[0]["attempts"] == "3"
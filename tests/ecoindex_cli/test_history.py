@@ -0,0 +1,84 @@
+from datetime import datetime
+
+from ecoindex.models import Result
+
+from ecoindex_cli.cache import CachedResult
+from ecoindex_cli.history import ResultsHistory
+
+
+def get_result(url: str, score: float, date: datetime, grade: str = "A") -> Result:
+    return Result(
+        url=url,
+        width=1920,
+        height=1080,
+        size=100,
+        nodes=100,
+        requests=10,
+        grade=grade,
+        score=score,
+        ges=1.5,
+        water=2.25,
+        date=date,
+    )
+
+
+def add_run(history: ResultsHistory, date: datetime, scores: dict) -> None:
+    history.start_run(domain="www.test.com", date=date)
+
+    for url, score in scores.items():
+        history.add(get_result(url=url, score=score, date=date))
+
+    history.commit()
+
+
+def test_history_trends(tmp_path):
+    history = ResultsHistory(filename=str(tmp_path / "history.sqlite"))
+    add_run(
+        history,
+        date=datetime(2023, 1, 1),
+        scores={"https://www.test.com/a": 80, "https://www.test.com/b": 50},
+    )
+    add_run(
+        history,
+        date=datetime(2023, 2, 1),
+        scores={
+            "https://www.test.com/a": 70,
+            "https://www.test.com/b": 52,
+            "https://www.test.com/c": 40,
+        },
+    )
+    history.close()
+
+    history = ResultsHistory(filename=str(tmp_path / "history.sqlite"))
+    runs = history.get_runs(domain="www.test.com")
+    trends = history.get_trends()
+
+    assert [(run.pages, run.mean_score) for run in runs] == [(2, 65), (3, 54)]
+    assert [(trend.url, trend.delta) for trend in trends] == [
+        ("https://www.test.com/a", -10),
+        ("https://www.test.com/b", 2),
+    ]
+    assert history.count_regressions(threshold=5) == 1
+    assert history.count_regressions(threshold=5, domain="www.other.com") == 0
+    assert [
+        result.score for result in history.get_page_history("https://www.test.com/a")
+    ] == [80, 70]
+    assert history.get_runs(domain="www.other.com") == []
+
+
+def test_history_skips_cached_results(tmp_path):
+    history = ResultsHistory(filename=str(tmp_path / "history.sqlite"))
+    add_run(history, date=datetime(2023, 1, 1), scores={"https://www.test.com/a": 80})
+    add_run(history, date=datetime(2023, 2, 1), scores={"https://www.test.com/a": 60})
+
+    # The page is served by the cache in the next run, with its last result
+    history.start_run(domain="www.test.com", date=datetime(2023, 2, 2))
+    cached = get_result(
+        url="https://www.test.com/a", score=60, date=datetime(2023, 2, 1)
+    )
+    history.add(CachedResult(**cached.__dict__))
+    history.commit()
+
+    assert [(trend.runs, trend.delta) for trend in history.get_trends()] == [(2, -20)]
+    assert history.count_regressions(threshold=5) == 1
+    assert len(history.get_page_history("https://www.test.com/a")) == 2
@@ -0,0 +1,97 @@
+from asyncio import run
+
+from ecoindex.models import WindowSize
+
+from ecoindex_cli.jobs import JobSource
+from tests.fixture_server import PageSpec
+
+window_sizes = [WindowSize(width=1920, height=1080), WindowSize(width=390, height=844)]
+
+
+def test_jobs_by_window_size():
+    job_source = JobSource(window_sizes=window_sizes)
+
+    assert job_source.get_url_jobs("https://www.test.com") == [
+        ("https://www.test.com", [window_sizes[0]]),
+        ("https://www.test.com", [window_sizes[1]]),
+    ]
+
+
+def test_jobs_multi_viewport():
+    job_source = JobSource(window_sizes=window_sizes, multi_viewport=True)
+
+    assert job_source.get_url_jobs("https://www.test.com") == [
+        ("https://www.test.com", window_sizes)
+    ]
+
+
+def test_jobs_skip_analyzed():
+    analyzed = {
+        ("https://www.test.com", 1920, 1080),
+        ("https://www.test.com/page", 1920, 1080),
+        ("https://www.test.com/page", 390, 844),
+    }
+
+    for multi_viewport in (False, True):
+        job_source = JobSource(
+            window_sizes=window_sizes, multi_viewport=multi_viewport, analyzed=analyzed
+        )
+
+        assert job_source.get_url_jobs("https://www.test.com") == [
+            ("https://www.test.com", [window_sizes[1]])
+        ]
+        assert job_source.get_url_jobs("https://www.test.com/page") == []
+
+
+def test_iter_jobs_counts_analyses():
+    totals = []
+    job_source = JobSource(window_sizes=window_sizes, multi_viewport=True)
+    jobs = job_source.iter_jobs(
+        ["https://www.test.com", "https://www.test.com/page"], on_total=totals.append
+    )
+
+    assert job_source.count == 0
+    assert len(list(jobs)) == 2
+    assert job_source.count == 4
+    assert totals == [4]
+
+
+async def collect(jobs):
+    return [job async for job in jobs]
+
+
+def test_iter_crawled_jobs(fixture_server, tmp_path):
+    server = fixture_server(pages=3, spec=PageSpec(nodes=10, requests=1))
+    input_file = tmp_path / "input" / "urls.csv"
+    totals = []
+    job_source = JobSource(window_sizes=window_sizes)
+    jobs = run(
+        collect(
+            job_source.iter_crawled_jobs(
+                main_url=server.urls[0],
+                input_file=str(input_file),
+                on_total=totals.append,
+            )
+        )
+    )
+
+    assert sorted(url for url, _ in jobs) == sorted(server.urls * 2)
+    assert sorted(input_file.read_text().splitlines()) == sorted(server.urls)
+    assert totals == [2, 4, 6]
+    assert job_source.count == 6
+
+
+def test_iter_crawled_jobs_without_urls(tmp_path):
+    input_file = tmp_path / "urls.csv"
+    job_source = JobSource(window_sizes=window_sizes, multi_viewport=True)
+    jobs = run(
+        collect(
+            job_source.iter_crawled_jobs(
+                main_url="http://127.0.0.1:1/down", input_file=str(input_file)
+            )
+        )
+    )
+
+    assert jobs == [("http://127.0.0.1:1/down", window_sizes)]
+    assert input_file.read_text() == ""
+    assert job_source.count == 2
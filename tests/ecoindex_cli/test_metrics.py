@@ -0,0 +1,90 @@
+from json import loads
+from os import close, pipe, read
+from subprocess import Popen
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+from pytest import raises
+
+from ecoindex_cli.metrics import (
+    CONTENT_TYPE,
+    Histogram,
+    MetricsServer,
+    ProgressStream,
+    RunMetrics,
+    get_children_memory,
+    get_process_memory,
+)
+
+
+def test_histogram():
+    histogram = Histogram(buckets=(1, 5))
+
+    for value in (0.5, 1, 3, 10):
+        histogram.observe(value)
+
+    assert histogram.get_cumulative_counts() == [2, 3, 4]
+    assert histogram.sum == 14.5
+    assert histogram.count == 4
+
+
+def test_run_metrics_render():
+    metrics = RunMetrics(pool_size=4, get_idle_drivers=lambda: 2)
+    metrics.start_analysis(analyses=2)
+    metrics.start_analysis()
+    metrics.end_analysis(completed=1, failed=1, timings={"load": 0.3, "scroll": 0.01})
+
+    text = metrics.render()
+
+    assert 'ecoindex_analyses_total{status="success"} 1' in text
+    assert 'ecoindex_analyses_total{status="failed"} 1' in text
+    assert "ecoindex_analyses_expected NaN" in text
+    assert "ecoindex_analyses_in_flight 1" in text
+    assert "ecoindex_browser_pool_size 4" in text
+    assert "ecoindex_browser_pool_idle 2" in text
+    assert 'ecoindex_phase_duration_seconds_bucket{phase="load",le="0.25"} 0' in text
+    assert 'ecoindex_phase_duration_seconds_bucket{phase="load",le="0.5"} 1' in text
+    assert 'ecoindex_phase_duration_seconds_count{phase="scroll"} 1' in text
+    # Phases are rendered in the order of the analysis
+    assert text.index('phase="load"') < text.index('phase="scroll"')
+    assert text.endswith("# EOF\n")
+
+
+def test_children_memory():
+    with Popen(["sleep", "10"]) as process:
+        assert get_children_memory() >= get_process_memory(process.pid) > 0
+
+        process.kill()
+
+
+def test_metrics_server():
+    metrics = RunMetrics(total=10)
+
+    with MetricsServer(metrics=metrics, port=0, host="127.0.0.1") as server:
+        with urlopen(f"http://127.0.0.1:{server.port}/metrics") as response:
+            assert response.headers["Content-Type"] == CONTENT_TYPE
+            assert "ecoindex_analyses_expected 10" in response.read().decode()
+
+        with raises(HTTPError):
+            urlopen(f"http://127.0.0.1:{server.port}/")
+
+
+def test_progress_stream():
+    metrics = RunMetrics(total=1)
+    read_fd, write_fd = pipe()
+
+    with ProgressStream(metrics=metrics, fd=write_fd, interval=60) as stream:
+        metrics.start_analysis()
+        metrics.end_analysis(completed=1, failed=0, timings={})
+        stream.write_analysis(
+            url="https://www.ecoindex.fr/", width=1920, height=1080, status="success"
+        )
+
+    close(write_fd)
+    events = [loads(line) for line in read(read_fd, 65536).decode().splitlines()]
+    close(read_fd)
+
+    assert [event["event"] for event in events] == ["analysis", "done"]
+    assert events[0]["status"] == "success"
+    assert events[1]["completed"] == 1
+    assert events[1]["total"] == 1
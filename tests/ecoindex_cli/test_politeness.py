@@ -0,0 +1,51 @@
+from time import sleep
+
+from ecoindex_cli.politeness import HostPoliteness, get_host
+
+
+def test_get_host():
+    assert get_host("https://WWW.Ecoindex.fr:443/a-propos/") == "www.ecoindex.fr"
+
+
+def test_politeness_round_robin():
+    politeness = HostPoliteness()
+
+    for job in ["a1", "a2", "a3", "b1", "c1"]:
+        politeness.push(host=job[0], job=job)
+
+    assert [politeness.pop()[1] for _ in range(5)] == ["a1", "b1", "c1", "a2", "a3"]
+    assert politeness.pop() is None
+    assert politeness.queued == 0
+
+
+def test_politeness_max_per_host():
+    politeness = HostPoliteness(max_per_host=1)
+
+    for job in ["a1", "a2", "b1"]:
+        politeness.push(host=job[0], job=job)
+
+    assert politeness.pop() == ("a", "a1")
+    assert politeness.pop() == ("b", "b1")
+    assert politeness.pop() is None
+    assert politeness.get_wait_time() is None
+
+    politeness.done(host="a", duration=1)
+
+    assert politeness.pop() == ("a", "a2")
+    assert politeness.stats["a"].analyses == 1
+    assert politeness.stats["a"].max_in_flight == 1
+
+
+def test_politeness_max_rps_per_host():
+    politeness = HostPoliteness(max_rps_per_host=20)
+
+    for job in ["a1", "a2"]:
+        politeness.push(host=job[0], job=job)
+
+    assert politeness.pop() == ("a", "a1")
+    assert politeness.pop() is None
+    assert 0 < politeness.get_wait_time() <= 0.05
+
+    sleep(0.05)
+
+    assert politeness.pop() == ("a", "a2")
@@ -0,0 +1,110 @@
+from csv import DictReader
+from datetime import datetime
+
+from ecoindex.models import Result, WindowSize
+from selenium.common.exceptions import TimeoutException
+
+from ecoindex_cli.cache import CachedResult
+from ecoindex_cli.enums import FailureKind
+from ecoindex_cli.files import CsvFile
+from ecoindex_cli.metrics import RunMetrics
+from ecoindex_cli.politeness import HostPoliteness, get_host
+from ecoindex_cli.recorder import ResultRecorder
+from ecoindex_cli.retry import Failure
+
+window_sizes = [WindowSize(width=1920, height=1080), WindowSize(width=390, height=844)]
+
+
+def get_result(url: str, window_size: WindowSize, result_class=Result) -> Result:
+    return result_class(
+        url=url,
+        width=window_size.width,
+        height=window_size.height,
+        size=100,
+        nodes=100,
+        requests=10,
+        water=0,
+    )
+
+
+def get_recorder(tmp_path, **kwargs) -> ResultRecorder:
+    recorder = ResultRecorder(
+        results_file=CsvFile(filename=str(tmp_path / "results.csv")), **kwargs
+    )
+    recorder.open()
+
+    return recorder
+
+
+def test_record_results(tmp_path):
+    progress = []
+    metrics = RunMetrics(total=2)
+    recorder = get_recorder(
+        tmp_path, timings=True, metrics=metrics, on_progress=progress.append
+    )
+    job = ("https://www.test.com", window_sizes)
+
+    recorder.start(job)
+    assert metrics.in_flight == 2
+
+    recorder.record(
+        job,
+        (
+            [
+                get_result(job[0], window_sizes[0]),
+                get_result(job[0], window_sizes[1], CachedResult),
+            ],
+            {"load": 1.0},
+        ),
+        None,
+    )
+    recorder.close()
+
+    assert recorder.results_file.count == 2
+    assert not recorder.error_found
+    assert (metrics.completed, metrics.failed, metrics.in_flight) == (2, 0, 0)
+    assert progress == [2]
+
+    with open(tmp_path / "results.timings.csv") as fp:
+        rows = list(DictReader(fp))
+
+    # Timings of a multi viewport analysis are not the ones of a window size
+    assert [(row["url"], row["width"], row["load"]) for row in rows] == [
+        ("https://www.test.com", "", "1.0")
+    ]
+
+
+def test_record_failures(tmp_path):
+    metrics = RunMetrics()
+    politeness = HostPoliteness()
+    recorder = get_recorder(tmp_path, metrics=metrics, politeness=politeness)
+    job = ("https://www.test.com", window_sizes[:1])
+    failure = Failure(
+        url=job[0],
+        width=1920,
+        height=1080,
+        kind=FailureKind.http,
+        message="404",
+        attempts=1,
+        date=datetime.now(),
+    )
+
+    # The host of the jobs is known by the politeness policy of the scheduler
+    politeness.push(get_host(job[0]), job)
+
+    recorder.start(job)
+    recorder.record(job, ([failure], {}), None)
+    recorder.start(job)
+    recorder.record(job, None, TimeoutException("Page load timeout"))
+    recorder.close()
+
+    assert recorder.error_found
+    assert recorder.results_file.count == 0
+    assert recorder.failures_file.count == 2
+    assert recorder.failure_counts == {FailureKind.http: 1, FailureKind.timeout: 1}
+    assert (metrics.completed, metrics.failed) == (0, 2)
+    # Only failures without exception are counted by the recorder
+    assert politeness.stats[get_host(job[0])].errors == 1
+
+    with open(tmp_path / "results.failures.csv") as fp:
+        assert [row["kind"] for row in DictReader(fp)] == ["http", "timeout"]
@@ -0,0 +1,166 @@
+from base64 import b64decode
+from datetime import datetime
+from gzip import decompress
+from json import loads
+from random import Random
+
+from ecoindex_cli.enums import Language
+from ecoindex_cli.report.aggregates import QuantileSketch, ResultsAggregate
+from ecoindex_cli.report.report import Report
+from ecoindex_cli.report.shards import ShardWriter
+
+
+def get_row(index: int, score: float, grade: str = "A") -> dict:
+    return {
+        "url": f"https://www.example.com/{index}",
+        "page_type": "",
+        "score": score,
+        "size": 100 + index,
+        "nodes": 10 * index,
+        "requests": index,
+        "grade": grade,
+        "ges": 1.5,
+        "water": 2.25,
+    }
+
+
+def read_shard(content: str) -> list:
+    return loads(decompress(b64decode(content.split('"')[1])))
+
+
+def test_quantile_sketch_exact():
+    sketch = QuantileSketch()
+
+    for value in (4, 1, 3, 2):
+        sketch.add(value)
+
+    assert sketch.get_median() == 2.5
+    assert sketch.get_mean() == 2.5
+    assert (sketch.min, sketch.max) == (1, 4)
+    assert QuantileSketch().get_median() is None
+
+
+def test_quantile_sketch_approximate():
+    random = Random(42)
+    values = [random.lognormvariate(7, 1) for _ in range(5000)] + [0] * 10
+    sketch = QuantileSketch(relative_accuracy=0.01, exact_limit=100)
+
+    for value in values:
+        sketch.add(value)
+
+    assert sketch.values is None
+    assert len(sketch.buckets) < 1000
+
+    values.sort()
+
+    for q in (0.1, 0.5, 0.9):
+        exact = values[int(q * (len(values) - 1))]
+        assert abs(sketch.quantile(q) - exact) <= 0.01 * exact
+
+    assert sketch.quantile(0) == 0
+    assert sketch.quantile(1) == values[-1]
+    assert sum(sketch.get_weighted_values()[1]) == len(values)
+
+
+def test_results_aggregate():
+    aggregate = ResultsAggregate(top=3)
+
+    for index, score in enumerate([50, 90, 10, 90, 30, 70]):
+        aggregate.add(get_row(index=index, score=score, grade="ABCDEFG"[index]))
+
+    # Rows read from a csv file have string values
+    aggregate.add({**get_row(index=6, score=0), "score": "5", "grade": "G"})
+
+    assert aggregate.count == 7
+    assert aggregate.grades == {"A": 1, "B": 1, "C": 1, "D": 1, "E": 1, "F": 1, "G": 1}
+    assert [index for index, _ in aggregate.best.get_rows()] == [1, 3, 5]
+    assert [index for index, _ in aggregate.worst.get_rows()] == [6, 2, 4]
+    assert aggregate.get_summary()["score"] == {
+        "mean": 345 / 7,
+        "50%": 50,
+        "min": 5,
+        "max": 90,
+    }
+
+
+def test_report_from_results(tmp_path):
+    report = Report(
+        date=datetime(2023, 1, 1),
+        domain="www.example.com",
+        language=Language.en,
+        output_path=str(tmp_path),
+        results_file="results.csv",
+        results=[get_row(index=index, score=index * 5) for index in range(20)],
+    )
+    report.add(get_row(index=20, score=100))
+    report.create_report()
+
+    html = (tmp_path / "index.html").read_text()
+    shard = (tmp_path / "data" / "results-00000.js").read_text()
+
+    # Only the summary, best and worst tables are in the report
+    assert html.count("<tr><th>") == 4 + 10 + 10
+    assert '["data/results-00000.js"]' in html
+    assert shard.startswith('ecoindexShard(0, "')
+    assert len(read_shard(shard)) == 21
+    assert read_shard(shard)[20] == [
+        20,
+        "https://www.example.com/20",
+        "",
+        100,
+        120,
+        200,
+        20,
+        2.25,
+        1.5,
+    ]
+
+    for chart in ("grade", "requests", "size", "nodes"):
+        assert (tmp_path / f"{chart}.svg").exists()
+
+
+def test_shard_writer(tmp_path):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "results-00009.js").write_text("stale")
+    shards = ShardWriter(output_path=str(tmp_path), rows_per_shard=2)
+
+    for index in range(5):
+        shards.append([index, f"https://www.example.com/{index}"])
+
+    shards.flush()
+
+    assert shards.shards == [
+        "data/results-00000.js",
+        "data/results-00001.js",
+        "data/results-00002.js",
+    ]
+    assert sorted(path.name for path in (tmp_path / "data").iterdir()) == [
+        "results-00000.js",
+        "results-00001.js",
+        "results-00002.js",
+    ]
+    assert read_shard((tmp_path / "data" / "results-00002.js").read_text()) == [
+        [4, "https://www.example.com/4"]
+    ]
+
+
+def test_report_escapes_urls(tmp_path):
+    url = "https://a.com/<img/src=x/onerror=alert(1)>"
+    report = Report(
+        date=datetime(2023, 1, 1),
+        domain="a.com",
+        language=Language.en,
+        output_path=str(tmp_path),
+        results_file="results.csv",
+        results=[{**get_row(index=0, score=50), "url": url, "page_type": "<marquee>"}],
+    )
+    report.create_report()
+
+    html = (tmp_path / "index.html").read_text()
+    shard = (tmp_path / "data" / "results-00000.js").read_text()
+
+    assert "<img/src" not in html and "<marquee>" not in html
+    assert "https://a.com/&lt;img/src=x/onerror=alert(1)&gt;" in html
+    # Rows of the full table are kept as data, and rendered as text
+    assert read_shard(shard)[0][1:3] == [url, "<marquee>"]
+    assert "render: $.fn.dataTable.render.text()" in html
@@ -0,0 +1,48 @@
+from selenium.common.exceptions import (
+    InvalidSessionIdException,
+    TimeoutException,
+    WebDriverException,
+)
+
+from ecoindex_cli.enums import FailureKind
+from ecoindex_cli.retry import HttpError, RetryPolicy, classify_failure
+
+
+def test_classify_failure():
+    assert classify_failure(TimeoutException("timeout")) == FailureKind.timeout
+    assert (
+        classify_failure(
+            WebDriverException("unknown error: net::ERR_NAME_NOT_RESOLVED")
+        )
+        == FailureKind.dns
+    )
+    assert (
+        classify_failure(WebDriverException("unknown error: net::ERR_CONNECTION_RESET"))
+        == FailureKind.network
+    )
+    assert classify_failure(HttpError(status=503)) == FailureKind.http
+    assert (
+        classify_failure(InvalidSessionIdException("invalid session id"))
+        == FailureKind.driver_crash
+    )
+    assert (
+        classify_failure(WebDriverException("chrome not reachable"))
+        == FailureKind.driver_crash
+    )
+    assert classify_failure(ValueError("oops")) == FailureKind.other
+
+
+def test_retry_policy():
+    policy = RetryPolicy(max_retries=2, base_delay=1, max_delay=3, budget=3)
+
+    assert not policy.should_retry(kind=FailureKind.dns, attempt=0)
+    assert policy.should_retry(kind=FailureKind.timeout, attempt=0)
+    assert policy.should_retry(kind=FailureKind.timeout, attempt=1)
+    assert not policy.should_retry(kind=FailureKind.timeout, attempt=2)
+    assert policy.should_retry(kind=FailureKind.network, attempt=0)
+    assert not policy.should_retry(kind=FailureKind.network, attempt=0)
+    assert (policy.retries, policy.refused) == (3, 1)
+
+    assert 0.5 <= policy.get_delay(attempt=0) <= 1
+    assert 1 <= policy.get_delay(attempt=1) <= 2
+    assert 1.5 <= policy.get_delay(attempt=5) <= 3
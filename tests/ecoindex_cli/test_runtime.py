@@ -0,0 +1,87 @@
+from asyncio import run
+from typing import List, Tuple
+from unittest.mock import patch
+
+from ecoindex.models import WindowSize
+
+from ecoindex_cli.enums import Executor
+from ecoindex_cli.files import CsvFile
+from ecoindex_cli.jobs import JobSource
+from ecoindex_cli.recorder import ResultRecorder
+from ecoindex_cli.runtime import AnalysisRuntime
+from tests.fixture_server import PageSpec
+from tests.stub_scraper import StubDriverPool, StubScraper
+
+window_sizes = [WindowSize(width=1920, height=1080), WindowSize(width=390, height=844)]
+
+
+def analyze_urls(
+    urls: List[str], tmp_path, multi_viewport: bool = False
+) -> Tuple[ResultRecorder, AnalysisRuntime]:
+    job_source = JobSource(window_sizes=window_sizes, multi_viewport=multi_viewport)
+    recorder = ResultRecorder(
+        results_file=CsvFile(filename=str(tmp_path / "results.csv"))
+    )
+
+    with patch("ecoindex_cli.cli.helper.EcoindexScraper", StubScraper), patch(
+        "ecoindex_cli.runtime.DriverPool", StubDriverPool
+    ):
+        runtime = AnalysisRuntime(
+            max_workers=2, wait_after_scroll=0, wait_before_scroll=0
+        )
+        runtime.open_cache(
+            window_size=window_sizes[0],
+            multi_viewport=multi_viewport,
+            folder=str(tmp_path / "cache"),
+        )
+
+        try:
+            recorder.open()
+            run(runtime.run(jobs=job_source.iter_jobs(urls), recorder=recorder))
+        finally:
+            runtime.close()
+            recorder.close()
+
+    return recorder, runtime
+
+
+def test_runtime_analyzes_jobs(fixture_server, tmp_path):
+    server = fixture_server(pages=3, spec=PageSpec(nodes=10, requests=1))
+    recorder, runtime = analyze_urls(server.urls, tmp_path)
+
+    assert recorder.results_file.count == 6
+    assert not recorder.error_found
+    assert recorder.metrics.completed == 6
+    assert runtime.cache.misses == 6
+
+    hits, misses, _ = runtime.get_driver_pool_stats()
+    # One more driver is borrowed to read the version of the browser
+    assert hits + misses == 7
+
+
+def test_runtime_caches_by_multi_viewport(fixture_server, tmp_path):
+    server = fixture_server(spec=PageSpec(nodes=10, requests=1))
+    analyze_urls(server.urls, tmp_path)
+    _, runtime = analyze_urls(server.urls, tmp_path, multi_viewport=True)
+
+    # Results of a multi viewport analysis are not measured the same way
+    assert (runtime.cache.hits, runtime.cache.misses) == (0, 2)
+
+    recorder, runtime = analyze_urls(server.urls, tmp_path, multi_viewport=True)
+
+    assert (runtime.cache.hits, runtime.cache.misses) == (2, 0)
+    assert recorder.results_file.count == 2
+
+
+def test_runtime_without_browser():
+    with patch("ecoindex_cli.runtime.DriverPool.get_browser_version") as version:
+        version.side_effect = RuntimeError("no browser")
+        runtime = AnalysisRuntime(max_workers=1, executor=Executor.process)
+
+        try:
+            assert runtime.open_cache(window_size=window_sizes[0]) is None
+        finally:
+            runtime.close()
+
+    # Drivers of the analysis processes are not known by the main process
+    assert runtime.get_idle_drivers() is None
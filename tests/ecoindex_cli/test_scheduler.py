@@ -0,0 +1,149 @@
+from asyncio import run, sleep
+
+from ecoindex_cli.enums import Executor
+from ecoindex_cli.politeness import HostPoliteness
+from ecoindex_cli.scheduler import AnalysisScheduler
+
+
+def test_scheduler_bounds_analyses_in_flight():
+    scheduler = AnalysisScheduler(max_workers=3)
+    in_flight = 0
+    max_in_flight = 0
+    done = {}
+
+    async def analyze(job):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await sleep(0.01)
+        in_flight -= 1
+
+        return await scheduler.run_blocking(lambda: job * 2)
+
+    def on_done(job, outcome, exception):
+        done[job] = outcome
+
+    run(scheduler.run(jobs=range(10), analyze=analyze, on_done=on_done))
+    scheduler.close()
+
+    assert max_in_flight == 3
+    assert done == {job: job * 2 for job in range(10)}
+
+
+def test_scheduler_reports_exceptions():
+    scheduler = AnalysisScheduler(max_workers=2)
+    errors = []
+
+    async def analyze(job):
+        raise ValueError(job)
+
+    def on_done(job, outcome, exception):
+        errors.append((job, outcome, type(exception)))
+
+    run(scheduler.run(jobs=[1, 2], analyze=analyze, on_done=on_done))
+    scheduler.close()
+
+    assert sorted(errors) == [(1, None, ValueError), (2, None, ValueError)]
+
+
+def test_scheduler_consumes_async_jobs():
+    scheduler = AnalysisScheduler(max_workers=2)
+    done = []
+
+    async def jobs():
+        for job in range(5):
+            await sleep(0)
+            yield job
+
+    async def analyze(job):
+        return job
+
+    def on_done(job, outcome, exception):
+        done.append(outcome)
+
+    run(scheduler.run(jobs=jobs(), analyze=analyze, on_done=on_done))
+    scheduler.close()
+
+    assert sorted(done) == list(range(5))
+
+
+def test_scheduler_process_executor():
+    scheduler = AnalysisScheduler(max_workers=2, executor=Executor.process)
+    done = {}
+
+    async def analyze(job):
+        return await scheduler.run_blocking(pow, job, 2)
+
+    def on_done(job, outcome, exception):
+        done[job] = outcome
+
+    run(scheduler.run(jobs=range(4), analyze=analyze, on_done=on_done))
+    scheduler.close()
+
+    assert done == {job: job**2 for job in range(4)}
+
+
+def test_scheduler_politeness():
+    scheduler = AnalysisScheduler(
+        max_workers=4, politeness=HostPoliteness(max_per_host=2, lookahead=5)
+    )
+    in_flight = {"a": 0, "b": 0}
+    max_in_flight = {"a": 0, "b": 0}
+    started = []
+
+    async def analyze(job):
+        host = job[0]
+        started.append(job)
+        in_flight[host] += 1
+        max_in_flight[host] = max(max_in_flight[host], in_flight[host])
+        await sleep(0.01)
+        in_flight[host] -= 1
+
+    def on_done(job, outcome, exception):
+        pass
+
+    jobs = [f"a{i}" for i in range(8)] + [f"b{i}" for i in range(2)]
+    run(
+        scheduler.run(
+            jobs=jobs, analyze=analyze, on_done=on_done, get_host=lambda job: job[0]
+        )
+    )
+    scheduler.close()
+
+    assert sorted(started) == sorted(jobs)
+    assert max_in_flight == {"a": 2, "b": 2}
+    # Jobs of the other host are started before the end of the first one
+    assert started.index("b0") < started.index("a7")
+    assert scheduler.politeness.stats["a"].analyses == 8
+
+
+def test_scheduler_backoff_releases_slot():
+    scheduler = AnalysisScheduler(
+        max_workers=1, politeness=HostPoliteness(max_per_host=1)
+    )
+    events = []
+
+    async def analyze(job):
+        events.append(f"start {job}")
+
+        if job == "a":
+            await scheduler.backoff(0.05)
+            events.append(f"retry {job}")
+
+    def on_done(job, outcome, exception):
+        events.append(f"done {job}")
+
+    run(
+        scheduler.run(
+            jobs=["a", "b"],
+            analyze=analyze,
+            on_done=on_done,
+            get_host=lambda job: "host",
+        )
+    )
+    scheduler.close()
+
+    # The other job of the host runs while the first one waits for its retry
+    assert events == ["start a", "start b", "done b", "retry a", "done a"]
+    assert scheduler.politeness.stats["host"].analyses == 2
+    assert scheduler.politeness.stats["host"].max_in_flight == 1
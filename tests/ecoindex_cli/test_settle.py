@@ -0,0 +1,76 @@
+from asyncio import run
+
+from selenium.common.exceptions import JavascriptException
+
+from ecoindex_cli.enums import SettleMode
+from ecoindex_cli.scheduler import AnalysisScheduler
+from ecoindex_cli.settle import wait_for_settle
+
+
+class FakeDriver:
+    def __init__(self, resources=None, ready_state="complete", error=False) -> None:
+        self.resources = resources
+        self.ready_state = ready_state
+        self.error = error
+        self.calls = 0
+
+    def execute_script(self, script: str):
+        self.calls += 1
+
+        if self.error:
+            raise JavascriptException
+
+        return {
+            "readyState": self.ready_state,
+            "idleTime": 10,
+            # A new resource is loaded at each call when resources is None
+            "resources": self.calls if self.resources is None else self.resources,
+        }
+
+
+def settle(driver: FakeDriver, mode: SettleMode, max_wait: float = 1) -> float:
+    scheduler = AnalysisScheduler(max_workers=1)
+
+    try:
+        return run(
+            wait_for_settle(
+                driver=driver,
+                scheduler=scheduler,
+                max_wait=max_wait,
+                mode=mode,
+                quiet_window=0.2,
+                poll_interval=0.05,
+            )
+        )
+    finally:
+        scheduler.close()
+
+
+def test_fixed_waits_max_wait():
+    driver = FakeDriver()
+
+    assert settle(driver, mode=SettleMode.fixed, max_wait=0.3) >= 0.3
+    assert driver.calls == 0
+
+
+def test_network_idle_ends_when_quiet():
+    assert 0.2 <= settle(FakeDriver(resources=3), mode=SettleMode.network_idle) < 0.6
+
+
+def test_network_idle_is_bounded_by_max_wait():
+    waited = settle(FakeDriver(), mode=SettleMode.network_idle, max_wait=0.5)
+
+    assert 0.5 <= waited < 0.8
+
+
+def test_network_idle_waits_for_load():
+    driver = FakeDriver(resources=3, ready_state="loading")
+
+    assert settle(driver, mode=SettleMode.network_idle, max_wait=0.5) >= 0.5
+
+
+def test_network_idle_falls_back_to_max_wait():
+    driver = FakeDriver(error=True)
+
+    assert settle(driver, mode=SettleMode.network_idle, max_wait=0.3) >= 0.3
+    assert driver.calls == 1
@@ -0,0 +1,109 @@
+from datetime import datetime, timezone
+from functools import partial
+from gzip import compress
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+from pytest import fixture
+
+from ecoindex_cli.sitemap import (
+    get_last_run,
+    iter_sitemap_urls,
+    parse_lastmod,
+    set_last_run,
+)
+
+NAMESPACE = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+@fixture
+def sitemap_server(tmp_path):
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), partial(QuietHandler, directory=str(tmp_path))
+    )
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    Thread(target=server.serve_forever, daemon=True).start()
+
+    (tmp_path / "sitemap.xml").write_text(
+        f"<?xml version='1.0' encoding='UTF-8'?><sitemapindex {NAMESPACE}>"
+        f"<sitemap><loc>{base_url}/pages.xml</loc></sitemap>"
+        f"<sitemap><loc>{base_url}/posts.xml.gz</loc>"
+        "<lastmod>2023-06-01</lastmod></sitemap>"
+        f"<sitemap><loc>{base_url}/archives.xml</loc>"
+        "<lastmod>2020-01-01T00:00:00Z</lastmod></sitemap>"
+        "</sitemapindex>"
+    )
+    (tmp_path / "pages.xml").write_text(
+        f"<urlset {NAMESPACE}>"
+        "<url><loc>https://www.ecoindex.fr/</loc></url>"
+        "<url><loc> https://www.ecoindex.fr/a-propos/ </loc>"
+        "<lastmod>2023-01-01T10:00:00+02:00</lastmod></url>"
+        "</urlset>"
+    )
+    (tmp_path / "posts.xml.gz").write_bytes(
+        compress(
+            (
+                f"<urlset {NAMESPACE}>"
+                "<url><loc>https://www.ecoindex.fr/post/</loc>"
+                "<lastmod>2023-06-01</lastmod></url>"
+                "</urlset>"
+            ).encode()
+        )
+    )
+    (tmp_path / "archives.xml").write_text(
+        f"<urlset {NAMESPACE}>"
+        "<url><loc>https://www.ecoindex.fr/archive/</loc></url>"
+        "</urlset>"
+    )
+
+    yield f"{base_url}/sitemap.xml"
+
+    server.shutdown()
+    server.server_close()
+
+
+def test_parse_lastmod():
+    assert parse_lastmod("2023-06-01") == datetime(2023, 6, 1, tzinfo=timezone.utc)
+    assert parse_lastmod("2023-06-01T10:00:00Z") == datetime(
+        2023, 6, 1, 10, tzinfo=timezone.utc
+    )
+    assert parse_lastmod("not a date") is None
+    assert parse_lastmod(None) is None
+
+
+def test_sitemap_index(sitemap_server):
+    assert list(iter_sitemap_urls(sitemap_server)) == [
+        "https://www.ecoindex.fr/",
+        "https://www.ecoindex.fr/a-propos/",
+        "https://www.ecoindex.fr/post/",
+        "https://www.ecoindex.fr/archive/",
+    ]
+
+
+def test_sitemap_since(sitemap_server):
+    # Entries without lastmod are kept, old sitemaps are not even read
+    assert list(iter_sitemap_urls(sitemap_server, since=datetime(2023, 3, 1))) == [
+        "https://www.ecoindex.fr/",
+        "https://www.ecoindex.fr/post/",
+    ]
+
+
+def test_last_run(tmp_path):
+    state_file = str(tmp_path / "state" / "sitemaps.json")
+    date = datetime(2023, 6, 1, tzinfo=timezone.utc)
+
+    assert (
+        get_last_run(sitemap_url="https://a/sitemap.xml", state_file=state_file) is None
+    )
+
+    set_last_run(sitemap_url="https://a/sitemap.xml", state_file=state_file, date=date)
+    set_last_run(sitemap_url="https://b/sitemap.xml", state_file=state_file, date=date)
+
+    assert (
+        get_last_run(sitemap_url="https://a/sitemap.xml", state_file=state_file) == date
+    )
@@ -0,0 +1,75 @@
+from csv import reader
+from time import sleep
+
+from ecoindex_cli.timing import MEASURES, PHASES, PhaseTimer, TimingsFile, TimingStats
+
+
+def test_phase_timer_accumulates():
+    timer = PhaseTimer()
+
+    with timer.phase("load"):
+        sleep(0.01)
+
+    with timer.phase("load"):
+        sleep(0.01)
+
+    assert list(timer.timings) == ["load"]
+    assert timer.timings["load"] >= 0.02
+
+
+def test_phase_timer_records_on_exception():
+    timer = PhaseTimer()
+
+    try:
+        with timer.phase("load"):
+            raise ValueError
+    except ValueError:
+        pass
+
+    assert "load" in timer.timings
+
+
+def test_percentiles():
+    stats = TimingStats()
+
+    for duration in range(1, 101):
+        stats.add({"load": duration, "custom": 1})
+
+    percentiles = stats.get_percentiles()
+
+    assert list(percentiles) == ["load", "custom"]
+    assert percentiles["load"] == (100, 50, 95, 99)
+
+
+def test_percentiles_are_sampled_above_max_samples():
+    stats = TimingStats(max_samples=10)
+
+    for duration in range(1000):
+        stats.add({"load": duration})
+
+    assert len(stats.samples["load"]) == 10
+    assert stats.get_percentiles()["load"][0] == 1000
+
+
+def test_timings_file(tmp_path):
+    filename = str(tmp_path / "results.timings.csv")
+
+    timings_file = TimingsFile(filename=filename)
+    timings_file.append(
+        url="http://a", width=1, height=2, timings={"load": 1.5, "settle": 0.5}
+    )
+    timings_file.close()
+
+    timings_file = TimingsFile(filename=filename, append=True)
+    timings_file.append(url="http://b", width=1, height=2, timings={"scroll": 1})
+    timings_file.close()
+
+    with open(filename) as fp:
+        rows = list(reader(fp))
+
+    assert rows[0] == ["url", "width", "height", *PHASES, "total", *MEASURES]
+    assert len(rows) == 3
+    assert rows[1][PHASES.index("load") + 3] == "1.5"
+    # The settle time is measured within the waits, and not part of the total
+    assert rows[1][-2:] == ["1.5", "0.5"]
+    assert rows[2][-2:] == ["1", "0"]
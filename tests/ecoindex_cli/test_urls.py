@@ -0,0 +1,123 @@
+from ecoindex_cli.enums import TrailingSlash
+from ecoindex_cli.urls import (
+    SeenSet,
+    UrlCanonicalizer,
+    count_lines,
+    is_valid_url,
+    iter_urls_from_file,
+)
+
+
+def test_seen_set():
+    seen = SeenSet()
+
+    assert seen.add("https://www.ecoindex.fr/")
+    assert not seen.add("https://www.ecoindex.fr/")
+    assert seen.add("https://www.ecoindex.fr/a-propos/")
+    assert "https://www.ecoindex.fr/" in seen
+    assert "https://www.ecoindex.fr/contact/" not in seen
+    assert len(seen) == 2
+
+
+def test_seen_set_merges_chunks():
+    seen = SeenSet(chunk_size=4, level_ratio=2)
+    urls = [f"https://www.ecoindex.fr/{i}/" for i in range(42)]
+
+    assert all(seen.add(url) for url in urls)
+    # Chunks are merged until the previous array is more than twice larger
+    assert [len(run) for run in seen.runs] == [32, 8]
+    assert all(list(run) == sorted(run) for run in seen.runs)
+    assert not any(seen.add(url) for url in urls)
+    assert all(url in seen for url in urls)
+    assert "https://www.ecoindex.fr/42/" not in seen
+    assert len(seen) == 42
+
+
+def test_is_valid_url():
+    assert is_valid_url("https://www.ecoindex.fr/a-propos/")
+    assert is_valid_url("http://127.0.0.1:8000/")
+    assert not is_valid_url("www.ecoindex.fr")
+    assert not is_valid_url("ftp://www.ecoindex.fr/")
+
+
+def test_count_lines(tmp_path):
+    filename = tmp_path / "urls.csv"
+    filename.write_text("a\nb\nc")
+
+    assert count_lines(filename) == 3
+    assert count_lines(filename, buffer_size=2) == 3
+
+    filename.write_text("a\nb\n")
+
+    assert count_lines(filename) == 2
+
+
+def test_iter_urls_from_file(tmp_path):
+    filename = tmp_path / "urls.csv"
+    filename.write_text(
+        "https://www.ecoindex.fr/\n"
+        "\n"
+        "  https://www.ecoindex.fr/a-propos/  \n"
+        "https://www.ecoindex.fr/?utm_source=test\n"
+        "not-an-url\n"
+        "http://127.0.0.1:8000/page.html\n"
+    )
+
+    urls = iter_urls_from_file(filename)
+
+    assert next(urls) == "https://www.ecoindex.fr/"
+    assert list(urls) == [
+        "https://www.ecoindex.fr/a-propos/",
+        "http://127.0.0.1:8000/page.html",
+    ]
+
+
+def test_canonicalize_url():
+    canonicalizer = UrlCanonicalizer()
+
+    assert (
+        canonicalizer.canonicalize("HTTP://WWW.Ecoindex.FR")
+        == "http://www.ecoindex.fr/"
+    )
+    assert (
+        canonicalizer.canonicalize("https://www.ecoindex.fr:443/A-propos/#team")
+        == "https://www.ecoindex.fr/A-propos/"
+    )
+    assert (
+        canonicalizer.canonicalize("http://www.ecoindex.fr:8000/?utm_source=test")
+        == "http://www.ecoindex.fr:8000/"
+    )
+
+
+def test_canonicalize_url_trailing_slash():
+    strip = UrlCanonicalizer(trailing_slash=TrailingSlash.strip)
+    add = UrlCanonicalizer(trailing_slash=TrailingSlash.add)
+
+    assert (
+        strip.canonicalize("https://www.ecoindex.fr/a/") == "https://www.ecoindex.fr/a"
+    )
+    assert strip.canonicalize("https://www.ecoindex.fr/") == "https://www.ecoindex.fr/"
+    assert add.canonicalize("https://www.ecoindex.fr/a") == "https://www.ecoindex.fr/a/"
+    assert (
+        add.canonicalize("https://www.ecoindex.fr/a.html")
+        == "https://www.ecoindex.fr/a.html"
+    )
+
+
+def test_canonicalize_url_query_params():
+    canonicalizer = UrlCanonicalizer(
+        keep_query_params=["*"], drop_query_params=["utm_*"], keep_fragment=True
+    )
+
+    assert (
+        canonicalizer.canonicalize(
+            "https://www.ecoindex.fr/?utm_source=test&page=2&lang=fr#top"
+        )
+        == "https://www.ecoindex.fr/?lang=fr&page=2#top"
+    )
+    assert (
+        UrlCanonicalizer(keep_query_params=["page"]).canonicalize(
+            "https://www.ecoindex.fr/?lang=fr&page=2"
+        )
+        == "https://www.ecoindex.fr/?page=2"
+    )
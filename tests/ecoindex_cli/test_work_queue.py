@@ -0,0 +1,74 @@
+from click.exceptions import BadParameter
+from ecoindex.models import Result, WindowSize
+from pytest import raises
+
+from ecoindex_cli.work_queue import SqliteWorkQueue, get_work_queue
+
+window_size = WindowSize(width=1920, height=1080)
+
+
+def get_result(url: str) -> Result:
+    return Result(
+        url=url,
+        width=window_size.width,
+        height=window_size.height,
+        size=100,
+        nodes=100,
+        requests=10,
+        water=0,
+    )
+
+
+def test_put_deduplicates_tasks(tmp_path):
+    queue = SqliteWorkQueue(filename=str(tmp_path / "queue.sqlite"))
+
+    assert queue.put([("https://www.test.com", window_size)] * 2) == 1
+    assert queue.put([("https://www.test.com", window_size)]) == 0
+    assert queue.stats()["pending"] == 1
+
+
+def test_lease_and_ack(tmp_path):
+    queue = SqliteWorkQueue(filename=str(tmp_path / "queue.sqlite"))
+    queue.put([("https://www.test.com", window_size)])
+
+    task = queue.lease(worker="worker-1", visibility_timeout=60)
+    assert task.url == "https://www.test.com"
+    assert queue.lease(worker="worker-2", visibility_timeout=60) is None
+
+    queue.ack(task=task, result=get_result(task.url))
+    queue.ack(task=task, result=get_result(task.url))
+
+    assert queue.stats()["done"] == 1
+    assert [result.url for result in queue.results()] == ["https://www.test.com"]
+
+
+def test_expired_lease_is_visible_again(tmp_path):
+    queue = SqliteWorkQueue(filename=str(tmp_path / "queue.sqlite"))
+    queue.put([("https://www.test.com", window_size)])
+
+    first = queue.lease(worker="worker-1", visibility_timeout=-1)
+    second = queue.lease(worker="worker-2", visibility_timeout=60)
+
+    assert first.id == second.id
+    assert second.attempts == 2
+
+
+def test_fail_until_max_attempts(tmp_path):
+    queue = SqliteWorkQueue(filename=str(tmp_path / "queue.sqlite"), max_attempts=2)
+    queue.put([("https://www.test.com", window_size)])
+
+    queue.fail(task=queue.lease(worker="worker", visibility_timeout=60), error="1")
+    assert queue.stats()["pending"] == 1
+
+    queue.fail(task=queue.lease(worker="worker", visibility_timeout=60), error="2")
+    assert queue.stats()["failed"] == 1
+    assert queue.lease(worker="worker", visibility_timeout=60) is None
+
+
+def test_get_work_queue(tmp_path):
+    assert isinstance(
+        get_work_queue(queue=f"sqlite://{tmp_path}/queue.sqlite"), SqliteWorkQueue
+    )
+
+    with raises(BadParameter):
+        get_work_queue(queue="redis://localhost")
@@ -0,0 +1,154 @@
+from contextlib import contextmanager
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection
+from threading import Thread
+from typing import Iterator, List, NamedTuple
+
+
+class PageSpec(NamedTuple):
+    """
+    Shape of the synthetic pages: `size` is the size of the html document
+    in bytes, `nodes` the number of elements of the DOM and `requests` the
+    number of requests needed to load the page (document included)
+    """
+
+    nodes: int = 500
+    size: int = 50_000
+    requests: int = 20
+    asset_size: int = 10_000
+
+
+def get_urls(base_url: str, pages: int) -> List[str]:
+    return [f"{base_url}/pages/{page}.html" for page in range(pages)]
+
+
+@lru_cache(maxsize=1024)
+def get_page(spec: PageSpec, page: int, pages: int) -> bytes:
+    assets = [
+        f'<img src="/assets/{page}-{asset}.png">'
+        for asset in range(max(spec.requests - 1, 0))
+    ]
+    # Links to the next pages, so that the fixture can also be crawled
+    links = [
+        f'<a href="/pages/{(page + step) % pages}.html">next</a>' for step in (1, 2)
+    ]
+    # html, head, title and body
+    divs = ["<div>.</div>"] * max(spec.nodes - 4 - len(assets) - len(links), 0)
+
+    html = (
+        f"<!DOCTYPE html><html><head><title>Page {page}</title></head><body>"
+        f"{''.join(links)}{''.join(assets)}{''.join(divs)}"
+    )
+    footer = "</body></html>"
+    padding = spec.size - len(html) - len(footer) - len("<!---->")
+
+    if padding > 0:
+        html += f"<!--{'x' * padding}-->"
+
+    return (html + footer).encode()
+
+
+class FixtureServer:
+    """
+    Local http server of synthetic pages, served in a background thread:
+
+    ```
+    with FixtureServer(pages=100, spec=PageSpec(nodes=1000)) as server:
+        urls = server.urls
+    ```
+    """
+
+    def __init__(self, pages: int = 100, spec: PageSpec = PageSpec()) -> None:
+        self.pages = pages
+        self.spec = spec
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.get_handler())
+        self.server.daemon_threads = True
+        self.thread = Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+
+        return f"http://{host}:{port}"
+
+    @property
+    def urls(self) -> List[str]:
+        return get_urls(base_url=self.base_url, pages=self.pages)
+
+    def get_handler(self) -> type:
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path == "/":
+                    body = (
+                        b'<!DOCTYPE html><html><body><a href="/pages/0.html">start</a>'
+                    )
+                    body += b"</body></html>"
+                    content_type = "text/html; charset=utf-8"
+                elif self.path.startswith("/pages/") and self.path.endswith(".html"):
+                    try:
+                        page = int(self.path[len("/pages/") : -len(".html")])
+                    except ValueError:
+                        return self.send_error(404)
+
+                    body = get_page(fixture.spec, page, fixture.pages)
+                    content_type = "text/html; charset=utf-8"
+                elif self.path.startswith("/assets/"):
+                    body = b"\0" * fixture.spec.asset_size
+                    content_type = "image/png"
+                else:
+                    return self.send_error(404)
+
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        return Handler
+
+    def start(self) -> "FixtureServer":
+        self.thread.start()
+
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "FixtureServer":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+
+def serve_fixture(pages: int, spec: PageSpec, connection: Connection) -> None:
+    server = FixtureServer(pages=pages, spec=spec)
+    connection.send(server.base_url)
+    server.server.serve_forever()
+
+
+@contextmanager
+def fixture_server_process(pages: int, spec: PageSpec) -> Iterator[str]:
+    """
+    Runs the fixture server in its own process, so that serving pages does
+    not compete with the benchmarked code for the GIL. Yields the base url
+    """
+    parent_connection, child_connection = Pipe()
+    process = Process(
+        target=serve_fixture, args=(pages, spec, child_connection), daemon=True
+    )
+    process.start()
+
+    try:
+        yield parent_connection.recv()
+    finally:
+        process.terminate()
+        process.join()
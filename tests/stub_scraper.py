@@ -0,0 +1,144 @@
+from html.parser import HTMLParser
+from socket import gaierror
+from typing import Dict, List
+from urllib.error import HTTPError, URLError
+from urllib.parse import urljoin
+from urllib.request import urlopen
+
+from ecoindex.models import PageMetrics, PageType, WindowSize
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from ecoindex_cli.driver_pool import DriverPool, PooledDriver
+
+
+class PageParser(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__()
+        self.nodes = 0
+        self.resources: List[str] = []
+
+    def handle_starttag(self, tag: str, attrs: List) -> None:
+        self.nodes += 1
+
+        if tag in ("img", "script") and dict(attrs).get("src"):
+            self.resources.append(dict(attrs)["src"])
+        elif tag == "link" and dict(attrs).get("href"):
+            self.resources.append(dict(attrs)["href"])
+
+
+class StubDriver:
+    """
+    Stands in for a chrome driver: pages are downloaded with their
+    resources over http, but nothing is rendered
+    """
+
+    def __init__(self) -> None:
+        self.capabilities = {"browserVersion": "stub"}
+        self.nodes = 0
+        self.status: int | None = None
+        self.requests: Dict[str, int] = {}
+
+    def get(self, url: str) -> None:
+        self.nodes = 0
+        self.status = None
+        self.requests = {}
+
+        if url == "about:blank":
+            return
+
+        # Network errors are raised the way chrome reports them
+        try:
+            with urlopen(url, timeout=20) as response:
+                self.status = response.status
+                body = response.read()
+        except HTTPError as e:
+            self.status = e.code
+            body = e.read()
+        except URLError as e:
+            if isinstance(e.reason, gaierror):
+                raise WebDriverException("unknown error: net::ERR_NAME_NOT_RESOLVED")
+
+            raise WebDriverException("unknown error: net::ERR_CONNECTION_REFUSED")
+        except TimeoutError:
+            raise TimeoutException("timeout: Timed out receiving message from renderer")
+
+        parser = PageParser()
+        parser.feed(body.decode(errors="replace"))
+        self.nodes = parser.nodes
+        self.requests[url] = len(body)
+
+        for resource in parser.resources:
+            resource_url = urljoin(url, resource)
+
+            with urlopen(resource_url, timeout=20) as response:
+                self.requests[resource_url] = len(response.read())
+
+    def execute_script(self, script: str, *args) -> int | None:
+        if "responseStatus" in script:
+            return self.status
+
+    def execute_cdp_cmd(self, cmd: str, cmd_args: Dict) -> Dict:
+        return {}
+
+    def delete_all_cookies(self) -> None:
+        pass
+
+    def set_window_size(self, width: int, height: int) -> None:
+        pass
+
+    def set_script_timeout(self, timeout: float) -> None:
+        pass
+
+    def get_log(self, log_type: str) -> List:
+        return []
+
+    def quit(self) -> None:
+        pass
+
+
+class StubScraper:
+    """
+    Same interface as `EcoindexScraper` for what `run_page_analysis` uses,
+    backed by a `StubDriver`
+    """
+
+    def __init__(self, url: str, window_size: WindowSize, **kwargs) -> None:
+        self.url = url
+        self.window_size = window_size
+        self.driver = StubDriver()
+        self.all_requests: Dict[str, int] = {}
+
+    def init_chromedriver(self) -> "StubScraper":
+        return self
+
+    async def scroll_to_bottom(self) -> None:
+        pass
+
+    async def get_page_type(self) -> PageType | None:
+        return None
+
+    async def get_all_requests(self) -> None:
+        # Requests are read once, like the performance log of chrome
+        self.all_requests.update(self.driver.requests)
+        self.driver.requests = {}
+
+    async def get_page_metrics(self) -> PageMetrics:
+        await self.get_all_requests()
+
+        return PageMetrics(
+            size=sum(self.all_requests.values()) / (10**3),
+            nodes=self.driver.nodes,
+            requests=len(self.all_requests),
+        )
+
+
+class StubDriverPool(DriverPool):
+    """
+    Driver pool of stub drivers: the pool logic itself (reset, recycling,
+    bounds) is the real one
+    """
+
+    def launch(self, window_size: WindowSize) -> PooledDriver:
+        return PooledDriver(
+            launcher=StubScraper(url="about:blank", window_size=window_size)
+        )
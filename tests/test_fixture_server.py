@@ -0,0 +1,28 @@
+from urllib.request import urlopen
+
+from tests.fixture_server import FixtureServer, PageSpec, get_page
+
+
+def test_page_matches_spec():
+    page = get_page(PageSpec(nodes=300, size=20_000, requests=10), 0, 10).decode()
+
+    assert len(page) == 20_000
+    assert page.count("<img") == 9
+    assert page.count("<") - page.count("</") - page.count("<!") == 300
+
+
+def test_fixture_server():
+    with FixtureServer(
+        pages=3, spec=PageSpec(nodes=10, size=1000, asset_size=10)
+    ) as server:
+        assert len(server.urls) == 3
+
+        with urlopen(server.urls[2]) as response:
+            page = response.read()
+
+        with urlopen(f"{server.base_url}/assets/2-0.png") as response:
+            asset = response.read()
+
+    assert len(page) == 1000
+    assert b'href="/pages/0.html"' in page
+    assert len(asset) == 10